@@ -0,0 +1,58 @@
+# archive_store/__init__.py
+from utilities.lazy import lazy_exports
+
+# Submodules are imported on first use of one of their names
+_EXPORTS = {
+    "init_archive": ".archive_store",
+    "migrate_legacy_archive": ".archive_store",
+    "insert_works": ".archive_store",
+    "fill_missing_edges": ".archive_store",
+    "fill_institution_ids": ".archive_store",
+    "split_list": ".archive_store",
+    "openalex_work_number": ".archive_store",
+    "openalex_work_url": ".archive_store",
+    "works_by_author": ".archive_store",
+    "works_by_institution": ".archive_store",
+    "works_by_topic": ".archive_store",
+    "works_citing": ".archive_store",
+    "normalize_search_text": ".search",
+    "build_match_query": ".search",
+    "index_works": ".search",
+    "unindex_works": ".search",
+    "rebuild_search_index": ".search",
+    "search_archive": ".search",
+    "LIGHT_COLUMNS": ".viewer",
+    "HEAVY_COLUMNS": ".viewer",
+    "fetch_page": ".viewer",
+    "count_works": ".viewer",
+    "fetch_work_details": ".viewer",
+    "archive_facets": ".viewer",
+    "CitationGraph": ".graph",
+    "update_graph": ".graph",
+    "update_graph_async": ".graph",
+    "bump_graph_version": ".graph",
+    "graph_is_stale": ".graph",
+    "most_influential": ".graph",
+    "related_papers": ".graph",
+    "refresh_archive": ".refresh",
+    "refresh_async": ".refresh",
+    "due_works": ".refresh",
+    "last_refresh": ".refresh",
+    "assign_region": ".regions",
+    "build_region_index": ".regions",
+    "ensure_region_index": ".regions",
+    "ensure_region_index_async": ".regions",
+    "region_index_building": ".regions",
+    "region_institution_ids": ".regions",
+    "connect": ".storage",
+    "get_connection": ".storage",
+    "canonical_doi": ".storage",
+    "archive_records": ".storage",
+    "upsert_works": ".storage",
+    "ArchiveWriter": ".storage",
+    "get_writer": ".storage",
+    "ingest_async": ".storage",
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -0,0 +1,510 @@
+# archive_store/archive_store.py
+import re
+
+import pandas as pd
+
+from .graph import init_graph_tables
+from .regions import openalex_institution_number
+from .search import init_search_index, index_works
+
+OPENALEX_WORK_PREFIX = "https://openalex.org/W"
+_OPENALEX_WORK_ID = re.compile(r"(?:^|/)W(\d+)$")
+
+# Name tables for the list-valued columns of the legacy research_archive table
+NAME_TABLES = {
+    "authors": ("authors", "author_id", "work_authors"),
+    "institution": ("institutions", "institution_id", "work_institutions"),
+    "topics": ("topics", "topic_id", "work_topics"),
+}
+# OpenAlex work-id edge tables: legacy column -> (edge table, id column)
+EDGE_TABLES = {
+    "referenced_works": ("work_references", "referenced_id"),
+    "related_works": ("work_related", "related_id"),
+}
+# works column holding each edge list's length (NULL while the list is unknown)
+EDGE_COUNT_COLUMNS = {"referenced_works": "referenced_count", "related_works": "related_count"}
+
+# Institutions are told apart by OpenAlex id where the results carried one,
+# since display names are not unique; rows archived without one go by name
+INSTITUTIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS {name} (
+    institution_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    openalex_id INTEGER UNIQUE,
+    ror TEXT
+);
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS works (
+    work_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    openalex_id INTEGER,
+    doi TEXT,
+    title TEXT,
+    year INTEGER,
+    type TEXT,
+    citations INTEGER,
+    referenced_count INTEGER,
+    related_count INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_works_doi ON works(doi);
+CREATE INDEX IF NOT EXISTS idx_works_openalex_id ON works(openalex_id);
+CREATE INDEX IF NOT EXISTS idx_works_year ON works(year, citations);
+
+CREATE TABLE IF NOT EXISTS authors (author_id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+""" + INSTITUTIONS_TABLE.format(name="institutions") + """
+CREATE INDEX IF NOT EXISTS idx_institutions_name ON institutions(name);
+CREATE TABLE IF NOT EXISTS topics (topic_id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+
+CREATE TABLE IF NOT EXISTS work_authors (
+    work_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    author_id INTEGER NOT NULL,
+    PRIMARY KEY (work_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_work_authors_author ON work_authors(author_id, work_id);
+
+CREATE TABLE IF NOT EXISTS work_institutions (
+    work_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    institution_id INTEGER NOT NULL,
+    PRIMARY KEY (work_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_work_institutions_institution ON work_institutions(institution_id, work_id);
+
+CREATE TABLE IF NOT EXISTS work_topics (
+    work_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    topic_id INTEGER NOT NULL,
+    PRIMARY KEY (work_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_work_topics_topic ON work_topics(topic_id, work_id);
+
+CREATE TABLE IF NOT EXISTS work_references (
+    work_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    referenced_id INTEGER NOT NULL,
+    PRIMARY KEY (work_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_work_references_referenced ON work_references(referenced_id, work_id);
+
+CREATE TABLE IF NOT EXISTS work_related (
+    work_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    related_id INTEGER NOT NULL,
+    PRIMARY KEY (work_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_work_related_related ON work_related(related_id, work_id);
+
+-- Citation refresh (see refresh.py): each work's last-synced watermark and a run log
+CREATE TABLE IF NOT EXISTS work_sync (
+    work_id INTEGER PRIMARY KEY,
+    synced_at TEXT NOT NULL,
+    updated_date TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_work_sync_synced ON work_sync(synced_at);
+
+-- Institution-to-region index of the regional view (see regions.py), keyed by OpenAlex institution id
+CREATE TABLE IF NOT EXISTS region_institutions (
+    institution_id INTEGER PRIMARY KEY,
+    ror TEXT,
+    name TEXT NOT NULL,
+    country_code TEXT NOT NULL,
+    city TEXT,
+    region TEXT NOT NULL,
+    latitude REAL,
+    longitude REAL,
+    works_count INTEGER,
+    fetched_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_region_institutions_region ON region_institutions(country_code, region, works_count);
+
+CREATE TABLE IF NOT EXISTS refresh_runs (
+    run_id INTEGER PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    requests INTEGER NOT NULL DEFAULT 0,
+    checked INTEGER NOT NULL DEFAULT 0,
+    updated INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+"""
+
+# Reproduces the legacy research_archive shape. Lists are re-joined in their
+# original order and empty name lists read back as ''. Work-id lists read
+# back as NULL when their count is unknown (never fetched) and '' when empty.
+COMPAT_VIEW = f"""
+CREATE VIEW IF NOT EXISTS research_archive AS
+SELECT
+    w.work_id AS id,
+    w.title AS title,
+    COALESCE((SELECT group_concat(name, ', ') FROM (
+        SELECT a.name FROM work_authors wa JOIN authors a USING (author_id)
+        WHERE wa.work_id = w.work_id ORDER BY wa.position)), '') AS authors,
+    COALESCE((SELECT group_concat(name, ', ') FROM (
+        SELECT i.name FROM work_institutions wi JOIN institutions i USING (institution_id)
+        WHERE wi.work_id = w.work_id ORDER BY wi.position)), '') AS institution,
+    COALESCE(CAST(w.year AS TEXT), '') AS year,
+    w.type AS type,
+    w.citations AS citations,
+    w.doi AS doi,
+    COALESCE((SELECT group_concat(name, ', ') FROM (
+        SELECT t.name FROM work_topics wt JOIN topics t USING (topic_id)
+        WHERE wt.work_id = w.work_id ORDER BY wt.position)), '') AS topics,
+    CASE WHEN w.related_count IS NOT NULL THEN COALESCE((
+        SELECT group_concat('{OPENALEX_WORK_PREFIX}' || related_id, ', ') FROM (
+        SELECT related_id FROM work_related r
+        WHERE r.work_id = w.work_id ORDER BY r.position)), '') END AS related_works,
+    CASE WHEN w.referenced_count IS NOT NULL THEN COALESCE((
+        SELECT group_concat('{OPENALEX_WORK_PREFIX}' || referenced_id, ', ') FROM (
+        SELECT referenced_id FROM work_references r
+        WHERE r.work_id = w.work_id ORDER BY r.position)), '') END AS referenced_works
+FROM works w
+"""
+
+
+def split_list(value):
+    """Split a legacy comma-joined column into its items."""
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [item.strip() for item in value.split(", ") if item.strip()]
+
+
+def openalex_work_number(value):
+    """Integer part of an OpenAlex work id ('https://openalex.org/W123' -> 123)."""
+    if isinstance(value, int):
+        return value
+    match = _OPENALEX_WORK_ID.search((value or "").strip())
+    return int(match.group(1)) if match else None
+
+
+def openalex_work_url(number):
+    return f"{OPENALEX_WORK_PREFIX}{number}"
+
+
+def _year(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _object_type(conn, name):
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+
+def _name_ids(conn, table, id_column, names):
+    """Return {name: id} for names, creating rows for unseen ones."""
+    unique = list(dict.fromkeys(names))
+    ids = {}
+    for start in range(0, len(unique), 500):
+        chunk = unique[start:start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        ids.update(conn.execute(f"SELECT name, {id_column} FROM {table} WHERE name IN ({placeholders})", chunk))
+    missing = [(name,) for name in unique if name not in ids]
+    if missing:
+        conn.executemany(f"INSERT INTO {table} (name) VALUES (?)", missing)
+        ids.update(
+            (name, conn.execute(f"SELECT {id_column} FROM {table} WHERE name = ?", (name,)).fetchone()[0])
+            for (name,) in missing
+        )
+    return ids
+
+
+def _edge_numbers(value):
+    """OpenAlex work numbers of a list column, or None when the list is unknown."""
+    if value is None:
+        return None
+    numbers = (openalex_work_number(url) for url in split_list(value))
+    return [n for n in numbers if n is not None]
+
+
+def insert_works(conn, records):
+    """Insert works and their list columns into the normalized tables.
+
+    records are dicts in the legacy column layout (title, authors,
+    institution, year, type, citations, doi, topics, related_works,
+    referenced_works, optionally id, openalex_id, institution_ids and
+    institution_rors). List columns may be lists or comma-joined strings.
+    Returns the new work ids. The caller owns the transaction.
+    """
+    records = list(records)
+    edges = {column: [_edge_numbers(record.get(column)) for record in records] for column in EDGE_TABLES}
+    work_ids = []
+    for i, record in enumerate(records):
+        referenced, related = edges["referenced_works"][i], edges["related_works"][i]
+        cursor = conn.execute(
+            "INSERT INTO works (work_id, openalex_id, doi, title, year, type, citations, referenced_count, related_count) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                record.get("id"),
+                openalex_work_number(record.get("openalex_id")),
+                record.get("doi"),
+                record.get("title"),
+                _year(record.get("year")),
+                record.get("type"),
+                record.get("citations"),
+                None if referenced is None else len(referenced),
+                None if related is None else len(related),
+            ),
+        )
+        work_ids.append(cursor.lastrowid)
+
+    for column, (table, id_column, edge_table) in NAME_TABLES.items():
+        lists = [split_list(record.get(column)) for record in records]
+        if table == "institutions":
+            id_lists = _institution_ids(conn, records, lists)
+        else:
+            ids = _name_ids(conn, table, id_column, [name for names in lists for name in names])
+            id_lists = [[ids[name] for name in names] for names in lists]
+        conn.executemany(
+            f"INSERT INTO {edge_table} (work_id, position, {id_column}) VALUES (?, ?, ?)",
+            [(work_id, position, i) for work_id, row in zip(work_ids, id_lists) for position, i in enumerate(row)],
+        )
+
+    for column, (edge_table, id_column) in EDGE_TABLES.items():
+        rows = [
+            (work_id, position, number)
+            for work_id, numbers in zip(work_ids, edges[column])
+            for position, number in enumerate(numbers or ())
+        ]
+        conn.executemany(f"INSERT INTO {edge_table} (work_id, position, {id_column}) VALUES (?, ?, ?)", rows)
+    if _object_type(conn, "works_fts"):
+        index_works(conn, work_ids)
+    return work_ids
+
+
+def fill_missing_edges(conn, pairs):
+    """Add reference lists to existing works that were archived without them.
+
+    pairs are (work_id, record) with records in the insert_works layout. A
+    list is stored only for works that have none yet. Returns the number of
+    lists added. The caller owns the transaction.
+    """
+    filled = 0
+    for column, (edge_table, id_column) in EDGE_TABLES.items():
+        count_column = EDGE_COUNT_COLUMNS[column]
+        lists = {}
+        for work_id, record in pairs:
+            numbers = _edge_numbers(record.get(column))
+            if numbers:
+                lists[work_id] = numbers
+        ids = list(lists)
+        missing = set()
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            missing.update(w for (w,) in conn.execute(
+                f"SELECT work_id FROM works WHERE work_id IN ({','.join('?' * len(chunk))}) "
+                f"AND COALESCE({count_column}, 0) = 0",
+                chunk,
+            ))
+        missing = sorted(missing)
+        conn.executemany(
+            f"INSERT INTO {edge_table} (work_id, position, {id_column}) VALUES (?, ?, ?)",
+            [(work_id, position, number) for work_id in missing for position, number in enumerate(lists[work_id])],
+        )
+        conn.executemany(
+            f"UPDATE works SET {count_column} = ? WHERE work_id = ?", [(len(lists[w]), w) for w in missing]
+        )
+        filled += len(missing)
+    return filled
+
+
+def _institutions(record, names):
+    """(name, OpenAlex institution number or None, ROR) for each institution of a record.
+
+    The optional institution_ids and institution_rors lists run alongside
+    the names (see archive_records).
+    """
+    ids = record.get("institution_ids") or ()
+    rors = record.get("institution_rors") or ()
+    if len(ids) != len(names):
+        return [(name, None, None) for name in names]
+    rors = rors if len(rors) == len(names) else [None] * len(names)
+    return [(name, openalex_institution_number(i), r or None) for name, i, r in zip(names, ids, rors)]
+
+
+def _select_ids(conn, sql, keys):
+    """Run sql (with an IN ({}) placeholder) over keys in chunks; returns its (key, id) rows as a dict."""
+    found = {}
+    keys = list(keys)
+    for start in range(0, len(keys), 500):
+        chunk = keys[start:start + 500]
+        found.update(conn.execute(sql.format(",".join("?" * len(chunk))), chunk))
+    return found
+
+
+def _institution_ids(conn, records, lists):
+    """Institution row ids of each record's institution names, creating rows for unseen institutions.
+
+    An institution with an OpenAlex id is found by that id, or claims the
+    row archived under its name before ids were kept; one without an id is
+    found by name.
+    """
+    entries = [_institutions(record, names) for record, names in zip(records, lists)]
+    flat = [entry for row in entries for entry in row]
+    by_number = _select_ids(
+        conn, "SELECT openalex_id, institution_id FROM institutions WHERE openalex_id IN ({})",
+        {number for _, number, _ in flat if number is not None},
+    )
+    names = {name for name, number, _ in flat if number not in by_number}
+    unidentified = _select_ids(
+        conn,
+        "SELECT name, MIN(institution_id) FROM institutions WHERE openalex_id IS NULL AND name IN ({}) GROUP BY name",
+        names,
+    )
+    by_name = dict(unidentified)
+    by_name.update((name, i) for name, i in _select_ids(
+        conn, "SELECT name, MIN(institution_id) FROM institutions WHERE name IN ({}) GROUP BY name", names
+    ).items() if name not in by_name)
+
+    def row_id(name, number, ror):
+        if number is None:
+            if name not in by_name:
+                by_name[name] = conn.execute("INSERT INTO institutions (name) VALUES (?)", (name,)).lastrowid
+            return by_name[name]
+        if number not in by_number:
+            claimed = unidentified.pop(name, None)
+            if claimed is not None:
+                conn.execute(
+                    "UPDATE institutions SET openalex_id = ?, ror = ? WHERE institution_id = ?", (number, ror, claimed)
+                )
+                by_number[number] = claimed
+            else:
+                by_number[number] = conn.execute(
+                    "INSERT INTO institutions (name, openalex_id, ror) VALUES (?, ?, ?)", (name, number, ror)
+                ).lastrowid
+            by_name.setdefault(name, by_number[number])
+        return by_number[number]
+
+    return [[row_id(*entry) for entry in row] for row in entries]
+
+
+def fill_institution_ids(conn, pairs):
+    """Relink existing works to identified institutions once their results carry OpenAlex ids.
+
+    pairs are (work_id, record) with records in the insert_works layout.
+    Only works linked to an institution without an id are relinked, so the
+    works archived before ids were kept gain them. Returns the number of
+    relinked works. The caller owns the transaction.
+    """
+    pairs = [(work_id, record) for work_id, record in pairs if any(record.get("institution_ids") or ())]
+    unidentified = set()
+    ids = [work_id for work_id, _ in pairs]
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        unidentified.update(w for (w,) in conn.execute(
+            "SELECT DISTINCT wi.work_id FROM work_institutions wi JOIN institutions i USING (institution_id) "
+            f"WHERE wi.work_id IN ({','.join('?' * len(chunk))}) AND i.openalex_id IS NULL",
+            chunk,
+        ))
+    pairs = [(work_id, record) for work_id, record in pairs if work_id in unidentified]
+    if not pairs:
+        return 0
+    lists = [split_list(record.get("institution")) for _, record in pairs]
+    id_lists = _institution_ids(conn, [record for _, record in pairs], lists)
+    conn.executemany("DELETE FROM work_institutions WHERE work_id = ?", [(work_id,) for work_id, _ in pairs])
+    conn.executemany(
+        "INSERT INTO work_institutions (work_id, position, institution_id) VALUES (?, ?, ?)",
+        [(work_id, position, i) for (work_id, _), row in zip(pairs, id_lists) for position, i in enumerate(row)],
+    )
+    if _object_type(conn, "works_fts"):
+        index_works(conn, [work_id for work_id, _ in pairs])
+    return len(pairs)
+
+
+def _upgrade_institutions(conn):
+    """Rebuild an institutions table from before OpenAlex ids were kept.
+
+    Names were unique then; row ids are kept, so every link stays valid.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(institutions)")}
+    if not columns or "openalex_id" in columns:
+        return
+    conn.executescript(
+        "BEGIN;"
+        # The view reads institutions; init_archive creates it again
+        "DROP VIEW IF EXISTS research_archive;"
+        + INSTITUTIONS_TABLE.format(name="institutions_upgraded")
+        + "INSERT INTO institutions_upgraded (institution_id, name) SELECT institution_id, name FROM institutions;"
+        "DROP TABLE institutions;"
+        "ALTER TABLE institutions_upgraded RENAME TO institutions;"
+        "COMMIT;"
+    )
+
+
+def migrate_legacy_archive(conn):
+    """Move a legacy research_archive table into the normalized tables.
+
+    Row ids are preserved and the table is replaced by the compatibility
+    view. Returns the number of migrated rows, or 0 if there was nothing to do.
+    """
+    if _object_type(conn, "research_archive") != "table":
+        return 0
+    legacy = conn.execute("SELECT * FROM research_archive")
+    columns = [d[0] for d in legacy.description]
+    records = [dict(zip(columns, row)) for row in legacy.fetchall()]
+    with conn:
+        conn.executescript("BEGIN;" + SCHEMA)
+        insert_works(conn, records)
+        conn.execute("DROP TABLE research_archive")
+        conn.execute(COMPAT_VIEW)
+    conn.execute("VACUUM")
+    return len(records)
+
+
+def init_archive(conn):
+    """Create the normalized archive schema, search index and graph tables, migrating a legacy table if present."""
+    migrate_legacy_archive(conn)
+    _upgrade_institutions(conn)
+    conn.executescript(SCHEMA)
+    conn.execute(COMPAT_VIEW)
+    init_graph_tables(conn)
+    conn.commit()
+    init_search_index(conn)
+
+
+def _works_where(conn, join, condition, params):
+    return pd.read_sql(
+        f"SELECT w.work_id, w.title, w.year, w.type, w.citations, w.doi FROM works w {join} "
+        f"WHERE {condition} ORDER BY w.citations DESC",
+        conn,
+        params=params,
+    )
+
+
+def works_by_author(conn, name):
+    """Works with the given author, via the (author_id, work_id) index."""
+    return _works_where(
+        conn, "JOIN work_authors wa ON wa.work_id = w.work_id JOIN authors a ON a.author_id = wa.author_id",
+        "a.name = ?", (name,),
+    )
+
+
+def works_by_institution(conn, name):
+    """Works affiliated with the given institution."""
+    return _works_where(
+        conn,
+        "JOIN (SELECT DISTINCT wi.work_id FROM work_institutions wi JOIN institutions i "
+        "ON i.institution_id = wi.institution_id WHERE i.name = ?) m ON m.work_id = w.work_id",
+        "1", (name,),
+    )
+
+
+def works_by_topic(conn, name):
+    """Works tagged with the given topic."""
+    return _works_where(
+        conn, "JOIN work_topics wt ON wt.work_id = w.work_id JOIN topics t ON t.topic_id = wt.topic_id",
+        "t.name = ?", (name,),
+    )
+
+
+def works_citing(conn, openalex_id):
+    """Archived works whose references include the given OpenAlex work."""
+    return _works_where(
+        conn, "JOIN work_references r ON r.work_id = w.work_id",
+        "r.referenced_id = ?", (openalex_work_number(openalex_id),),
+    )
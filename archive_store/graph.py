@@ -0,0 +1,527 @@
+# archive_store/graph.py
+import threading
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import span
+from utilities.constants import ARCHIVE_DB_PATH
+
+PAGERANK_DAMPING = 0.85
+PAGERANK_TOLERANCE = 1e-10
+PAGERANK_MAX_ITERATIONS = 100
+# Similar works kept per work in work_similarity
+SIMILAR_PER_WORK = 20
+# Weight of OpenAlex's own related_works suggestion in the similarity score
+RELATED_WEIGHT = 0.5
+# References (or citing works) shared by more works than this are ignored
+# when pairing works, like stop words in text similarity
+MAX_SHARED_DEGREE = 200
+# Upper bound of a similarity score: two cosines of at most 1 plus the related bonus
+MAX_SCORE = 2 + RELATED_WEIGHT
+# Works whose similarity lists are computed together
+SIMILARITY_BLOCK = 2048
+
+GRAPH_SCHEMA = """
+CREATE TABLE IF NOT EXISTS graph_metrics (
+    work_id INTEGER PRIMARY KEY,
+    pagerank REAL NOT NULL,
+    cited_by INTEGER NOT NULL,
+    cites INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_graph_metrics_pagerank ON graph_metrics(pagerank DESC);
+
+CREATE TABLE IF NOT EXISTS work_similarity (
+    work_id INTEGER NOT NULL,
+    similar_id INTEGER NOT NULL,
+    co_citations INTEGER NOT NULL,
+    coupling INTEGER NOT NULL,
+    related INTEGER NOT NULL,
+    score REAL NOT NULL,
+    PRIMARY KEY (work_id, similar_id)
+) WITHOUT ROWID;
+
+-- last_work_id: newest work in the tables; version: bumped when archived ids or
+-- reference lists of existing works change; built_version: version they reflect
+CREATE TABLE IF NOT EXISTS graph_state (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+
+def init_graph_tables(conn):
+    conn.executescript(GRAPH_SCHEMA)
+
+
+def _csr(rows, cols, n_rows):
+    """(indptr, indices) of a sparse 0/1 matrix given its edge coordinates.
+
+    Edges keep their given order within a row.
+    """
+    if len(rows) > 1 and not (rows[:-1] <= rows[1:]).all():
+        order = np.argsort(rows, kind="stable")
+        rows, cols = rows[order], cols[order]
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+    return indptr, cols.astype(np.int64)
+
+
+def _gather(indptr, indices, rows):
+    """Column indices of the given CSR rows, concatenated, and the position in rows each came from."""
+    rows = np.asarray(rows, dtype=np.int64)
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    owner = np.repeat(np.arange(len(rows)), lengths)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return owner, indices[np.arange(total) + offsets]
+
+
+def _two_hop(first, second, rows, through):
+    """(owner, end) pairs of rows -> middle -> end paths whose middle node passes the through mask."""
+    owner, middle = _gather(*first, rows)
+    keep = through[middle]
+    step, end = _gather(*second, middle[keep])
+    return owner[keep][step], end
+
+
+class CitationGraph:
+    """The archive's citation edges as integer-indexed CSR arrays.
+
+    Works are numbered 0..n-1 in work_id order. Every distinct referenced
+    OpenAlex work (archived or not) is a column of the reference matrix;
+    column_work maps a column to the archived work it points at, or -1.
+    Citations between archived works are the reference edges whose column
+    maps to a work. Works added later append rows, so extend() only reads
+    the new works' edges.
+    """
+
+    def __init__(self):
+        self.work_ids = np.empty(0, dtype=np.int64)
+        self.openalex_ids = np.empty(0, dtype=np.int64)
+        self.columns = {}                    # referenced OpenAlex number -> column
+        self.column_numbers = []             # column -> referenced OpenAlex number
+        self.rows_by_openalex = {}           # archived OpenAlex number -> row
+        self.column_work = np.empty(0, dtype=np.int64)
+        self.ref_rows = np.empty(0, dtype=np.int64)
+        self.ref_cols = np.empty(0, dtype=np.int64)
+        self.related_rows = np.empty(0, dtype=np.int64)
+        self.related_cols = np.empty(0, dtype=np.int64)
+        self.last_work_id = 0
+        self.version = 0
+        self.pagerank = None
+
+    @property
+    def size(self):
+        return len(self.work_ids)
+
+    def _column_ids(self, numbers):
+        columns = self.columns
+        out = np.empty(len(numbers), dtype=np.int64)
+        for i, number in enumerate(numbers):
+            column = columns.get(number)
+            if column is None:
+                column = columns[number] = len(columns)
+                self.column_numbers.append(number)
+            out[i] = column
+        return out
+
+    def extend(self, conn, upto=None):
+        """Add works with last_work_id < work_id <= upto; returns their row indices."""
+        bounds = (self.last_work_id, upto if upto is not None else 2 ** 63 - 1)
+        works = conn.execute(
+            "SELECT work_id, openalex_id FROM works WHERE work_id > ? AND work_id <= ? ORDER BY work_id", bounds
+        ).fetchall()
+        if not works:
+            return np.empty(0, dtype=np.int64)
+        first, known_columns = self.size, len(self.columns)
+        new_ids = np.fromiter((w for w, _ in works), dtype=np.int64, count=len(works))
+        new_openalex = np.fromiter((o if o is not None else -1 for _, o in works), dtype=np.int64, count=len(works))
+        self.work_ids = np.concatenate([self.work_ids, new_ids])
+        self.openalex_ids = np.concatenate([self.openalex_ids, new_openalex])
+        self.last_work_id = int(new_ids[-1])
+
+        def edges(table, id_column):
+            found = conn.execute(
+                f"SELECT work_id, {id_column} FROM {table} WHERE work_id > ? AND work_id <= ? ORDER BY work_id, position",
+                bounds,
+            ).fetchall()
+            rows = first + np.searchsorted(new_ids, np.fromiter((w for w, _ in found), dtype=np.int64, count=len(found)))
+            return rows, self._column_ids([n for _, n in found])
+
+        rows, cols = edges("work_references", "referenced_id")
+        self.ref_rows = np.concatenate([self.ref_rows, rows])
+        self.ref_cols = np.concatenate([self.ref_cols, cols])
+        rows, cols = edges("work_related", "related_id")
+        self.related_rows = np.concatenate([self.related_rows, rows])
+        self.related_cols = np.concatenate([self.related_cols, cols])
+
+        # Point columns at archived works; the first archived copy of an OpenAlex work wins
+        column_work = np.full(len(self.columns), -1, dtype=np.int64)
+        column_work[:known_columns] = self.column_work
+        for row in range(first, self.size):
+            number = int(self.openalex_ids[row])
+            if number >= 0 and self.rows_by_openalex.setdefault(number, row) == row:
+                column = self.columns.get(number)
+                if column is not None and column < known_columns:
+                    column_work[column] = row
+        column_work[known_columns:] = [self.rows_by_openalex.get(n, -1) for n in self.column_numbers[known_columns:]]
+        self.column_work = column_work
+        self._index()
+        return np.arange(first, self.size)
+
+    def _index(self):
+        n, m = self.size, len(self.columns)
+        # Works x referenced columns, and its transpose; a reference listed twice counts once
+        ref_rows, ref_cols = np.divmod(np.unique(self.ref_rows * max(m, 1) + self.ref_cols), max(m, 1))
+        self.refs = _csr(ref_rows, ref_cols, n)
+        self.referrers = _csr(ref_cols, ref_rows, m)
+        # Archived citer -> archived cited, without duplicate edges
+        targets = self.column_work[self.ref_cols]
+        inside = targets >= 0
+        pairs = np.unique(self.ref_rows[inside] * n + targets[inside])
+        self.cite_src, self.cite_dst = pairs // n, pairs % n
+        self.cites = _csr(self.cite_src, self.cite_dst, n)
+        self.cited_by = _csr(self.cite_dst, self.cite_src, n)
+        related = self.column_work[self.related_cols]
+        keep = related >= 0
+        self.related = _csr(self.related_rows[keep], related[keep], n)
+        self.related_by = _csr(related[keep], self.related_rows[keep], n)
+
+    def out_degree(self):
+        return np.diff(self.cites[0])
+
+    def in_degree(self):
+        return np.diff(self.cited_by[0])
+
+    def reference_counts(self):
+        return np.diff(self.refs[0])
+
+    def compute_pagerank(self, damping=PAGERANK_DAMPING, tol=PAGERANK_TOLERANCE, max_iter=PAGERANK_MAX_ITERATIONS):
+        """PageRank over in-archive citations by power iteration.
+
+        Starts from the previous ranks when there are any, so an update
+        after a small ingest converges in a few iterations. Works that cite
+        nothing in the archive spread their rank evenly.
+        """
+        n = self.size
+        if not n:
+            self.pagerank = np.empty(0)
+            return self.pagerank
+        out_degree = self.out_degree()
+        dangling = out_degree == 0
+        weights = 1.0 / np.maximum(out_degree, 1)
+        rank = np.full(n, 1.0 / n)
+        if self.pagerank is not None and len(self.pagerank):
+            rank[:len(self.pagerank)] = self.pagerank
+            rank /= rank.sum()
+        for _ in range(max_iter):
+            spread = np.bincount(self.cite_dst, weights=(rank * weights)[self.cite_src], minlength=n)
+            updated = (1 - damping) / n + damping * (spread + rank[dangling].sum() / n)
+            delta = np.abs(updated - rank).sum()
+            rank = updated
+            if delta < tol:
+                break
+        self.pagerank = rank
+        return rank
+
+    def shared_columns(self):
+        """References counted for coupling: those with at most MAX_SHARED_DEGREE archived referrers."""
+        return np.diff(self.referrers[0]) <= MAX_SHARED_DEGREE
+
+    def shared_citers(self):
+        """Citing works counted for co-citation: those citing at most MAX_SHARED_DEGREE archived works."""
+        return self.out_degree() <= MAX_SHARED_DEGREE
+
+    def affected_by(self, rows, previous_columns=None, previous_citers=None):
+        """Works whose similarity lists change when the given works are added.
+
+        Returns (recompute, merge). Lists to recompute in full are those of
+        the new works, the works they cite (new co-citations between them)
+        and the works cited alongside a new work by its citers.
+        previous_columns/previous_citers are the shared masks from before
+        the works were added; references and citers that stopped counting
+        because of the new works change the lists of everything they touch.
+        Works that only share a reference with a new work, or name one in
+        related_works, keep their other pairs unchanged and just gain pairs
+        with the new works (see pairs_with).
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        columns, citers = self.shared_columns(), self.shared_citers()
+        _, citing_new = _gather(*self.cited_by, rows)
+        parts = [
+            rows,
+            _gather(*self.cites, rows[citers[rows]])[1],
+            _gather(*self.cites, citing_new[citers[citing_new]])[1],
+        ]
+        if previous_columns is not None:
+            dropped = np.flatnonzero(previous_columns & ~columns[:len(previous_columns)])
+            parts.append(_gather(*self.referrers, dropped)[1])
+        if previous_citers is not None:
+            dropped = np.flatnonzero(previous_citers & ~citers[:len(previous_citers)])
+            parts.append(_gather(*self.cites, dropped)[1])
+        recompute = np.unique(np.concatenate(parts))
+        merge = np.union1d(_two_hop(self.refs, self.referrers, rows, columns)[1], _gather(*self.related_by, rows)[1])
+        return recompute, np.setdiff1d(merge, recompute, assume_unique=True)
+
+    def similarities(self, rows, k=SIMILAR_PER_WORK):
+        """Top-k similar works of each row by co-citation, coupling and related_works.
+
+        References and citers shared by more than MAX_SHARED_DEGREE works
+        are skipped, as they say little about any pair. Returns arrays
+        (row, other, co_citations, coupling, related, score), each row's
+        entries best first; k=None keeps every pair.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        n = self.size
+
+        def pair_keys(owner, other):
+            source = rows[owner]
+            keep = other != source
+            return source[keep] * n + other[keep]
+
+        co_keys = pair_keys(*_two_hop(self.cited_by, self.cites, rows, self.shared_citers()))
+        cp_keys = pair_keys(*_two_hop(self.refs, self.referrers, rows, self.shared_columns()))
+        rel_keys = pair_keys(*_gather(*self.related, rows))
+        # One sort counts all three kinds of evidence per pair
+        keys, inverse = np.unique(np.concatenate([co_keys, cp_keys, rel_keys]), return_inverse=True)
+        inverse = inverse.ravel()
+        co = np.bincount(inverse[:len(co_keys)], minlength=len(keys))
+        cp = np.bincount(inverse[len(co_keys):len(co_keys) + len(cp_keys)], minlength=len(keys))
+        rel = np.minimum(np.bincount(inverse[len(co_keys) + len(cp_keys):], minlength=len(keys)), 1)
+        return self._scored(keys, co, cp, rel, k)
+
+    def pairs_with(self, rows, added):
+        """Every pair of one of rows with one of the added works, scored.
+
+        Co-citation and coupling are symmetric, so they are read off the
+        added works' own pairs instead of expanding every row again.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        n = self.size
+        source, other, co, cp, _, _ = self.similarities(added, k=None)
+        keep = np.isin(other, rows)
+        keys = other[keep] * n + source[keep]
+        owner, related = _gather(*self.related, rows)
+        named = np.isin(related, added)
+        rel_keys = rows[owner[named]] * n + related[named]
+        rel_keys = rel_keys[rel_keys // n != rel_keys % n]
+        all_keys, inverse = np.unique(np.concatenate([keys, rel_keys]), return_inverse=True)
+        inverse = inverse.ravel()
+        counts = np.zeros((3, len(all_keys)), dtype=np.int64)
+        counts[0, inverse[:len(keys)]] = co[keep]
+        counts[1, inverse[:len(keys)]] = cp[keep]
+        counts[2, inverse[len(keys):]] = 1
+        return self._scored(all_keys, *counts, k=None)
+
+    def _scored(self, keys, co, cp, rel, k):
+        """Score (source * n + other) pair keys, sorted by (source, other), best first per source.
+
+        Co-citation and coupling counts are normalized by Salton's cosine
+        (shared / sqrt(degree_a * degree_b)) so prolific works do not crowd
+        out everything else.
+        """
+        source, other = np.divmod(keys, self.size)
+        in_degree, ref_counts = self.in_degree(), self.reference_counts()
+        score = (
+            co / np.sqrt(np.maximum(in_degree[source] * in_degree[other], 1))
+            + cp / np.sqrt(np.maximum(ref_counts[source] * ref_counts[other], 1))
+            + RELATED_WEIGHT * rel
+        )
+        # A stable sort on source, then descending score, keeps ties in other order
+        order = np.argsort(source * (2 * MAX_SCORE) - score, kind="stable")
+        if k is not None:
+            ranked = source[order]
+            order = order[np.arange(len(order)) - np.searchsorted(ranked, ranked) < k]
+        return source[order], other[order], co[order], cp[order], rel[order], score[order]
+
+
+_graphs = {}
+_graphs_lock = threading.Lock()
+
+
+def _database_key(conn):
+    return conn.execute("PRAGMA database_list").fetchone()[2] or f"memory:{id(conn)}"
+
+
+def _state(conn, key):
+    row = conn.execute("SELECT value FROM graph_state WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else 0
+
+
+def bump_graph_version(conn):
+    """Mark the graph tables for a full rebuild after OpenAlex ids or reference
+    lists of already archived works changed. The caller owns the transaction."""
+    conn.execute(
+        "INSERT INTO graph_state (key, value) VALUES ('version', 1) "
+        "ON CONFLICT (key) DO UPDATE SET value = value + 1"
+    )
+
+
+def graph_is_stale(conn):
+    """True when works were archived, or their ids or references changed, after the last update."""
+    latest = conn.execute("SELECT COALESCE(MAX(work_id), 0) FROM works").fetchone()[0]
+    return latest > _state(conn, "last_work_id") or _state(conn, "version") != _state(conn, "built_version")
+
+
+def update_graph(conn, full=False):
+    """Bring graph_metrics and work_similarity up to date with the works table.
+
+    The in-memory graph of this database is extended with the newly archived
+    works only; PageRank is re-run warm and only ranks that moved are
+    written. Similarity lists are recomputed for the works whose pair
+    counts changed, and lists that merely gain pairs with the new works
+    have those merged in. Scores of untouched pairs keep the degree
+    normalization they were computed with until the next full build
+    (the first call on an archive, after bump_graph_version, or
+    full=True). Returns the number of similarity lists recomputed.
+    """
+    key = _database_key(conn)
+    with _graphs_lock:
+        graph = _graphs.get(key)
+        stored = _state(conn, "last_work_id")
+        # Changed ids or references of existing works invalidate every edge mapping
+        version, built = _state(conn, "version"), _state(conn, "built_version")
+        full = full or version != built
+        if full or graph is None or graph.last_work_id > stored or graph.version != built:
+            graph = _graphs[key] = CitationGraph()
+        if not full and graph.last_work_id < stored:
+            # Catch up with what the tables already cover (new process, or
+            # another process updated them) without rewriting it
+            graph.extend(conn, upto=stored)
+            graph.compute_pagerank()
+        previous = graph.pagerank
+        previous_columns, previous_citers = (
+            (graph.shared_columns(), graph.shared_citers()) if graph.size else (None, None)
+        )
+        added = graph.extend(conn)
+        if not len(added) and not full:
+            return 0
+        full = full or not stored
+        pagerank = graph.compute_pagerank()
+        if full:
+            affected, merged = np.arange(graph.size), np.empty(0, dtype=np.int64)
+        else:
+            affected, merged = graph.affected_by(added, previous_columns, previous_citers)
+
+        in_degree, out_degree = graph.in_degree(), graph.out_degree()
+        if full or previous is None:
+            changed = np.arange(graph.size)
+        else:
+            moved = np.abs(pagerank[:len(previous)] - previous) > PAGERANK_TOLERANCE
+            changed = np.union1d(np.flatnonzero(moved), np.arange(len(previous), graph.size))
+            changed = np.union1d(changed, affected)
+        work_ids = graph.work_ids
+        metrics = list(zip(
+            work_ids[changed].tolist(), pagerank[changed].tolist(),
+            in_degree[changed].tolist(), out_degree[changed].tolist(),
+        ))
+
+        def rows_of(pairs):
+            source, other, co, cp, rel, score = pairs
+            return zip(
+                work_ids[source].tolist(), work_ids[other].tolist(),
+                co.tolist(), cp.tolist(), rel.tolist(), score.tolist(),
+            )
+
+        similarity = []
+        for start in range(0, len(affected), SIMILARITY_BLOCK):
+            similarity.extend(rows_of(graph.similarities(affected[start:start + SIMILARITY_BLOCK])))
+        merged_pairs = graph.pairs_with(merged, added) if len(merged) else None
+        merged_ids = [] if merged_pairs is None else np.unique(work_ids[merged_pairs[0]]).tolist()
+
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if full:
+                conn.execute("DELETE FROM graph_metrics")
+                conn.execute("DELETE FROM work_similarity")
+            else:
+                conn.executemany("DELETE FROM work_similarity WHERE work_id = ?", [(w,) for w in work_ids[affected].tolist()])
+            conn.executemany(
+                "INSERT OR REPLACE INTO graph_metrics (work_id, pagerank, cited_by, cites) VALUES (?, ?, ?, ?)", metrics
+            )
+            conn.executemany(
+                "INSERT INTO work_similarity (work_id, similar_id, co_citations, coupling, related, score) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                similarity,
+            )
+            if merged_ids:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO work_similarity (work_id, similar_id, co_citations, coupling, related, score) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows_of(merged_pairs),
+                )
+                # Keep the best SIMILAR_PER_WORK of each list that gained pairs
+                conn.executemany(
+                    "DELETE FROM work_similarity WHERE work_id = ? AND similar_id NOT IN ("
+                    "SELECT similar_id FROM work_similarity WHERE work_id = ? ORDER BY score DESC, similar_id LIMIT ?)",
+                    [(w, w, SIMILAR_PER_WORK) for w in merged_ids],
+                )
+            conn.executemany(
+                "INSERT OR REPLACE INTO graph_state (key, value) VALUES (?, ?)",
+                [("last_work_id", graph.last_work_id), ("built_version", version)],
+            )
+        graph.version = version
+        return len(affected)
+
+
+_update_thread = None
+_update_lock = threading.Lock()
+
+
+def update_graph_async(path=ARCHIVE_DB_PATH):
+    """Run update_graph on a background thread unless one is already running.
+
+    Returns True when a run was started.
+    """
+    global _update_thread
+    from .storage import connect
+
+    with _update_lock:
+        if _update_thread is not None and _update_thread.is_alive():
+            return False
+
+        def run():
+            conn = connect(path)
+            try:
+                with span("citation_graph"):
+                    update_graph(conn)
+            except Exception as e:
+                print(f'Error updating citation graph:{e}')
+            finally:
+                conn.close()
+
+        _update_thread = threading.Thread(target=run, name="citation-graph", daemon=True)
+        _update_thread.start()
+        return True
+
+
+def most_influential(conn, limit=25):
+    """Archived works ranked by PageRank over in-archive citations."""
+    return pd.read_sql(
+        """
+        SELECT w.work_id AS id, w.title, w.year, w.type, w.citations, g.cited_by AS archive_citations,
+               g.pagerank, w.doi
+        FROM graph_metrics g JOIN works w ON w.work_id = g.work_id
+        ORDER BY g.pagerank DESC
+        LIMIT ?
+        """,
+        conn,
+        params=(limit,),
+    )
+
+
+def related_papers(conn, work_id, limit=10):
+    """Works most similar to one archived work, from the precomputed similarity lists."""
+    return pd.read_sql(
+        """
+        SELECT w.work_id AS id, w.title, w.year, w.citations, s.co_citations, s.coupling,
+               s.related, s.score, w.doi
+        FROM work_similarity s JOIN works w ON w.work_id = s.similar_id
+        WHERE s.work_id = ?
+        ORDER BY s.score DESC, s.similar_id
+        LIMIT ?
+        """,
+        conn,
+        params=(work_id, limit),
+    )
@@ -0,0 +1,260 @@
+# archive_store/refresh.py
+"""Keep archived citation counts current without re-running searches.
+
+    python -m archive_store.refresh --max-requests 40
+
+Each run looks up the works whose last sync is oldest (never-synced first),
+OR-ing up to 50 OpenAlex ids (or DOIs, for works without one) into a single
+filtered request, and writes only the counts that changed, in one
+transaction. Works found by DOI also get their OpenAlex id, which marks the
+citation graph for a rebuild. Every looked-up work gets a new last-synced
+watermark. With an OpenAlex premium key (OPENALEX_API_KEY) the lookups also
+carry a from_updated_date filter, so unchanged works are not even sent
+back. The app starts a run in the background at most once a day
+(refresh_async).
+"""
+import argparse
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from utilities.constants import (
+    ARCHIVE_DB_PATH,
+    ARCHIVE_REFRESH_BATCH_SIZE,
+    ARCHIVE_REFRESH_EVERY,
+    ARCHIVE_REFRESH_MAX_REQUESTS,
+    ARCHIVE_REFRESH_STALE_AFTER,
+    OPENALEX_API_URL,
+    SOURCE_TIMEOUTS,
+)
+from .archive_store import openalex_work_number
+from .graph import bump_graph_version, graph_is_stale, update_graph
+
+REFRESH_SELECT_FIELDS = "id,doi,cited_by_count,updated_date"
+DOI_PREFIX = "https://doi.org/"
+
+
+def _timestamp(moment):
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+# Works that can be looked up and whose last sync is older than the cutoff
+_DUE = """
+FROM works w LEFT JOIN work_sync s ON s.work_id = w.work_id
+WHERE (w.openalex_id IS NOT NULL OR w.doi IS NOT NULL)
+  AND (s.synced_at IS NULL OR s.synced_at < ?)
+"""
+
+
+def _cutoff(stale_after, now):
+    return _timestamp((now or datetime.now(timezone.utc)) - timedelta(seconds=stale_after))
+
+
+def due_works(conn, stale_after=ARCHIVE_REFRESH_STALE_AFTER, limit=None, now=None):
+    """(work_id, openalex_id, doi, citations, synced_at) of works due a refresh, never-synced and oldest first."""
+    return conn.execute(
+        f"SELECT w.work_id, w.openalex_id, w.doi, w.citations, s.synced_at {_DUE} "
+        "ORDER BY s.synced_at IS NOT NULL, s.synced_at, w.work_id LIMIT ?",
+        (_cutoff(stale_after, now), -1 if limit is None else limit),
+    ).fetchall()
+
+
+def count_due(conn, stale_after=ARCHIVE_REFRESH_STALE_AFTER, now=None):
+    return conn.execute(f"SELECT COUNT(*) {_DUE}", (_cutoff(stale_after, now),)).fetchone()[0]
+
+
+def _batches(works, size):
+    """Lookup batches: works with an OpenAlex id by id, the rest by DOI.
+
+    DOIs containing the filter syntax's separators cannot be OR-ed and are
+    left out (they are still marked synced, so they do not stay due forever).
+    """
+    by_id = [w for w in works if w[1] is not None]
+    by_doi = [w for w in works if w[1] is None and not any(c in w[2] for c in ",|")]
+    for start in range(0, len(by_id), size):
+        chunk = by_id[start:start + size]
+        yield chunk, "ids.openalex:" + "|".join(f"W{w[1]}" for w in chunk)
+    for start in range(0, len(by_doi), size):
+        chunk = by_doi[start:start + size]
+        yield chunk, "doi:" + "|".join(w[2][len(DOI_PREFIX):] if w[2].startswith(DOI_PREFIX) else w[2] for w in chunk)
+
+
+def _doi_key(value):
+    value = (value or "").lower()
+    return value[len(DOI_PREFIX):] if value.startswith(DOI_PREFIX) else value
+
+
+def refresh_archive(
+    conn,
+    fetch=None,
+    max_requests=ARCHIVE_REFRESH_MAX_REQUESTS,
+    batch_size=ARCHIVE_REFRESH_BATCH_SIZE,
+    stale_after=ARCHIVE_REFRESH_STALE_AFTER,
+    use_updated_since=None,
+    now=None,
+):
+    """Refresh the citation counts of the works due a sync; returns a run summary.
+
+    fetch(url, params, timeout) defaults to the request governor and must
+    raise on failure: the run then stops, keeping what it already learned,
+    and the failed batch stays due. use_updated_since adds a
+    from_updated_date filter per batch (the oldest watermark in it); by
+    default it is on when an OpenAlex premium key is configured.
+    """
+    if fetch is None or use_updated_since is None:
+        from data_fetcher import get_governor
+
+        governor = get_governor()
+        fetch = fetch or governor.get_json
+        if use_updated_since is None:
+            use_updated_since = bool(governor.openalex_key)
+    now = now or datetime.now(timezone.utc)
+    started = time.perf_counter()
+    limit = None if max_requests is None else max_requests * batch_size
+    works = due_works(conn, stale_after, limit, now)
+
+    requests = identified = 0
+    synced, changed = [], []
+    error = None
+    unsyncable = [w for w in works if w[1] is None and any(c in w[2] for c in ",|")]
+    for chunk, filter_value in _batches(works, batch_size):
+        if max_requests is not None and requests >= max_requests:
+            break
+        since = [w[4] for w in chunk if w[4]]
+        if use_updated_since and len(since) == len(chunk):
+            # Only works updated after the oldest watermark in the batch come back
+            filter_value += f",from_updated_date:{min(since)[:10]}"
+        params = {"filter": filter_value, "select": REFRESH_SELECT_FIELDS, "per-page": batch_size}
+        try:
+            page = fetch(OPENALEX_API_URL, params, SOURCE_TIMEOUTS["openalex"])
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            break
+        requests += 1
+        found_by_id, found_by_doi = {}, {}
+        for result in page.get("results") or []:
+            number = openalex_work_number(result.get("id"))
+            if number is not None:
+                found_by_id[number] = result
+            if result.get("doi"):
+                found_by_doi[_doi_key(result["doi"])] = result
+        for work_id, openalex_id, doi, citations, _ in chunk:
+            result = found_by_id.get(openalex_id) if openalex_id is not None else found_by_doi.get(_doi_key(doi))
+            updated_date = None
+            if result is not None:
+                updated_date = result.get("updated_date")
+                count = result.get("cited_by_count")
+                number = openalex_work_number(result.get("id"))
+                if (count is not None and count != citations) or (openalex_id is None and number is not None):
+                    changed.append((count, number, work_id))
+                    identified += openalex_id is None and number is not None
+            synced.append((work_id, updated_date))
+
+    stamp = _timestamp(now)
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            "UPDATE works SET citations = COALESCE(?, citations), openalex_id = COALESCE(openalex_id, ?) "
+            "WHERE work_id = ?",
+            changed,
+        )
+        if identified:
+            # Newly identified works can now be matched to the references pointing at them
+            bump_graph_version(conn)
+        conn.executemany(
+            "INSERT INTO work_sync (work_id, synced_at, updated_date) VALUES (?, ?, ?) "
+            "ON CONFLICT (work_id) DO UPDATE SET synced_at = excluded.synced_at, "
+            "updated_date = COALESCE(excluded.updated_date, work_sync.updated_date)",
+            [(work_id, stamp, updated_date) for work_id, updated_date in synced]
+            + [(w[0], stamp, None) for w in unsyncable],
+        )
+        conn.execute(
+            "INSERT INTO refresh_runs (started_at, finished_at, requests, checked, updated, error) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (stamp, _timestamp(datetime.now(timezone.utc)), requests, len(synced), len(changed), error),
+        )
+    return {
+        "requests": requests,
+        "checked": len(synced),
+        "updated": len(changed),
+        "due": count_due(conn, stale_after, now),
+        "error": error,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def last_refresh(conn):
+    """Start time of the most recent refresh run, or None."""
+    row = conn.execute("SELECT MAX(started_at) FROM refresh_runs").fetchone()
+    return row[0] if row else None
+
+
+_refresh_thread = None
+_refresh_lock = threading.Lock()
+
+
+def refresh_async(path=ARCHIVE_DB_PATH, every=ARCHIVE_REFRESH_EVERY, **kwargs):
+    """Start a refresh run on a background thread unless one ran within `every` seconds.
+
+    The citation graph is brought up to date afterwards if the run changed
+    it. Returns True when a run was started.
+    """
+    global _refresh_thread
+    from .storage import connect
+
+    with _refresh_lock:
+        if _refresh_thread is not None and _refresh_thread.is_alive():
+            return False
+        conn = connect(path)
+        try:
+            last = last_refresh(conn)
+        finally:
+            conn.close()
+        if last and last >= _timestamp(datetime.now(timezone.utc) - timedelta(seconds=every)):
+            return False
+
+        def run():
+            conn = connect(path)
+            try:
+                refresh_archive(conn, **kwargs)
+                if graph_is_stale(conn):
+                    update_graph(conn)
+            except Exception as e:
+                print(f'Error refreshing archive:{e}')
+            finally:
+                conn.close()
+
+        _refresh_thread = threading.Thread(target=run, name="archive-refresh", daemon=True)
+        _refresh_thread.start()
+        return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh citation counts of archived works from OpenAlex.")
+    parser.add_argument("--db", default=ARCHIVE_DB_PATH)
+    parser.add_argument("--max-requests", type=int, default=ARCHIVE_REFRESH_MAX_REQUESTS,
+                        help="request budget of this run (0 for no limit)")
+    parser.add_argument("--stale-days", type=float, default=ARCHIVE_REFRESH_STALE_AFTER / 86400,
+                        help="refresh works last synced more than this many days ago")
+    parser.add_argument("--all", action="store_true", help="refresh every work regardless of its last sync")
+    args = parser.parse_args(argv)
+
+    from .storage import connect
+
+    conn = connect(args.db)
+    summary = refresh_archive(
+        conn,
+        max_requests=args.max_requests or None,
+        stale_after=0 if args.all else args.stale_days * 86400,
+    )
+    print(
+        f"{summary['checked']} works checked with {summary['requests']} requests, "
+        f"{summary['updated']} updated, {summary['due']} still due ({summary['seconds']}s)"
+    )
+    if summary["error"]:
+        print(f"Stopped early: {summary['error']}")
+    return 1 if summary["error"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
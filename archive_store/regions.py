@@ -0,0 +1,214 @@
+# archive_store/regions.py
+import math
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+from utilities.constants import (
+    ALL_REGIONS,
+    ARCHIVE_DB_PATH,
+    OPENALEX_INSTITUTIONS_URL,
+    OPENALEX_MAX_PER_PAGE,
+    REGION_COUNTRY,
+    REGION_INDEX_MAX_AGE,
+    REGION_INDEX_RETRY_AFTER,
+    REGION_MAX_INSTITUTIONS,
+    REGION_RADIUS_KM,
+    SAUDI_REGIONS,
+    SOURCE_TIMEOUTS,
+)
+
+# Institutions of the country that fall in none of the named regions
+OTHER_REGION = "Other"
+INSTITUTION_SELECT_FIELDS = "id,ror,display_name,geo,works_count"
+_OPENALEX_INSTITUTION_ID = re.compile(r"(?:^|/)I(\d+)$")
+_CITY_REGIONS = {city: region for region, (_, cities) in SAUDI_REGIONS.items() for city in cities}
+
+
+def openalex_institution_number(value):
+    """Integer part of an OpenAlex institution id ('https://openalex.org/I123' -> 123)."""
+    match = _OPENALEX_INSTITUTION_ID.search((value or "").strip())
+    return int(match.group(1)) if match else None
+
+
+def _distance_km(a, b):
+    """Great-circle distance between two (latitude, longitude) points."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 12742 * math.asin(math.sqrt(h))
+
+
+def assign_region(city=None, latitude=None, longitude=None):
+    """Region of an institution: by its city name, else the nearest region centre in range, else Other."""
+    region = _CITY_REGIONS.get((city or "").strip().lower())
+    if region:
+        return region
+    if latitude is None or longitude is None:
+        return OTHER_REGION
+    distance, region = min(
+        (_distance_km((latitude, longitude), centre), name) for name, (centre, _) in SAUDI_REGIONS.items()
+    )
+    return region if distance <= REGION_RADIUS_KM else OTHER_REGION
+
+
+def index_age(conn, country=REGION_COUNTRY):
+    """Seconds since the country's institutions were indexed, or None if they never were."""
+    row = conn.execute("SELECT MIN(fetched_at) FROM region_institutions WHERE country_code = ?", (country,)).fetchone()
+    if not row or not row[0]:
+        return None
+    fetched = datetime.strptime(row[0], "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - fetched).total_seconds()
+
+
+def build_region_index(conn, country=REGION_COUNTRY, fetch=None):
+    """Download every OpenAlex institution of the country and store it with its region.
+
+    Institutions are paged with a cursor at the largest page size; the
+    stored index is replaced in one transaction once all pages arrived.
+    fetch(url, params, timeout) defaults to the request governor and
+    raises on failure, leaving the previous index in place. Returns the
+    number of indexed institutions.
+    """
+    if fetch is None:
+        from data_fetcher import get_governor
+
+        fetch = get_governor().get_json
+    stamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+    params = {
+        "filter": f"country_code:{country}",
+        "select": INSTITUTION_SELECT_FIELDS,
+        "per-page": OPENALEX_MAX_PER_PAGE,
+        "cursor": "*",
+    }
+    rows = []
+    while params["cursor"]:
+        page = fetch(OPENALEX_INSTITUTIONS_URL, params, SOURCE_TIMEOUTS["openalex"])
+        results = page.get("results") or []
+        if not results:
+            break
+        for result in results:
+            number = openalex_institution_number(result.get("id"))
+            if number is None or not result.get("display_name"):
+                continue
+            geo = result.get("geo") or {}
+            rows.append((
+                number, result.get("ror"), result["display_name"], country, geo.get("city"),
+                assign_region(geo.get("city"), geo.get("latitude"), geo.get("longitude")),
+                geo.get("latitude"), geo.get("longitude"), result.get("works_count"), stamp,
+            ))
+        params["cursor"] = (page.get("meta") or {}).get("next_cursor")
+
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM region_institutions WHERE country_code = ?", (country,))
+        conn.executemany(
+            "INSERT OR REPLACE INTO region_institutions (institution_id, ror, name, country_code, city, region, "
+            "latitude, longitude, works_count, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+    return len(rows)
+
+
+def ensure_region_index(conn, country=REGION_COUNTRY, max_age=REGION_INDEX_MAX_AGE, fetch=None):
+    """Build the country's institution index if it is missing or older than max_age.
+
+    Returns False when it is needed but could not be fetched; an old index
+    is still used in that case.
+    """
+    age = index_age(conn, country)
+    if age is not None and age <= max_age:
+        return True
+    try:
+        build_region_index(conn, country, fetch)
+    except Exception as e:
+        print(f'Error building institution index:{e}')
+        return age is not None
+    return True
+
+
+_index_thread = None
+_index_failed_at = None
+_index_lock = threading.Lock()
+
+
+def ensure_region_index_async(path=ARCHIVE_DB_PATH, country=REGION_COUNTRY, max_age=REGION_INDEX_MAX_AGE, fetch=None):
+    """Build the country's institution index on a background thread if it is missing or stale.
+
+    Nothing is started while a build is running, or for
+    REGION_INDEX_RETRY_AFTER seconds after one failed. Returns True when a
+    build was started.
+    """
+    global _index_thread
+    from .storage import connect
+
+    with _index_lock:
+        if region_index_building():
+            return False
+        if _index_failed_at is not None and time.monotonic() - _index_failed_at < REGION_INDEX_RETRY_AFTER:
+            return False
+        conn = connect(path)
+        try:
+            age = index_age(conn, country)
+        finally:
+            conn.close()
+        if age is not None and age <= max_age:
+            return False
+
+        def run():
+            global _index_failed_at
+            conn = connect(path)
+            try:
+                build_region_index(conn, country, fetch)
+                _index_failed_at = None
+            except Exception as e:
+                _index_failed_at = time.monotonic()
+                print(f'Error building institution index:{e}')
+            finally:
+                conn.close()
+
+        _index_thread = threading.Thread(target=run, name="region-index", daemon=True)
+        _index_thread.start()
+        return True
+
+
+def region_index_building():
+    """True while a background institution index build is running."""
+    return _index_thread is not None and _index_thread.is_alive()
+
+
+def region_institution_ids(conn, region, country=REGION_COUNTRY, limit=REGION_MAX_INSTITUTIONS):
+    """OpenAlex ids of a region's institutions, most productive first.
+
+    Returns None for the whole country, which needs no id list. A filter
+    can OR at most `limit` ids; the most productive institutions are kept,
+    which covers nearly all of a region's output.
+    """
+    if not region or region == ALL_REGIONS:
+        return None
+    return [
+        number for (number,) in conn.execute(
+            "SELECT institution_id FROM region_institutions WHERE country_code = ? AND region = ? "
+            "ORDER BY works_count DESC, institution_id LIMIT ?",
+            (country, region, limit),
+        )
+    ]
+
+
+def region_clause(region, country=REGION_COUNTRY):
+    """SQL condition (and params) on works.work_id selecting works affiliated with the region.
+
+    Archived institutions are matched to the index by OpenAlex institution
+    id (display names are not unique); institutions archived without one are
+    not placed in any region until a later ingest identifies them.
+    """
+    sql = (
+        "work_id IN (SELECT wi.work_id FROM region_institutions r "
+        "JOIN institutions i ON i.openalex_id = r.institution_id "
+        "JOIN work_institutions wi ON wi.institution_id = i.institution_id "
+        "WHERE r.country_code = ?{})"
+    )
+    if region == ALL_REGIONS:
+        return sql.format(""), [country]
+    return sql.format(" AND r.region = ?"), [country, region]
+
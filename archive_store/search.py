@@ -0,0 +1,109 @@
+# archive_store/search.py
+import re
+
+import pandas as pd
+
+# Arabic tashkeel (harakat, shadda, sukun, superscript alef) and tatweel
+_ARABIC_MARKS = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")
+_ARABIC_LETTERS = str.maketrans({
+    "\u0622": "\u0627",  # alef with madda -> alef
+    "\u0623": "\u0627",  # alef with hamza above -> alef
+    "\u0625": "\u0627",  # alef with hamza below -> alef
+    "\u0671": "\u0627",  # alef wasla -> alef
+    "\u0649": "\u064a",  # alef maqsura -> ya
+    "\u0629": "\u0647",  # ta marbuta -> ha
+})
+_QUERY_TERM = re.compile(r"\w+", re.UNICODE)
+
+# Column weights for bm25(): title matters most, topics least
+BM25_WEIGHTS = (10.0, 4.0, 2.0, 1.0)
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS works_fts USING fts5(
+    title, authors, institution, topics,
+    tokenize = "unicode61 remove_diacritics 2",
+    prefix = '2 3'
+)
+"""
+
+
+def normalize_search_text(text):
+    """Fold Arabic spelling variants so indexed text and queries agree.
+
+    Latin accents are folded by the unicode61 tokenizer itself.
+    """
+    if not text:
+        return ""
+    return _ARABIC_MARKS.sub("", text).translate(_ARABIC_LETTERS)
+
+
+def _documents(conn, work_ids=None):
+    """(work_id, title, authors, institution, topics) rows from the archive view."""
+    sql = "SELECT id, title, authors, institution, topics FROM research_archive"
+    if work_ids is None:
+        return conn.execute(sql).fetchall()
+    rows = []
+    work_ids = list(work_ids)
+    for start in range(0, len(work_ids), 500):
+        chunk = work_ids[start:start + 500]
+        rows.extend(conn.execute(f"{sql} WHERE id IN ({','.join('?' * len(chunk))})", chunk))
+    return rows
+
+
+def index_works(conn, work_ids):
+    """Add or refresh the search entries of the given works. The caller owns the transaction."""
+    work_ids = list(work_ids)
+    conn.executemany("DELETE FROM works_fts WHERE rowid = ?", [(w,) for w in work_ids])
+    conn.executemany(
+        "INSERT INTO works_fts (rowid, title, authors, institution, topics) VALUES (?, ?, ?, ?, ?)",
+        [(row[0], *map(normalize_search_text, row[1:])) for row in _documents(conn, work_ids)],
+    )
+
+
+def unindex_works(conn, work_ids):
+    conn.executemany("DELETE FROM works_fts WHERE rowid = ?", [(w,) for w in work_ids])
+
+
+def init_search_index(conn):
+    """Create the FTS5 index and fill it if it is out of step with the works table."""
+    conn.execute(FTS_SCHEMA)
+    indexed = conn.execute("SELECT COUNT(*) FROM works_fts").fetchone()[0]
+    total = conn.execute("SELECT COUNT(*) FROM works").fetchone()[0]
+    if indexed != total:
+        rebuild_search_index(conn)
+    conn.commit()
+
+
+def rebuild_search_index(conn):
+    conn.execute("DELETE FROM works_fts")
+    conn.executemany(
+        "INSERT INTO works_fts (rowid, title, authors, institution, topics) VALUES (?, ?, ?, ?, ?)",
+        [(row[0], *map(normalize_search_text, row[1:])) for row in _documents(conn)],
+    )
+    conn.execute("INSERT INTO works_fts (works_fts) VALUES ('optimize')")
+
+
+def build_match_query(text):
+    """Turn free text into an FTS5 query where every term is a quoted prefix."""
+    terms = _QUERY_TERM.findall(normalize_search_text(text))
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search_archive(conn, text, limit=50):
+    """Rank archived works against free text with BM25, best match first."""
+    match = build_match_query(text)
+    if not match:
+        return pd.DataFrame(columns=["id", "title", "authors", "year", "type", "citations", "doi", "score"])
+    weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+    return pd.read_sql(
+        f"""
+        SELECT w.work_id AS id, w.title, f.authors, w.year, w.type, w.citations, w.doi,
+               -bm25(works_fts, {weights}) AS score
+        FROM works_fts f JOIN works w ON w.work_id = f.rowid
+        WHERE works_fts MATCH ?
+        ORDER BY bm25(works_fts, {weights})
+        LIMIT ?
+        """,
+        conn,
+        params=(match, limit),
+    )
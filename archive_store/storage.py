@@ -0,0 +1,238 @@
+# archive_store/storage.py
+import queue
+import sqlite3
+import threading
+
+import pandas as pd
+
+from utilities.constants import ARCHIVE_DB_PATH, ARCHIVE_INGEST_BATCH_SIZE
+from data_processing import normalize_doi
+from .archive_store import fill_institution_ids, fill_missing_edges, init_archive, insert_works, openalex_work_number
+from .graph import bump_graph_version, graph_is_stale, update_graph
+
+# Applied to every archive connection. WAL lets sessions keep reading while
+# the background writer commits.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=67108864",
+)
+
+_local = threading.local()
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+def connect(path=ARCHIVE_DB_PATH):
+    """Open a tuned connection to the archive, creating or migrating its schema once per process."""
+    conn = sqlite3.connect(path, timeout=30)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    if path not in _initialized:
+        with _init_lock:
+            if path not in _initialized:
+                init_archive(conn)
+                _initialized.add(path)
+    return conn
+
+
+def get_connection(path=ARCHIVE_DB_PATH):
+    """Return this thread's archive connection, opening it on first use.
+
+    sqlite3 connections must not be shared between threads, and Streamlit
+    runs each session on its own thread, so connections are per thread.
+    """
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    if path not in connections:
+        connections[path] = connect(path)
+    return connections[path]
+
+
+def canonical_doi(value):
+    """DOI in the archive's stored form (https://doi.org/<lower-case DOI>), or None."""
+    doi = normalize_doi(value)
+    return f"https://doi.org/{doi}" if doi else None
+
+
+def _list_value(value):
+    """A tuple column of a merged frame as a list; legacy comma-joined strings pass through."""
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return "" if value is None or value == "N/A" or (isinstance(value, float) and pd.isna(value)) else value
+
+
+def archive_records(frame):
+    """Turn a merged results frame (see merge_sources) into archive records.
+
+    The frame should be merged from list frames (as_lists=True): names that
+    contain commas, such as Crossref's 'Family, Given' authors, only survive
+    as tuples, and only list frames carry the OpenAlex reference lists. Rows
+    without a DOI or OpenAlex id cannot be upserted safely and are left out.
+    """
+    records = []
+    for row in frame.to_dict("records"):
+        doi = canonical_doi(row.get("DOI"))
+        openalex_id = openalex_work_number(row.get("OpenAlex_ID") if row.get("OpenAlex_ID") != "N/A" else None)
+        if doi is None and openalex_id is None:
+            continue
+        year = row.get("Year")
+        citations = row.get("Overall_Citations", row.get("Citations"))
+        records.append({
+            "title": row.get("Title"),
+            "authors": _list_value(row.get("Authors")),
+            "institution": _list_value(row.get("Institution")),
+            "year": None if pd.isna(year) else int(year),
+            "type": row.get("Type") if row.get("Type") != "N/A" else None,
+            "citations": None if pd.isna(citations) else int(citations),
+            "doi": doi,
+            "openalex_id": openalex_id,
+            "topics": "",
+            "related_works": _list_value(row.get("Related_Works")) or None,
+            "referenced_works": _list_value(row.get("Referenced_Works")) or None,
+            "institution_ids": _list_value(row.get("Institution_IDs")) or None,
+            "institution_rors": _list_value(row.get("Institution_RORs")) or None,
+        })
+    return records
+
+
+def _existing_ids(conn, column, keys):
+    """Map each key to the work ids already stored under it."""
+    found = {}
+    keys = list(keys)
+    for start in range(0, len(keys), 500):
+        chunk = keys[start:start + 500]
+        rows = conn.execute(
+            f"SELECT {column}, work_id FROM works WHERE {column} IN ({','.join('?' * len(chunk))})", chunk
+        )
+        for key, work_id in rows:
+            found.setdefault(key, []).append(work_id)
+    return found
+
+
+def upsert_works(conn, records, batch_size=ARCHIVE_INGEST_BATCH_SIZE):
+    """Insert new works and refresh known ones, one transaction per batch.
+
+    Records match existing works on canonical DOI, then on OpenAlex id. A
+    match refreshes the citation count and fills in missing identifiers (its
+    own and its institutions') and reference lists; when that changes the
+    citation graph's inputs, the graph is marked for a rebuild
+    (bump_graph_version). Returns (inserted, updated) counts.
+    """
+    inserted = updated = 0
+    for start in range(0, len(records), batch_size):
+        # Later records for the same work win within a batch
+        batch = {}
+        for record in records[start:start + batch_size]:
+            batch[record.get("doi") or f"openalex:{record.get('openalex_id')}"] = record
+        batch = list(batch.values())
+
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            by_doi = _existing_ids(conn, "doi", {r["doi"] for r in batch if r.get("doi")})
+            by_openalex = _existing_ids(
+                conn, "openalex_id", {r["openalex_id"] for r in batch if r.get("openalex_id") is not None}
+            )
+            updates, id_fills, matched, new_records = [], [], [], []
+            for record in batch:
+                work_ids = by_doi.get(record.get("doi")) or by_openalex.get(record.get("openalex_id"))
+                if not work_ids:
+                    new_records.append(record)
+                    continue
+                updates.extend(
+                    (record.get("citations"), record.get("doi"), record.get("year"), record.get("type"), work_id)
+                    for work_id in work_ids
+                )
+                if record.get("openalex_id") is not None:
+                    id_fills.extend((record["openalex_id"], work_id) for work_id in work_ids)
+                matched.extend((work_id, record) for work_id in work_ids)
+            conn.executemany(
+                "UPDATE works SET citations = COALESCE(?, citations), doi = COALESCE(doi, ?), "
+                "year = COALESCE(year, ?), type = COALESCE(type, ?) WHERE work_id = ?",
+                updates,
+            )
+            filled_ids = conn.executemany(
+                "UPDATE works SET openalex_id = ? WHERE work_id = ? AND openalex_id IS NULL", id_fills
+            ).rowcount
+            # Both fills must run: a record can bring a new OpenAlex id and a reference list at once
+            filled_edges = fill_missing_edges(conn, matched)
+            if filled_ids > 0 or filled_edges:
+                bump_graph_version(conn)
+            fill_institution_ids(conn, matched)
+            insert_works(conn, new_records)
+        inserted += len(new_records)
+        updated += len(updates)
+    return inserted, updated
+
+
+class ArchiveWriter:
+    """Single background thread that applies queued ingests to the archive.
+
+    Sessions hand results over with submit() and return immediately; one
+    writer means ingests never contend with each other for the write lock.
+    """
+
+    def __init__(self, path=ARCHIVE_DB_PATH):
+        self.path = path
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, records):
+        if not records:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="archive-writer", daemon=True)
+                self._thread.start()
+        self._queue.put(records)
+
+    def flush(self):
+        """Block until everything submitted so far has been written."""
+        self._queue.join()
+
+    def _run(self):
+        conn = connect(self.path)
+        while True:
+            records = self._queue.get()
+            pending = 1
+            # Coalesce whatever else is already queued into the same batches
+            while True:
+                try:
+                    records = records + self._queue.get_nowait()
+                    pending += 1
+                except queue.Empty:
+                    break
+            try:
+                upsert_works(conn, records)
+                # New works, ids or reference lists may add citation edges
+                if graph_is_stale(conn):
+                    update_graph(conn)
+            except Exception as e:
+                print(f'Error writing to archive:{e}')
+            finally:
+                for _ in range(pending):
+                    self._queue.task_done()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer(path=ARCHIVE_DB_PATH):
+    """Return the process-wide ArchiveWriter."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = ArchiveWriter(path)
+    return _writer
+
+
+def ingest_async(frame):
+    """Queue a merged results frame for persistence without blocking the caller."""
+    get_writer().submit(archive_records(frame))
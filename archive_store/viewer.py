@@ -0,0 +1,84 @@
+# archive_store/viewer.py
+import pandas as pd
+
+from .regions import region_clause
+
+# Columns shown by default; the reference lists are only loaded on demand
+LIGHT_COLUMNS = ["id", "title", "authors", "institution", "year", "type", "citations", "doi", "topics"]
+HEAVY_COLUMNS = ["referenced_works", "related_works"]
+ARCHIVE_COLUMNS = LIGHT_COLUMNS + HEAVY_COLUMNS
+
+
+def _filter_sql(year_range=None, types=None, min_citations=None, region=None):
+    """WHERE fragments and params over the works table for the viewer filters.
+
+    A year_range excludes works without a year, so pass it only when the
+    user narrows the range.
+    """
+    clauses, params = [], []
+    if year_range is not None:
+        clauses.append("year BETWEEN ? AND ?")
+        params.extend(year_range)
+    if types:
+        clauses.append(f"type IN ({','.join('?' * len(types))})")
+        params.extend(types)
+    if min_citations:
+        clauses.append("citations >= ?")
+        params.append(min_citations)
+    if region:
+        clause, region_params = region_clause(region)
+        clauses.append(clause)
+        params.extend(region_params)
+    return clauses, params
+
+
+def fetch_page(conn, after_id=0, page_size=50, columns=None, year_range=None, types=None, min_citations=None, region=None):
+    """Return one page of archived works with ids greater than after_id.
+
+    Keyset pagination on the work id keeps every page an index range scan, and
+    only the projected columns are materialized, so cost does not grow with
+    the size of the archive.
+    """
+    columns = [c for c in (columns or LIGHT_COLUMNS) if c in ARCHIVE_COLUMNS]
+    if "id" not in columns:
+        columns = ["id"] + columns
+    clauses, params = _filter_sql(year_range, types, min_citations, region)
+    where = " AND ".join(["work_id > ?"] + clauses)
+    return pd.read_sql(
+        f"""
+        SELECT {', '.join(columns)} FROM research_archive
+        WHERE id IN (SELECT work_id FROM works WHERE {where} ORDER BY work_id LIMIT ?)
+        ORDER BY id
+        """,
+        conn,
+        params=[after_id or 0] + params + [page_size],
+    )
+
+
+def count_works(conn, year_range=None, types=None, min_citations=None, region=None):
+    """Number of archived works matching the viewer filters.
+
+    region is a region name or ALL_REGIONS; it matches works with an
+    author affiliated to one of that region's indexed institutions.
+    """
+    clauses, params = _filter_sql(year_range, types, min_citations, region)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return conn.execute(f"SELECT COUNT(*) FROM works {where}", params).fetchone()[0]
+
+
+def fetch_work_details(conn, work_id):
+    """The heavy reference-list columns of a single work, as a dict."""
+    row = conn.execute(
+        f"SELECT {', '.join(HEAVY_COLUMNS)} FROM research_archive WHERE id = ?", (work_id,)
+    ).fetchone()
+    return dict(zip(HEAVY_COLUMNS, row)) if row else {}
+
+
+def archive_facets(conn):
+    """Work count, year bounds and distinct types, used to build the viewer filters.
+
+    The year bounds are None when no archived work has a year.
+    """
+    works, min_year, max_year = conn.execute("SELECT COUNT(*), MIN(year), MAX(year) FROM works").fetchone()
+    types = [t for (t,) in conn.execute("SELECT DISTINCT type FROM works WHERE type IS NOT NULL ORDER BY type")]
+    return {"works": works, "min_year": min_year, "max_year": max_year, "types": types}
@@ -0,0 +1,96 @@
+# benchmarks/bench_normalizers.py
+"""Rows/sec of the columnar frame builders against the per-record parsers.
+
+The legacy path is process_* -> DataFrame -> pd.to_numeric/astype, i.e. the
+same typed output the columnar builders return directly. Both run on the
+benchmark fixtures (see benchmarks.fixtures).
+
+Run from the repository root:  python -m benchmarks.bench_normalizers
+"""
+import time
+
+import pandas as pd
+
+from benchmarks.fixtures import load_fixture
+from data_processing import (
+    process_open_alexs,
+    process_crossrefs,
+    process_semantic_scholars,
+    openalex_frame,
+    crossref_frame,
+    semantic_scholar_frame,
+)
+
+
+def _typed(df, citation_column, categorical_columns):
+    """Coerce a legacy frame to the typed schema the columnar builders produce."""
+    df[citation_column] = pd.to_numeric(df[citation_column], errors="coerce").fillna(0).astype("int64")
+    df["Year"] = pd.to_numeric(df["Year"], errors="coerce").astype("Int64")
+    for column in categorical_columns:
+        df[column] = df[column].astype("category")
+    return df
+
+
+def _records(process, pages):
+    return [record for page in pages for record in process(page)]
+
+
+def legacy_openalex(pages):
+    return _typed(pd.DataFrame(_records(process_open_alexs, pages)), "Citations_OpenAlex", ["Type"])
+
+
+def legacy_crossref(pages):
+    return _typed(pd.DataFrame(_records(process_crossrefs, pages)), "Citations", ["Type"])
+
+
+def legacy_semantic_scholar(pages):
+    return _typed(pd.DataFrame(_records(process_semantic_scholars, pages)), "Citations", ["Institution"])
+
+
+CASES = [
+    ("openalex", legacy_openalex, openalex_frame),
+    ("crossref", legacy_crossref, crossref_frame),
+    ("semantic_scholar", legacy_semantic_scholar, semantic_scholar_frame),
+]
+LEGACY_FRAMES = {source: legacy for source, legacy, _ in CASES}
+
+
+def check_same_frame(legacy, columnar, pages):
+    """Fail unless both paths build the same typed frame, so their rates are comparable."""
+    pd.testing.assert_frame_equal(legacy(pages), columnar(pages), check_categorical=False)
+
+
+def rows_per_second(fns, pages, rows, repeat=5):
+    """Best rate of each function, timed in interleaved rounds so load spikes hit all of them alike."""
+    best = [float("inf")] * len(fns)
+    for _ in range(repeat):
+        for i, fn in enumerate(fns):
+            start = time.perf_counter()
+            fn(pages)
+            best[i] = min(best[i], time.perf_counter() - start)
+    return [rows / seconds for seconds in best]
+
+
+def run(sizes=(1000, 10000, 50000)):
+    results = []
+    for source, legacy, columnar in CASES:
+        for n in sizes:
+            pages = load_fixture(source, n)
+            check_same_frame(legacy, columnar, pages)
+            legacy_rate, columnar_rate, lists_rate = rows_per_second(
+                [legacy, columnar, lambda p: columnar(p, as_lists=True)], pages, n
+            )
+            results.append({
+                "source": source,
+                "rows": n,
+                "legacy_rows_per_sec": round(legacy_rate),
+                "columnar_rows_per_sec": round(columnar_rate),
+                "columnar_lists_rows_per_sec": round(lists_rate),
+                "speedup": round(columnar_rate / legacy_rate, 2),
+                "lists_speedup": round(lists_rate / legacy_rate, 2),
+            })
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    print(run().to_string(index=False))
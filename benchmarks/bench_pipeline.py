@@ -0,0 +1,491 @@
+# benchmarks/bench_pipeline.py
+"""Replay benchmark of the fetch-to-render pipeline.
+
+Every stage runs on fixture data (see benchmarks.fixtures) with no network
+and no Gemini key:
+
+  parse      the legacy process_* -> typed DataFrame path and the columnar frame builders
+  fetch      harvest through the request governor against the stub server
+  merge      merge_sources plus the consolidated top 10
+  aggregate  the chart aggregation engine, fresh and memoized, frame hashing and the old groupby passes
+  archive    upserts into, page/count/search/region reads from, and a citation refresh of an archive.db-shaped store
+  graph      citation-graph tables: full build, incremental update and the two views
+  stream     the chunk loop that renders a streamed analysis (fake model)
+
+Run from the repository root:
+
+  python -m benchmarks.bench_pipeline                 # compare against baselines.json
+  python -m benchmarks.bench_pipeline --save          # record a new baseline
+  python -m benchmarks.bench_pipeline --full          # also the 100k-work fixtures (minutes)
+  python -m benchmarks.bench_pipeline --sizes 25 1000 --suites parse merge
+
+Exits non-zero when a metric regresses past --tolerance against the baseline
+(NETWORK_TOLERANCE at least for the fetch suite).
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.fixtures import SOURCES, load_fixture
+from benchmarks.stub_server import StubAPIServer
+
+BASELINE_PATH = Path(__file__).parent / "baselines.json"
+DEFAULT_SIZES = (25, 1000, 10000)
+FULL_SIZES = DEFAULT_SIZES + (100000,)
+DEFAULT_TOLERANCE = 0.3
+# Suites that time requests through sockets and server threads; they vary
+# more from run to run, so they take the median of more runs and a wider tolerance
+NETWORK_SUITES = {"fetch"}
+NETWORK_REPEAT = 7
+NETWORK_TOLERANCE = 0.5
+# Timings below this are dominated by noise and never count as regressions
+NOISE_FLOOR_SECONDS = 0.005
+STREAM_RESPONSE_CHARS = 24000
+STREAM_CHUNK_CHARS = 64
+
+
+def _best(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _median(fn, repeat):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2], result
+
+
+def _repeat(works):
+    return 5 if works <= 1000 else 3 if works <= 10000 else 1
+
+
+def _result(suite, case, works, metric, value, unit, better):
+    return {"suite": suite, "case": case, "works": works, "metric": metric,
+            "value": round(value, 6), "unit": unit, "better": better}
+
+
+@lru_cache(maxsize=len(FULL_SIZES))
+def _frames(works):
+    """Parsed frames of one fixture size, shared by the suites that start from them."""
+    from data_processing import SOURCE_FRAMES
+
+    return {source: SOURCE_FRAMES[source](load_fixture(source, works)) for source in SOURCES}
+
+
+def bench_parse(works):
+    from benchmarks.bench_normalizers import LEGACY_FRAMES, check_same_frame
+    from data_processing import SOURCE_FRAMES
+
+    results = []
+    for source in SOURCES:
+        pages = load_fixture(source, works)
+        # Both sides build the same typed frame: process_* -> DataFrame -> typing, or the columnar builder
+        check_same_frame(LEGACY_FRAMES[source], SOURCE_FRAMES[source], pages)
+        cases = {
+            f"legacy_{source}_frame": lambda: LEGACY_FRAMES[source](pages),
+            f"{source}_frame": lambda: SOURCE_FRAMES[source](pages),
+            f"{source}_list_frame": lambda: SOURCE_FRAMES[source](pages, as_lists=True),
+        }
+        for case, build in cases.items():
+            seconds, _ = _best(build, _repeat(works))
+            results.append(_result("parse", case, works, "rows_per_sec", works / seconds, "rows/s", "higher"))
+    return results
+
+
+def bench_fetch(works):
+    from data_fetcher import RequestGovernor, fetch_data, get_session, set_governor, iter_openalex_pages, iter_crossref_pages
+    from data_processing import SOURCE_FRAMES
+
+    fixtures = {source: load_fixture(source, works) for source in ("openalex", "crossref")}
+    results = []
+    with StubAPIServer(fixtures) as stub:
+        host = stub.base_url.split("://", 1)[1]
+        # Unthrottled, so the number reflects the pipeline rather than the rate limits
+        set_governor(RequestGovernor(session=get_session(), limits={"stub": (0, 1)}, hosts={host: "stub"}))
+        try:
+            fetch = stub.redirecting(fetch_data)
+            for source, iter_pages in (("openalex", iter_openalex_pages), ("crossref", iter_crossref_pages)):
+                seconds, frame = _median(lambda: SOURCE_FRAMES[source](iter_pages({}, fetch=fetch)), NETWORK_REPEAT)
+                assert len(frame) == works, (source, len(frame), works)
+                results.append(_result("fetch", f"harvest_{source}", works, "rows_per_sec", works / seconds, "rows/s", "higher"))
+        finally:
+            set_governor(None)
+    return results
+
+
+def bench_merge(works):
+    from data_processing import merge_sources
+
+    frames = _frames(works)
+    seconds, merged = _best(
+        lambda: merge_sources(frames).sort_values("Overall_Citations", ascending=False).head(10), _repeat(works)
+    )
+    return [_result("merge", "merge_top10", works, "seconds", seconds, "s", "lower")]
+
+
+def yearly_aggregates(df, citation_column):
+    """The two groupby passes the per-source chart functions used to make."""
+    yearly_publications = df.groupby("Year").size().reset_index(name="Count")
+    yearly_citations = df.groupby("Year")[citation_column].sum().reset_index()
+    return yearly_publications, yearly_citations
+
+
+@lru_cache(maxsize=len(FULL_SIZES))
+def _merged(works):
+    from data_processing import merge_sources
+
+    return merge_sources(_frames(works))
+
+
+@lru_cache(maxsize=len(FULL_SIZES))
+def _archive_frame(works):
+    """Merged list frames, as the app hands them to the archive."""
+    from data_processing import SOURCE_FRAMES, merge_sources
+
+    return merge_sources({source: SOURCE_FRAMES[source](load_fixture(source, works), as_lists=True) for source in SOURCES})
+
+
+def bench_aggregate(works):
+    from data_processing import aggregate, compute_aggregates, frame_fingerprint
+
+    frames = _frames(works)
+    merged = _merged(works)
+    columns = {"openalex": "Citations_OpenAlex", "crossref": "Citations", "semantic_scholar": "Citations"}
+    shown = (*frames.values(), merged)
+    # The app hashes each frame once per fetch and passes the key on reruns
+    fingerprints = [frame_fingerprint(f) for f in shown]
+    cases = {
+        "yearly_all_sources": lambda: [yearly_aggregates(frames[s], columns[s]) for s in SOURCES],
+        "engine_all_sources": lambda: [compute_aggregates(frames[s]) for s in SOURCES],
+        "engine_merged": lambda: compute_aggregates(merged),
+        "fingerprint": lambda: [frame_fingerprint(f) for f in shown],
+        # What a Streamlit rerun pays: the same frames, already aggregated once
+        "engine_cached": lambda: [aggregate(f, key) for f, key in zip(shown, fingerprints)],
+    }
+    cases["engine_cached"]()
+    results = []
+    for case, fn in cases.items():
+        seconds, _ = _best(fn, _repeat(works))
+        results.append(_result("aggregate", case, works, "seconds", seconds, "s", "lower"))
+    return results
+
+
+def bench_archive(works):
+    from archive_store import (
+        archive_records, build_region_index, connect, count_works, fetch_page, refresh_archive, search_archive, upsert_works,
+    )
+
+    records = archive_records(_archive_frame(works))
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = connect(os.path.join(tmp, "archive.db"))
+        start = time.perf_counter()
+        upsert_works(conn, records)
+        seconds = time.perf_counter() - start
+        results.append(_result("archive", "upsert_new", works, "rows_per_sec", len(records) / seconds, "rows/s", "higher"))
+        start = time.perf_counter()
+        upsert_works(conn, records)
+        seconds = time.perf_counter() - start
+        results.append(_result("archive", "upsert_existing", works, "rows_per_sec", len(records) / seconds, "rows/s", "higher"))
+
+        last_id = conn.execute("SELECT MAX(work_id) FROM works").fetchone()[0] or 0
+        build_region_index(conn, fetch=_institution_lookup(conn))
+        reads = {
+            "first_page": lambda: fetch_page(conn, after_id=0, page_size=50),
+            "deep_page": lambda: fetch_page(conn, after_id=max(0, last_id - 50), page_size=50),
+            "filtered_page": lambda: fetch_page(conn, page_size=50, year_range=(2010, 2020), min_citations=5),
+            "count_filtered": lambda: count_works(conn, year_range=(2010, 2020), min_citations=5),
+            "search": lambda: search_archive(conn, "deep learning"),
+            "region_page": lambda: fetch_page(conn, page_size=50, region="Riyadh"),
+            "count_region": lambda: count_works(conn, region="Eastern Province"),
+        }
+        for case, read in reads.items():
+            seconds, _ = _best(read, 5)
+            results.append(_result("archive", case, works, "seconds", seconds, "s", "lower"))
+
+        start = time.perf_counter()
+        summary = refresh_archive(conn, fetch=_refresh_lookup(records), max_requests=None, use_updated_since=False)
+        seconds = time.perf_counter() - start
+        results.append(_result("archive", "refresh", works, "rows_per_sec", summary["checked"] / seconds, "rows/s", "higher"))
+        results.append(_result("archive", "refresh", works, "requests", summary["requests"], "requests", "lower"))
+        conn.close()
+    return results
+
+
+def _institution_lookup(conn):
+    """In-process stand-in for the OpenAlex institutions listing of a region index:
+    every archived institution with an OpenAlex id, located in the city its
+    fixture name starts with."""
+    institutions = conn.execute(
+        "SELECT openalex_id, name FROM institutions WHERE openalex_id IS NOT NULL ORDER BY institution_id"
+    ).fetchall()
+
+    def lookup(url, params, timeout):
+        start = 0 if params["cursor"] == "*" else int(params["cursor"])
+        page = institutions[start:start + params["per-page"]]
+        return {
+            "meta": {"next_cursor": str(start + len(page)) if page else None},
+            "results": [
+                {"id": f"https://openalex.org/I{number}", "display_name": name,
+                 "geo": {"city": name.split()[0]}, "works_count": 100 - i}
+                for i, (number, name) in enumerate(page)
+            ],
+        }
+
+    return lookup
+
+
+def _refresh_lookup(records):
+    """In-process stand-in for the OpenAlex id/DOI lookups of a citation refresh;
+    every tenth work comes back with one more citation."""
+    by_id = {r["openalex_id"]: r for r in records if r["openalex_id"] is not None}
+    by_doi = {r["doi"][len("https://doi.org/"):]: r for r in records if r["doi"]}
+
+    def lookup(url, params, timeout):
+        kind, values = params["filter"].split(":", 1)
+        found = [by_id.get(int(v[1:])) for v in values.split("|")] if kind == "ids.openalex" else [by_doi.get(v) for v in values.split("|")]
+        return {"results": [
+            {"id": f"https://openalex.org/W{r['openalex_id']}" if r["openalex_id"] else None, "doi": r["doi"],
+             "cited_by_count": (r["citations"] or 0) + (i % 10 == 0), "updated_date": "2026-01-01T00:00:00"}
+            for i, r in enumerate(found) if r is not None
+        ]}
+
+    return lookup
+
+
+GRAPH_INCREMENT = 50
+
+
+def _with_references(records, seed=0):
+    """Give archive records synthetic reference lists: older archived works
+    (skewed toward the earliest, like real citation counts) plus works
+    outside the archive."""
+    import numpy as np
+    from archive_store import openalex_work_url
+
+    rng = np.random.default_rng(seed)
+    known = [r["openalex_id"] for r in records if r["openalex_id"] is not None]
+    outside = 10 ** 9
+    for i, record in enumerate(records):
+        count = int(rng.integers(5, 40))
+        inside = [known[int(j)] for j in (min(i, len(known)) * rng.random(count // 2) ** 2).astype(int)] if i else []
+        external = rng.integers(outside, outside + 5 * len(records), count - count // 2)
+        record["referenced_works"] = [openalex_work_url(int(n)) for n in [*inside, *external]]
+        record["related_works"] = [openalex_work_url(int(n)) for n in rng.choice(known, min(3, len(known)))] if known else []
+    return records
+
+
+def bench_graph(works):
+    from archive_store import archive_records, connect, most_influential, related_papers, update_graph, upsert_works
+
+    records = _with_references(archive_records(_archive_frame(works)))
+    split = max(1, len(records) - GRAPH_INCREMENT)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = connect(os.path.join(tmp, "archive.db"))
+        upsert_works(conn, records[:split])
+        start = time.perf_counter()
+        update_graph(conn, full=True)
+        results.append(_result("graph", "full_build", works, "seconds", time.perf_counter() - start, "s", "lower"))
+        upsert_works(conn, records[split:])
+        start = time.perf_counter()
+        update_graph(conn)
+        results.append(_result("graph", "incremental", works, "seconds", time.perf_counter() - start, "s", "lower"))
+
+        work_id = conn.execute("SELECT work_id FROM graph_metrics ORDER BY pagerank DESC LIMIT 1").fetchone()[0]
+        for case, read in {
+            "most_influential": lambda: most_influential(conn),
+            "related_papers": lambda: related_papers(conn, work_id),
+        }.items():
+            seconds, _ = _best(read, 5)
+            results.append(_result("graph", case, works, "seconds", seconds, "s", "lower"))
+        conn.close()
+    return results
+
+
+class CountingPlaceholder:
+    """Stands in for st.empty(), counting what would be sent to the browser."""
+
+    def __init__(self):
+        self.calls = 0
+        self.bytes = 0
+
+    def markdown(self, text):
+        self.calls += 1
+        self.bytes += len(text)
+
+
+class CountingContainer(CountingPlaceholder):
+    """Stands in for st.container(); its elements add to the same counts."""
+
+    def empty(self):
+        return self
+
+
+def legacy_render_loop(stream, placeholder):
+    """The chunk loop the front end ran before StreamRenderer: re-join and redraw per chunk."""
+    full_response = []
+    for chunk in stream:
+        full_response.append(chunk.text if hasattr(chunk, 'text') else "")
+        placeholder.markdown("".join(full_response))
+    return "".join(full_response)
+
+
+def _analysis_text(chars):
+    """Markdown shaped like a RESEARCH_PAPER analysis: headed sections of paragraphs and bullets."""
+    sections = []
+    i = 0
+    while sum(map(len, sections)) < chars:
+        sections.append(
+            f"## Section {i}\n\n" + "The study reports a measured effect on the outcome. " * 6
+            + "\n\n- finding one\n- finding two\n- finding three\n"
+        )
+        i += 1
+    return "\n".join(sections)[:chars]
+
+
+def bench_stream(works=None):
+    from gemini_interface import FakeStreamingModel
+    from utilities import render_stream
+
+    model = FakeStreamingModel(_analysis_text(STREAM_RESPONSE_CHARS), chunk_size=STREAM_CHUNK_CHARS)
+    loops = {
+        "render_loop": lambda sink: render_stream(model.generate_content([], stream=True), sink),
+        "legacy_render_loop": lambda sink: legacy_render_loop(model.generate_content([], stream=True), sink),
+    }
+    results = []
+    chars = STREAM_RESPONSE_CHARS
+    for case, loop in loops.items():
+        sink = CountingContainer()
+
+        def run():
+            sink.calls = sink.bytes = 0
+            return loop(sink)
+
+        seconds, _ = _best(run, 5)
+        results += [
+            _result("stream", case, chars, "seconds", seconds, "s", "lower"),
+            _result("stream", case, chars, "render_calls", sink.calls, "calls", "lower"),
+            _result("stream", case, chars, "rendered_bytes", sink.bytes, "bytes", "lower"),
+        ]
+    return results
+
+
+SUITES = {
+    "parse": bench_parse,
+    "fetch": bench_fetch,
+    "merge": bench_merge,
+    "aggregate": bench_aggregate,
+    "archive": bench_archive,
+    "graph": bench_graph,
+    "stream": bench_stream,
+}
+# Suites whose cost does not depend on the fixture size run once
+SIZE_INDEPENDENT = {"stream"}
+
+
+def run(sizes=DEFAULT_SIZES, suites=tuple(SUITES)):
+    results = []
+    for suite in suites:
+        if suite in SIZE_INDEPENDENT:
+            results.extend(SUITES[suite]())
+            continue
+        for works in sizes:
+            results.extend(SUITES[suite](works))
+    return results
+
+
+def _key(result):
+    return (result["suite"], result["case"], result["works"], result["metric"])
+
+
+def _noisy(result, base):
+    """Whether both runs took less than NOISE_FLOOR_SECONDS."""
+    if result["unit"] == "s":
+        return max(result["value"], base) < NOISE_FLOOR_SECONDS
+    if result["unit"] == "rows/s":
+        return result["works"] / min(result["value"], base) < NOISE_FLOOR_SECONDS
+    return False
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Attach the baseline value and a regression flag to each result."""
+    previous = {_key(r): r["value"] for r in baseline.get("results", [])}
+    rows = []
+    for result in results:
+        base = previous.get(_key(result))
+        row = dict(result, baseline=base, change=None, regression=False)
+        if base:
+            row["change"] = round(result["value"] / base - 1, 3)
+            limit = max(tolerance, NETWORK_TOLERANCE) if result["suite"] in NETWORK_SUITES else tolerance
+            if result["better"] == "higher":
+                worse = result["value"] < base / (1 + limit)
+            else:
+                worse = result["value"] > base * (1 + limit)
+            row["regression"] = worse and not _noisy(result, base)
+        rows.append(row)
+    return rows
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    """Write results as the baseline, keeping entries of suites/sizes this run skipped."""
+    fresh = {_key(r) for r in results}
+    kept = [r for r in load_baseline(path).get("results", []) if _key(r) not in fresh]
+    results = kept + results
+    payload = {
+        "meta": {"python": platform.python_version(), "machine": platform.machine(), "created": time.strftime("%Y-%m-%d")},
+        "results": results,
+    }
+    Path(path).write_text(json.dumps(payload, indent=1) + "\n")
+
+
+def load_baseline(path=BASELINE_PATH):
+    path = Path(path)
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay benchmark of the fetch-to-render pipeline.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=None)
+    parser.add_argument("--full", action="store_true", help="include the 100k-work fixtures")
+    parser.add_argument("--suites", nargs="+", choices=list(SUITES), default=list(SUITES))
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (FULL_SIZES if args.full else DEFAULT_SIZES)
+    results = run(sizes, args.suites)
+    if args.save:
+        save_baseline(results, args.baseline)
+    rows = compare(results, load_baseline(args.baseline), args.tolerance)
+    if args.json:
+        print(json.dumps(rows, indent=1))
+    else:
+        print(pd.DataFrame(rows).drop(columns=["better"]).to_string(index=False, float_format=lambda v: f"{v:.6g}"))
+    regressions = [r for r in rows if r["regression"]]
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
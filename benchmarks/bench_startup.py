@@ -0,0 +1,65 @@
+# benchmarks/bench_startup.py
+"""Cold import time of each package against its budget.
+
+Every measurement runs in a fresh interpreter, so nothing is already in
+sys.modules. "import" is the bare package import, which should stay cheap
+because submodules load on first use; "first use" also pulls in the
+submodule behind a typical name. The front end row imports
+research_assistant without running it.
+
+Run from the repository root:  python -m benchmarks.bench_startup
+Exits non-zero when a median is over budget.
+"""
+import statistics
+import subprocess
+import sys
+
+import pandas as pd
+
+# (label, statement, budget in milliseconds)
+CASES = [
+    ("utilities", "import utilities", 50),
+    ("data_fetcher", "import data_fetcher", 50),
+    ("data_processing", "import data_processing", 50),
+    ("archive_store", "import archive_store", 50),
+    ("gemini_interface", "import gemini_interface", 50),
+    ("data_fetcher first use", "from data_fetcher import fetch_data", 400),
+    ("data_processing first use", "from data_processing import merge_sources", 1000),
+    ("archive_store first use", "from archive_store import get_connection", 1000),
+    ("gemini_interface first use", "from gemini_interface import analyze_pdf_content", 100),
+    ("front end import", "import research_assistant", 2500),
+]
+
+_TIMER = (
+    "import time; _t = time.perf_counter(); {statement}; "
+    "print((time.perf_counter() - _t) * 1000)"
+)
+
+
+def import_ms(statement):
+    out = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", _TIMER.format(statement=statement)],
+        capture_output=True, text=True, check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def run(repeats=5):
+    results = []
+    for label, statement, budget in CASES:
+        timings = [import_ms(statement) for _ in range(repeats)]
+        median = statistics.median(timings)
+        results.append({
+            "case": label,
+            "median_ms": round(median, 1),
+            "max_ms": round(max(timings), 1),
+            "budget_ms": budget,
+            "within_budget": median <= budget,
+        })
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    results = run()
+    print(results.to_string(index=False))
+    sys.exit(0 if results["within_budget"].all() else 1)
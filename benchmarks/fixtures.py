@@ -0,0 +1,198 @@
+# benchmarks/fixtures.py
+"""Response fixtures for the replay benchmarks.
+
+Each fixture is the list of raw API pages a harvest of that many works would
+return, stored gzipped under benchmarks/fixtures/<source>-<works>.json.gz.
+Recorded fixtures (python -m benchmarks.fixtures record ...) replay real
+responses. When none is recorded for a size, a deterministic synthetic one
+is generated in the same shape, with overlapping DOIs and near-duplicate
+titles across sources so the merge has real work to do.
+
+The 25- and 1000-work fixtures of every source are checked in, so the
+baselines in baselines.json are measured on the same pages everywhere.
+Record over them (and rebaseline) to move the replay set to live data.
+"""
+import argparse
+import gzip
+import json
+import random
+from pathlib import Path
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures"
+SOURCES = ("openalex", "crossref", "semantic_scholar")
+PAGE_SIZES = {"openalex": 200, "crossref": 1000, "semantic_scholar": 100}
+
+_WORDS = (
+    "deep learning neural network graph citation analysis saudi arabia desert solar energy water "
+    "desalination arabic language model health diabetes covid vision transformer retrieval survey "
+    "optimization climate oil gas reservoir seismic genome protein education policy economy"
+).split()
+_CITIES = ("Riyadh", "Jeddah", "Makkah", "Madinah", "Jazan", "Dammam", "Thuwal")
+
+
+def _title(i, rng):
+    # Titles repeat across sources for the same work index, with light noise
+    words = random.Random(i).sample(_WORDS, 6)
+    if rng.random() < 0.1:
+        words[-1] = words[-1].upper()
+    return " ".join(words).capitalize()
+
+
+def _doi(i):
+    return f"10.{1000 + i % 97}/bench.{i}"
+
+
+def _institution(city, number, rng):
+    key = _CITIES.index(city) * 100 + number
+    return {
+        "id": f"https://openalex.org/I{5000 + key}",
+        "ror": f"https://ror.org/0b{key:05d}",
+        "display_name": f"{city} University {number}",
+        "country_code": "SA" if rng.random() < 0.6 else "US",
+    }
+
+
+def _openalex_work(i, rng):
+    return {
+        "id": f"https://openalex.org/W{4000000000 + i}",
+        "doi": f"https://doi.org/{_doi(i)}" if rng.random() > 0.15 else None,
+        "title": _title(i, rng),
+        "publication_year": rng.randint(1990, 2025),
+        "type": rng.choice(["article", "review", "book-chapter", "preprint"]),
+        "cited_by_count": int(rng.paretovariate(1.2)) - 1,
+        "authorships": [
+            {
+                "author": {"display_name": f"Author {rng.randint(0, 20000)}"},
+                "institutions": [_institution(rng.choice(_CITIES), rng.randint(0, 40), rng)],
+            }
+            for _ in range(rng.randint(1, 8))
+        ],
+    }
+
+
+def _crossref_item(i, rng):
+    return {
+        "title": [_title(i, rng)],
+        "DOI": _doi(i),
+        "type": rng.choice(["journal-article", "proceedings-article", "book-chapter"]),
+        "is-referenced-by-count": int(rng.paretovariate(1.2)) - 1,
+        "published-print": {"date-parts": [[rng.randint(1990, 2025), rng.randint(1, 12)]]},
+        "author": [
+            {"family": f"Family{rng.randint(0, 20000)}", "given": f"Given{rng.randint(0, 500)}"}
+            for _ in range(rng.randint(1, 8))
+        ],
+    }
+
+
+def _semantic_scholar_paper(i, rng):
+    return {
+        "title": _title(i, rng),
+        "authors": [{"name": f"Author {rng.randint(0, 20000)}"} for _ in range(rng.randint(1, 8))],
+        "venue": f"Venue {rng.randint(0, 80)}",
+        "year": rng.randint(1990, 2025),
+        "citationCount": int(rng.paretovariate(1.2)) - 1,
+        "url": f"https://www.semanticscholar.org/paper/{i:040x}",
+        "openAccessPdf": {"url": f"https://example.org/{i}.pdf"} if rng.random() < 0.3 else None,
+        "externalIds": {"DOI": _doi(i)} if rng.random() > 0.3 else {},
+    }
+
+
+def synthetic_pages(source, works, seed=0):
+    """Pages shaped like the source's API responses, including paging cursors."""
+    rng = random.Random(f"{source}-{works}-{seed}")
+    # Each source sees a shifted window of the same works, so the sources overlap
+    offset = {"openalex": 0, "crossref": works // 4, "semantic_scholar": works // 2}[source]
+    size = PAGE_SIZES[source]
+    pages = []
+    for start in range(0, works, size):
+        indexes = range(offset + start, offset + min(works, start + size))
+        more = start + size < works
+        if source == "openalex":
+            pages.append({
+                "meta": {"count": works, "next_cursor": f"c{start + size}" if more else None},
+                "results": [_openalex_work(i, rng) for i in indexes],
+            })
+        elif source == "crossref":
+            pages.append({"message": {
+                "total-results": works,
+                "next-cursor": f"c{start + size}" if more else None,
+                "items": [_crossref_item(i, rng) for i in indexes],
+            }})
+        else:
+            page = {"total": works, "offset": start, "data": [_semantic_scholar_paper(i, rng) for i in indexes]}
+            if more:
+                page["next"] = start + size
+            pages.append(page)
+    return pages
+
+
+def fixture_path(source, works):
+    return FIXTURE_DIR / f"{source}-{works}.json.gz"
+
+
+def save_fixture(pages, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(pages, f)
+
+
+def load_fixture(source, works, seed=0):
+    """Recorded pages for (source, works) if present, else synthetic ones (cached to disk)."""
+    path = fixture_path(source, works)
+    if path.exists():
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+    pages = synthetic_pages(source, works, seed)
+    save_fixture(pages, path)
+    return pages
+
+
+def fixture_works(pages):
+    """Number of works in a list of pages of any source."""
+    total = 0
+    for page in pages:
+        entries = page.get("results") or (page.get("message") or {}).get("items") or page.get("data") or []
+        total += len(entries)
+    return total
+
+
+def record(source, query, works):
+    """Record live API pages for a query; needs network access."""
+    from data_fetcher import build_source_requests, fetch_data, iter_crossref_pages, iter_openalex_pages
+
+    url, params = build_source_requests(query, global_view=True)[source]
+    if source == "openalex":
+        pages = list(iter_openalex_pages(params, max_records=works))
+    elif source == "crossref":
+        pages = list(iter_crossref_pages(params, max_records=works))
+    else:
+        pages = [fetch_data(url, dict(params, limit=min(works, PAGE_SIZES[source])))]
+    path = fixture_path(source, works)
+    save_fixture(pages, path)
+    return path, fixture_works(pages)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record or generate replay fixtures.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="record live responses")
+    rec.add_argument("query")
+    rec.add_argument("--sources", nargs="+", default=list(SOURCES), choices=SOURCES)
+    rec.add_argument("--works", type=int, default=1000)
+    gen = sub.add_parser("generate", help="write synthetic fixtures")
+    gen.add_argument("--sizes", nargs="+", type=int, default=[25, 1000, 10000, 100000])
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        for source in args.sources:
+            path, count = record(source, args.query, args.works)
+            print(f"{source}: {count} works -> {path}")
+    else:
+        for source in SOURCES:
+            for works in args.sizes:
+                save_fixture(synthetic_pages(source, works), fixture_path(source, works))
+                print(f"{source}: {works} works -> {fixture_path(source, works)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# benchmarks/stub_server.py
+"""Offline stand-in for the OpenAlex, Crossref and Semantic Scholar APIs.
+
+Serves fixture pages over HTTP with the same cursor/offset paging as the
+real APIs, so the fetch path (governor, harvester, parsers) runs unchanged
+against it:
+
+    with StubAPIServer({"openalex": pages}) as stub:
+        fetch = stub.redirecting(fetch_data)
+        frame = openalex_frame(iter_openalex_pages(params, fetch=fetch))
+
+Error responses can be scripted per source; they are served, in order,
+before the source's pages:
+
+    stub.script("openalex", (429, {"Retry-After": "2"}), 503)
+"""
+import copy
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from utilities.constants import OPENALEX_API_URL, CROSSREF_API_URL, SEMANTIC_SCHOLAR_API_URL
+
+SOURCE_URLS = {
+    "openalex": OPENALEX_API_URL,
+    "crossref": CROSSREF_API_URL,
+    "semantic_scholar": SEMANTIC_SCHOLAR_API_URL,
+}
+
+
+def _page_index(source, query, pages):
+    if source == "semantic_scholar":
+        size = len(pages[0].get("data") or []) or 1
+        return int(query.get("offset", ["0"])[0]) // size
+    cursor = query.get("cursor", ["*"])[0]
+    return 0 if cursor == "*" else int(cursor[1:])
+
+
+def _with_cursor(source, page, index, last):
+    """Copy of a page whose cursor points at the stub's next page."""
+    page = copy.copy(page)
+    next_cursor = None if index >= last else f"p{index + 1}"
+    if source == "openalex":
+        page["meta"] = dict(page.get("meta") or {}, next_cursor=next_cursor)
+    elif source == "crossref":
+        page["message"] = dict(page.get("message") or {}, **{"next-cursor": next_cursor})
+    return page
+
+
+class StubAPIServer:
+    """Threaded local HTTP server replaying fixture pages per source."""
+
+    def __init__(self, fixtures, latency=0.0, host="127.0.0.1", port=0):
+        self.fixtures = fixtures
+        self.latency = latency
+        self.requests = 0
+        self.scripted = {}
+        # Handlers run on one thread per request
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                source = parts.path.strip("/")
+                pages = stub.fixtures.get(source)
+                with stub._lock:
+                    stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                scripted = stub._next_scripted(source)
+                if scripted is not None:
+                    status, headers = scripted
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if not pages:
+                    self.send_error(404)
+                    return
+                index = _page_index(source, parse_qs(parts.query), pages)
+                if index >= len(pages):
+                    body = {"results": [], "meta": {"next_cursor": None}} if source == "openalex" else {}
+                else:
+                    body = _with_cursor(source, pages[index], index, len(pages) - 1)
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.base_url = f"http://{host}:{self.server.server_address[1]}"
+        self._thread = None
+
+    def script(self, source, *responses):
+        """Queue responses (a status, or a (status, headers) pair) to serve before the pages."""
+        with self._lock:
+            self.scripted.setdefault(source, []).extend(
+                (r, {}) if isinstance(r, int) else (r[0], dict(r[1])) for r in responses
+            )
+
+    def _next_scripted(self, source):
+        with self._lock:
+            queue = self.scripted.get(source)
+            return queue.pop(0) if queue else None
+
+    def url_for(self, source):
+        return f"{self.base_url}/{source}"
+
+    def redirecting(self, fetch):
+        """Wrap a fetch(url, params, timeout) so real API URLs go to the stub."""
+        routes = {url: self.url_for(source) for source, url in SOURCE_URLS.items()}
+
+        def stub_fetch(url, params=None, timeout=None):
+            return fetch(routes.get(url, url), params, timeout)
+
+        return stub_fetch
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="stub-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
@@ -0,0 +1,27 @@
+# data_fetcher/__init__.py
+from utilities.lazy import lazy_exports
+
+# Submodules are imported on first use of one of their names
+_EXPORTS = {
+    "get_session": ".data_fetcher",
+    "fetch_data": ".data_fetcher",
+    "fetch_source": ".data_fetcher",
+    "build_source_requests": ".data_fetcher",
+    "fetch_all_sources": ".data_fetcher",
+    "RequestGovernor": ".governor",
+    "CircuitBreaker": ".governor",
+    "FetchError": ".governor",
+    "CircuitOpenError": ".governor",
+    "get_governor": ".governor",
+    "set_governor": ".governor",
+    "ResponseCache": ".cache",
+    "cache_key": ".cache",
+    "cached_fetch": ".cache",
+    "get_cache": ".cache",
+    "iter_openalex_pages": ".harvester",
+    "iter_crossref_pages": ".harvester",
+    "harvest_source": ".harvester",
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
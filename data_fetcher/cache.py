@@ -0,0 +1,187 @@
+# data_fetcher/cache.py
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from utilities.constants import (
+    HTTP_CACHE_PATH,
+    HTTP_CACHE_MAX_BYTES,
+    SOURCE_CACHE_TTLS,
+    DEFAULT_CACHE_TTL,
+    CACHE_STALE_WINDOW,
+)
+
+
+def normalize_request(url, params=None):
+    """Return a canonical URL with lower-cased host and query parameter names, sorted by name.
+
+    Values are kept byte for byte, since whitespace can be significant in a
+    search; repeated parameters keep their order.
+    """
+    parts = urlsplit(url.strip())
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    for key, value in (params or {}).items():
+        if value is not None:
+            query.append((key, str(value)))
+    query = sorted(((k.lower(), v) for k, v in query), key=lambda item: item[0])
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/") or "/", urlencode(query), ""))
+
+
+def cache_key(url, params=None):
+    """Hash of the normalized request, used as the cache primary key."""
+    return hashlib.sha256(normalize_request(url, params).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed JSON response cache with per-source TTL and LRU size cap.
+
+    Entries are shared by every session and survive restarts. Reads past the
+    TTL but inside the stale window are still served while the caller refreshes.
+    """
+
+    def __init__(self, path=HTTP_CACHE_PATH, max_bytes=HTTP_CACHE_MAX_BYTES, ttls=None,
+                 stale_window=CACHE_STALE_WINDOW):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = dict(SOURCE_CACHE_TTLS if ttls is None else ttls)
+        self.stale_window = stale_window
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._init_schema()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS http_cache (
+                key TEXT PRIMARY KEY,
+                source TEXT,
+                url TEXT,
+                body BLOB,
+                size INTEGER,
+                fetched_at REAL,
+                last_access REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_http_cache_last_access ON http_cache(last_access)")
+        conn.commit()
+
+    def ttl_for(self, source):
+        return self.ttls.get(source, DEFAULT_CACHE_TTL)
+
+    def get(self, key):
+        """Return (data, age_seconds) for a cached entry, or None."""
+        conn = self._conn()
+        row = conn.execute("SELECT body, fetched_at FROM http_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        with self._write_lock:
+            conn.execute("UPDATE http_cache SET last_access = ? WHERE key = ?", (now, key))
+            conn.commit()
+        return json.loads(zlib.decompress(row[0])), now - row[1]
+
+    def put(self, key, source, url, data):
+        body = zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+        now = time.time()
+        conn = self._conn()
+        with self._write_lock:
+            conn.execute(
+                "INSERT OR REPLACE INTO http_cache (key, source, url, body, size, fetched_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, source, url, body, len(body), now, now),
+            )
+            conn.commit()
+        self.evict()
+
+    def evict(self):
+        """Drop least-recently-used entries until the cache fits in max_bytes."""
+        conn = self._conn()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        with self._write_lock:
+            excess = total - self.max_bytes
+            freed = 0
+            victims = []
+            for key, size in conn.execute("SELECT key, size FROM http_cache ORDER BY last_access"):
+                victims.append((key,))
+                freed += size
+                if freed >= excess:
+                    break
+            conn.executemany("DELETE FROM http_cache WHERE key = ?", victims)
+            conn.commit()
+
+    def clear(self):
+        conn = self._conn()
+        with self._write_lock:
+            conn.execute("DELETE FROM http_cache")
+            conn.commit()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the process-wide ResponseCache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
+
+
+def _refresh(cache, key, source, url, params, fetch):
+    try:
+        data = fetch()
+        if data:
+            cache.put(key, source, normalize_request(url, params), data)
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(key)
+
+
+def cached_fetch(source, url, params, fetch, cache=None):
+    """Serve a request from the cache, calling fetch() only when needed.
+
+    Fresh hits return immediately. Stale hits inside the stale window are
+    returned too, and a single background refresh is started for the key.
+    Empty responses (failed fetches) are never cached.
+    """
+    cache = cache or get_cache()
+    key = cache_key(url, params)
+    hit = cache.get(key)
+    if hit is not None:
+        data, age = hit
+        ttl = cache.ttl_for(source)
+        if age <= ttl:
+            return data
+        if age <= ttl + cache.stale_window:
+            with _refreshing_lock:
+                start = key not in _refreshing
+                _refreshing.add(key)
+            if start:
+                threading.Thread(
+                    target=_refresh, args=(cache, key, source, url, params, fetch), daemon=True
+                ).start()
+            return data
+    data = fetch()
+    if data:
+        cache.put(key, source, normalize_request(url, params), data)
+    return data
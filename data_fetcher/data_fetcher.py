@@ -0,0 +1,108 @@
+# data_fetcher/data_fetcher.py
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from instrumentation import span
+from utilities.constants import (
+    OPENALEX_API_URL,
+    CROSSREF_API_URL,
+    SEMANTIC_SCHOLAR_API_URL,
+    SOURCE_TIMEOUTS,
+    OPENALEX_SELECT_FIELDS,
+    REGION_COUNTRY,
+)
+from .cache import cached_fetch
+from .governor import FetchError, get_governor
+
+DEFAULT_TIMEOUT = (3.05, 15)
+SEMANTIC_SCHOLAR_FIELDS = "title,authors,year,venue,citationCount,url,openAccessPdf,externalIds"
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Return the process-wide Session that keeps connections alive per host."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def fetch_data(url, params=None, timeout=DEFAULT_TIMEOUT):
+    """GET a JSON document through the request governor.
+
+    Rate limiting, retries and the circuit breaker happen there; {} is
+    returned only once it gives up, and the reason is kept in
+    get_governor().status().
+    """
+    try:
+        return get_governor().get_json(url, params, timeout)
+    except FetchError as e:
+        print(f'Error fetching data from URL:{e}')
+        return {}
+
+
+def fetch_source(source, url, params=None, use_cache=True):
+    """Fetch one source through the on-disk response cache."""
+    timeout = SOURCE_TIMEOUTS.get(source, DEFAULT_TIMEOUT)
+    if not use_cache:
+        return fetch_data(url, params, timeout)
+    return cached_fetch(source, url, params, lambda: fetch_data(url, params, timeout))
+
+
+def build_source_requests(search_query, global_view, institution_ids=None, country=REGION_COUNTRY):
+    """Map each source name to the (url, params) pair used to query it.
+
+    Outside the global view OpenAlex is filtered server-side to works with
+    an author at an institution in the country, and further to the given
+    OpenAlex institution ids (a region) when there are any.
+    """
+    openalex_params = {"search": search_query, "select": OPENALEX_SELECT_FIELDS}
+    if not global_view:
+        filters = [f"institutions.country_code:{country}"]
+        if institution_ids:
+            filters.append("institutions.id:" + "|".join(f"I{number}" for number in institution_ids))
+        openalex_params["filter"] = ",".join(filters)
+    return {
+        "openalex": (OPENALEX_API_URL, openalex_params),
+        "crossref": (CROSSREF_API_URL, {"query": search_query}),
+        "semantic_scholar": (
+            SEMANTIC_SCHOLAR_API_URL,
+            {"query": search_query, "fields": SEMANTIC_SCHOLAR_FIELDS},
+        ),
+    }
+
+
+def fetch_all_sources(source_requests, max_workers=None, use_cache=True, loader=None):
+    """Fetch every source concurrently, yielding (source, data) as each one finishes.
+
+    Wall time is bounded by the slowest source rather than the sum of all of
+    them, and each source is capped by its own timeout from SOURCE_TIMEOUTS.
+    Repeated queries are answered from the response cache. A custom
+    loader(source, url, params) can replace the single-page fetch.
+    """
+    max_workers = max_workers or len(source_requests) or 1
+    if loader is None:
+        loader = lambda source, url, params: fetch_source(source, url, params, use_cache)
+
+    def timed(source, url, params):
+        with span("fetch", source=source):
+            return loader(source, url, params)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch") as pool:
+        futures = {
+            pool.submit(timed, source, url, params): source
+            for source, (url, params) in source_requests.items()
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
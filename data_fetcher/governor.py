@@ -0,0 +1,299 @@
+# data_fetcher/governor.py
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from utilities.constants import (
+    OPENALEX_API_URL,
+    CROSSREF_API_URL,
+    SEMANTIC_SCHOLAR_API_URL,
+    SOURCE_RATE_LIMITS,
+    DEFAULT_RATE_LIMIT,
+    FETCH_MAX_RETRIES,
+    FETCH_BACKOFF_BASE,
+    FETCH_BACKOFF_CAP,
+    FETCH_MAX_RETRY_AFTER,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_SECONDS,
+)
+from instrumentation import increment, span
+from utilities.rate_limit import TokenBucket
+from .cache import normalize_request
+
+SOURCE_HOSTS = {
+    urlsplit(OPENALEX_API_URL).netloc: "openalex",
+    urlsplit(CROSSREF_API_URL).netloc: "crossref",
+    urlsplit(SEMANTIC_SCHOLAR_API_URL).netloc: "semantic_scholar",
+}
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class FetchError(RuntimeError):
+    """A request that failed for good, after any retries."""
+
+
+class CircuitOpenError(FetchError):
+    """The source has failed repeatedly and is not being called for now."""
+
+
+def retry_after_seconds(value, now=None):
+    """Parse a Retry-After header (delta seconds or HTTP date); None if absent or invalid."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when - (now if now is not None else time.time()))
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures and rejects calls until
+    `reset_after` seconds pass; then one trial call decides whether it closes."""
+
+    def __init__(self, threshold=CIRCUIT_FAILURE_THRESHOLD, reset_after=CIRCUIT_RESET_SECONDS, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if self.clock() - self.opened_at >= self.reset_after else "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                self.opened_at = self.clock()
+            self._trial = False
+
+
+class SourceGovernor:
+    """Rate limit, retry policy and circuit breaker of one upstream source."""
+
+    def __init__(self, name, rate, burst, headers=None, params=None, clock=time.monotonic, sleep=time.sleep):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst, clock=clock, sleep=sleep)
+        self.breaker = CircuitBreaker(clock=clock)
+        self.headers = headers or {}
+        self.params = params or {}
+        self.last_error = None
+
+
+class RequestGovernor:
+    """Every outgoing API request goes through here.
+
+    Per source it applies a token bucket (pushed back by Retry-After), retries
+    429/5xx/network errors with capped exponential backoff and full jitter,
+    and trips a circuit breaker on sustained failures. A Retry-After longer
+    than max_retry_after fails the request at once instead of blocking it. Identical requests made
+    while one is already in flight share its result instead of going out again.
+    """
+
+    def __init__(
+        self,
+        session=None,
+        limits=None,
+        max_retries=FETCH_MAX_RETRIES,
+        backoff_base=FETCH_BACKOFF_BASE,
+        backoff_cap=FETCH_BACKOFF_CAP,
+        max_retry_after=FETCH_MAX_RETRY_AFTER,
+        hosts=None,
+        contact_email=None,
+        semantic_scholar_key=None,
+        openalex_key=None,
+        clock=time.monotonic,
+        sleep=time.sleep,
+        rng=random.random,
+    ):
+        self.session = session
+        self.limits = dict(SOURCE_RATE_LIMITS, **(limits or {}))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_retry_after = max_retry_after
+        self.hosts = dict(SOURCE_HOSTS, **(hosts or {}))
+        self.contact_email = contact_email
+        self.semantic_scholar_key = semantic_scholar_key
+        self.openalex_key = openalex_key
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = rng
+        self._sources = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _polite(self, name):
+        """Identification each API asks for to get its better-served pool."""
+        headers, params = {}, {}
+        if self.contact_email and name in ("openalex", "crossref"):
+            params["mailto"] = self.contact_email
+            headers["User-Agent"] = f"research-assistant (mailto:{self.contact_email})"
+        if self.semantic_scholar_key and name == "semantic_scholar":
+            headers["x-api-key"] = self.semantic_scholar_key
+        if self.openalex_key and name == "openalex":
+            params["api_key"] = self.openalex_key
+        return headers, params
+
+    def source(self, name):
+        with self._lock:
+            governor = self._sources.get(name)
+            if governor is None:
+                rate, burst = self.limits.get(name, DEFAULT_RATE_LIMIT)
+                headers, params = self._polite(name)
+                governor = self._sources[name] = SourceGovernor(
+                    name, rate, burst, headers, params, clock=self.clock, sleep=self.sleep
+                )
+            return governor
+
+    def source_for(self, url):
+        netloc = urlsplit(url).netloc
+        return self.source(self.hosts.get(netloc, netloc))
+
+    def backoff(self, attempt):
+        return self.rng() * min(self.backoff_cap, self.backoff_base * 2 ** attempt)
+
+    def get_json(self, url, params=None, timeout=None):
+        """GET url and return its JSON, raising FetchError once retries run out."""
+        key = normalize_request(url, params)
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            increment("http_coalesced")
+            # Shared with the owner and every other waiter: callers must not mutate it
+            return future.result()
+        try:
+            data = self._request(url, params, timeout)
+            future.set_result(data)
+            return data
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _request(self, url, params, timeout):
+        """One logical request: its retries count as a single success or failure for the breaker."""
+        source = self.source_for(url)
+        params = dict(params or {}, **source.params)
+        if not source.breaker.allow():
+            increment("http_rejected", source=source.name)
+            raise CircuitOpenError(f"{source.name} is failing; requests paused (last error: {source.last_error})")
+        attempt = 0
+        while True:
+            source.bucket.acquire()
+            delay = None
+            try:
+                with span("http_request", source=source.name):
+                    response = self.session.get(url, params=params, headers=source.headers or None, timeout=timeout)
+                status = response.status_code
+                if status in RETRYABLE_STATUS:
+                    delay = retry_after_seconds(response.headers.get("Retry-After"))
+                    error = f"HTTP {status}"
+                    if delay is not None and delay > self.max_retry_after:
+                        # Waiting that long would stall every caller of the source
+                        source.bucket.defer(self.max_retry_after)
+                        source.last_error = f"{error}, retry after {delay:.0f}s"
+                        source.breaker.record_failure()
+                        raise FetchError(f"{source.name}: {source.last_error}")
+                    if delay is not None:
+                        source.bucket.defer(delay)
+                elif status >= 400:
+                    # The request itself is wrong; retrying will not help and the source is healthy
+                    source.last_error = f"HTTP {status}"
+                    source.breaker.record_success()
+                    raise FetchError(f"{source.name}: {source.last_error}")
+                else:
+                    data = response.json()
+                    source.breaker.record_success()
+                    source.last_error = None
+                    return data
+            except FetchError:
+                raise
+            except Exception as e:
+                # Connection errors, timeouts and invalid JSON bodies
+                error = f"{type(e).__name__}: {e}"
+            source.last_error = error
+            if attempt >= self.max_retries:
+                source.breaker.record_failure()
+                raise FetchError(f"{source.name}: {error} after {attempt + 1} attempts")
+            increment("http_retries", source=source.name)
+            self.sleep(max(delay or 0.0, self.backoff(attempt)))
+            attempt += 1
+
+    def status(self):
+        """Circuit state and last error of every source seen so far."""
+        with self._lock:
+            sources = list(self._sources.values())
+        return {
+            s.name: {"circuit": s.breaker.state, "failures": s.breaker.failures, "last_error": s.last_error}
+            for s in sources
+        }
+
+
+_governor = None
+_governor_lock = threading.Lock()
+
+
+def get_governor():
+    """Return the process-wide RequestGovernor.
+
+    CONTACT_EMAIL opts OpenAlex and Crossref requests into their polite pools,
+    SEMANTIC_SCHOLAR_API_KEY is sent to Semantic Scholar and OPENALEX_API_KEY
+    (premium) to OpenAlex, all read from the environment or .env.
+    """
+    global _governor
+    if _governor is None:
+        with _governor_lock:
+            if _governor is None:
+                from dotenv import load_dotenv
+                from .data_fetcher import get_session
+
+                load_dotenv()
+                _governor = RequestGovernor(
+                    session=get_session(),
+                    contact_email=os.getenv("CONTACT_EMAIL"),
+                    semantic_scholar_key=os.getenv("SEMANTIC_SCHOLAR_API_KEY"),
+                    openalex_key=os.getenv("OPENALEX_API_KEY"),
+                )
+    return _governor
+
+
+def set_governor(governor):
+    """Replace the process-wide governor (for tests or custom limits)."""
+    global _governor
+    _governor = governor
@@ -0,0 +1,77 @@
+# data_fetcher/harvester.py
+from utilities.constants import (
+    OPENALEX_API_URL,
+    CROSSREF_API_URL,
+    OPENALEX_MAX_PER_PAGE,
+    CROSSREF_MAX_ROWS,
+    OPENALEX_ARCHIVE_SELECT_FIELDS,
+    CROSSREF_SELECT_FIELDS,
+    SOURCE_TIMEOUTS,
+)
+from data_processing import SOURCE_FRAMES
+from .data_fetcher import fetch_data, fetch_source
+
+
+def iter_openalex_pages(params, max_records=None, fetch=fetch_data):
+    """Walk OpenAlex with cursor paging, yielding one raw page at a time.
+
+    Only the fields the parsers and the citation graph need are requested, at
+    the largest page size the API allows. Each page is released before the
+    next one is fetched.
+    """
+    params = dict(params, cursor="*", select=OPENALEX_ARCHIVE_SELECT_FIELDS)
+    params["per-page"] = OPENALEX_MAX_PER_PAGE
+    seen = 0
+    while params["cursor"]:
+        page = fetch(OPENALEX_API_URL, params, SOURCE_TIMEOUTS["openalex"])
+        results = page.get("results") or []
+        if not results:
+            return
+        if max_records is not None and seen + len(results) > max_records:
+            # Trim a copy: the fetched page may be shared with coalesced callers
+            results = results[:max_records - seen]
+            page = dict(page, results=results)
+        seen += len(results)
+        yield page
+        if max_records is not None and seen >= max_records:
+            return
+        params["cursor"] = (page.get("meta") or {}).get("next_cursor")
+
+
+def iter_crossref_pages(params, max_records=None, fetch=fetch_data):
+    """Walk Crossref deep paging (cursor=*), yielding one raw page at a time."""
+    params = dict(params, cursor="*", rows=CROSSREF_MAX_ROWS, select=CROSSREF_SELECT_FIELDS)
+    seen = 0
+    while params["cursor"]:
+        page = fetch(CROSSREF_API_URL, params, SOURCE_TIMEOUTS["crossref"])
+        message = page.get("message") or {}
+        items = message.get("items") or []
+        if not items:
+            return
+        if max_records is not None and seen + len(items) > max_records:
+            items = items[:max_records - seen]
+            page = dict(page, message=dict(message, items=items))
+        seen += len(items)
+        yield page
+        if max_records is not None and seen >= max_records:
+            return
+        params["cursor"] = message.get("next-cursor")
+
+
+_PAGE_ITERATORS = {
+    "openalex": iter_openalex_pages,
+    "crossref": iter_crossref_pages,
+}
+
+
+def harvest_source(source, url, params, max_records=None, as_lists=False):
+    """Loader for fetch_all_sources that harvests every page of a source.
+
+    Harvestable sources are streamed page by page into a typed DataFrame,
+    built in batches so only one batch of raw records is held at a time;
+    other sources fall back to a single cached page fetch. as_lists builds
+    list frames (see openalex_frame).
+    """
+    if source not in _PAGE_ITERATORS:
+        return fetch_source(source, url, params)
+    return SOURCE_FRAMES[source](_PAGE_ITERATORS[source](params, max_records=max_records), as_lists=as_lists)
@@ -0,0 +1,26 @@
+# data_processing/__init__.py
+from utilities.lazy import lazy_exports
+
+# Submodules are imported on first use of one of their names
+_EXPORTS = {
+    "process_open_alexs": ".data_processing",
+    "process_crossrefs": ".data_processing",
+    "process_semantic_scholars": ".data_processing",
+    "openalex_frame": ".columnar",
+    "crossref_frame": ".columnar",
+    "semantic_scholar_frame": ".columnar",
+    "SOURCE_FRAMES": ".columnar",
+    "display_frame": ".columnar",
+    "normalize_doi": ".merge",
+    "normalize_title": ".merge",
+    "merge_sources": ".merge",
+    "cached_merge_sources": ".merge",
+    "top_works": ".merge",
+    "aggregate": ".aggregation",
+    "compute_aggregates": ".aggregation",
+    "frame_fingerprint": ".aggregation",
+    "downsample": ".aggregation",
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -0,0 +1,159 @@
+# data_processing/aggregation.py
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Citation column of each frame shape, in order of preference
+CITATION_COLUMNS = ("Overall_Citations", "Citations_OpenAlex", "Citations")
+TOP_CATEGORIES = 15
+MAX_CHART_POINTS = 400
+MAX_CACHED_AGGREGATES = 32
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def citation_column(df):
+    return next((c for c in CITATION_COLUMNS if c in df.columns), None)
+
+
+def _numeric(series, dtype):
+    """Typed numpy values of a column plus its validity mask; 'N/A' and junk count as missing."""
+    if not pd.api.types.is_numeric_dtype(series):
+        series = pd.to_numeric(series, errors="coerce")
+    valid = series.notna().to_numpy()
+    return series.fillna(0).to_numpy(dtype=dtype), valid
+
+
+def frame_fingerprint(df):
+    """Content hash of the columns the aggregates read; equal data gives equal keys.
+
+    Row hashes (hash_pandas_object) are summed, as no aggregate depends on
+    row order, so a frame edited in place gets a new key.
+    """
+    columns = [c for c in ("Year", citation_column(df), "Type", "Institution", "Sources") if c and c in df.columns]
+    rows = int(pd.util.hash_pandas_object(df[columns], index=False).sum()) if columns else 0
+    return hashlib.blake2b(repr((len(df), columns, rows)).encode(), digest_size=16).hexdigest()
+
+
+def h_index(citations):
+    """Largest h such that h works have at least h citations each."""
+    ranked = np.sort(np.asarray(citations))[::-1]
+    return int(np.count_nonzero(ranked >= np.arange(1, len(ranked) + 1)))
+
+
+def _name_counts(series):
+    """Occurrences of each name in a comma-joined column (authorships, merged sources).
+
+    Categorical columns are split once per distinct value and weighted by
+    its count; other columns are split and counted in Arrow.
+    """
+    weights = None
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        counts = series.value_counts(sort=False)
+        series, weights = counts.index.astype(str), counts.to_numpy()
+    lists = pc.split_pattern(pa.array(series, type=pa.string(), from_pandas=True), ", ")
+    names = pc.list_flatten(lists).dictionary_encode()
+    if weights is not None:
+        weights = np.repeat(weights, pc.list_value_length(lists).fill_null(0).to_numpy())
+    counts = np.bincount(names.indices.to_numpy(), weights=weights, minlength=len(names.dictionary))
+    return pd.Series(counts.astype(np.int64), index=names.dictionary.to_pylist())
+
+
+def _category_counts(series, top=TOP_CATEGORIES, split=False):
+    """Counts of the most common values, the rest folded into 'Other'."""
+    counts = _name_counts(series) if split else series.value_counts()
+    counts = counts.drop(["N/A", "Unknown", ""], errors="ignore")
+    counts = counts[counts > 0].sort_values(ascending=False, kind="stable")
+    if len(counts) > top:
+        counts = pd.concat([counts.iloc[:top], pd.Series({"Other": counts.iloc[top:].sum()})])
+    return counts.rename_axis("Category").reset_index(name="Count")
+
+
+def downsample(x, y, max_points=MAX_CHART_POINTS):
+    """Min/max decimation: at most max_points points that keep every bucket's extremes."""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(x) <= max_points:
+        return x, y
+    buckets = max(1, max_points // 2)
+    starts = np.linspace(0, len(x), buckets + 1, dtype=np.int64)[:-1]
+    lows = np.minimum.reduceat(y, starts)
+    highs = np.maximum.reduceat(y, starts)
+    # Locate the extremes' positions inside each bucket
+    bucket_of = np.repeat(np.arange(buckets), np.diff(np.append(starts, len(x))))
+    low_at = np.flatnonzero(y == lows[bucket_of])
+    high_at = np.flatnonzero(y == highs[bucket_of])
+    keep = np.union1d(
+        low_at[np.unique(bucket_of[low_at], return_index=True)[1]],
+        high_at[np.unique(bucket_of[high_at], return_index=True)[1]],
+    )
+    keep = np.union1d(keep, [0, len(x) - 1])
+    return x[keep], y[keep]
+
+
+def compute_aggregates(df):
+    """All chart data for one results frame, from typed columns and one groupby.
+
+    Works for any source frame and for the merged frame from merge_sources.
+    Returns a dict of small frames: yearly (publications, citations, mean and
+    h-index per publication year), types, institutions, sources (merged data
+    only) and citation_curve (citations by rank, downsampled), plus summary
+    totals.
+    """
+    column = citation_column(df)
+    n = len(df)
+    citations, _ = _numeric(df[column], np.int64) if column else (np.zeros(n, np.int64), None)
+    years, has_year = _numeric(df["Year"], np.int64) if "Year" in df.columns else (np.zeros(n, np.int64), np.zeros(n, bool))
+
+    summary = {
+        "works": n,
+        "citations": int(citations.sum()),
+        "h_index": h_index(citations),
+        "i10_index": int(np.count_nonzero(citations >= 10)),
+        "median_citations": float(np.median(citations)) if n else 0.0,
+    }
+
+    per_year = pd.Series(citations[has_year], index=pd.Index(years[has_year], name="Year"), name="Citations")
+    yearly = per_year.groupby(level="Year", sort=True).agg(
+        Publications="size", Citations="sum", Mean_Citations="mean", H_Index=h_index,
+    ).reset_index()
+
+    ranked = np.sort(citations)[::-1]
+    rank_x, rank_y = downsample(np.arange(1, n + 1), ranked)
+
+    return {
+        "summary": summary,
+        "yearly": yearly,
+        "types": _category_counts(df["Type"]) if "Type" in df.columns else None,
+        "institutions": _category_counts(df["Institution"], split=True) if "Institution" in df.columns else None,
+        "sources": _category_counts(df["Sources"], split=True) if "Sources" in df.columns else None,
+        "citation_curve": pd.DataFrame({"Rank": rank_x, "Citations": rank_y}),
+    }
+
+
+def aggregate(df, fingerprint=None):
+    """compute_aggregates memoized by frame_fingerprint; returns (fingerprint, aggregates).
+
+    Reruns over the same data (every Streamlit interaction) are answered from
+    memory. Hashing a large frame costs about as much as aggregating it, so a
+    caller that keeps a frame unchanged passes the fingerprint it got the first
+    time and skips the rows entirely.
+    """
+    key = fingerprint or frame_fingerprint(df)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return key, cached
+    aggregates = compute_aggregates(df)
+    with _cache_lock:
+        _cache[key] = aggregates
+        while len(_cache) > MAX_CACHED_AGGREGATES:
+            _cache.popitem(last=False)
+    return key, aggregates
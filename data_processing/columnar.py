@@ -0,0 +1,244 @@
+# data_processing/columnar.py
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# OpenAlex reference lists, carried only by list frames (as_lists=True) for the archive
+REFERENCE_COLUMNS = ["Referenced_Works", "Related_Works"]
+# OpenAlex ids and ROR ids of the Institution names, position by position; list frames only
+INSTITUTION_ID_COLUMNS = ["Institution_IDs", "Institution_RORs"]
+# Columns that hold tuples of names in list frames
+LIST_COLUMNS = ["Authors", "Institution"]
+# Raw records held at once before they are converted to Arrow
+FRAME_BATCH_SIZE = 5000
+
+# Arrow types of the response fields each builder reads; other keys are skipped on conversion
+_NAMED = pa.struct([("display_name", pa.string())])
+OPENALEX_SCHEMA = pa.struct([
+    ("title", pa.string()),
+    ("publication_year", pa.int64()),
+    ("type", pa.string()),
+    ("cited_by_count", pa.int64()),
+    ("doi", pa.string()),
+    ("id", pa.string()),
+    ("authorships", pa.list_(pa.struct([("author", _NAMED), ("institutions", pa.list_(_NAMED))]))),
+])
+_INSTITUTION = pa.struct([("display_name", pa.string()), ("id", pa.string()), ("ror", pa.string())])
+OPENALEX_LIST_SCHEMA = pa.struct(
+    [field for field in OPENALEX_SCHEMA if field.name != "authorships"] + [
+        ("authorships", pa.list_(pa.struct([("author", _NAMED), ("institutions", pa.list_(_INSTITUTION))]))),
+        ("referenced_works", pa.list_(pa.string())),
+        ("related_works", pa.list_(pa.string())),
+    ]
+)
+CROSSREF_SCHEMA = pa.struct([
+    ("title", pa.list_(pa.string())),
+    ("author", pa.list_(pa.struct([("family", pa.string()), ("given", pa.string())]))),
+    ("published-print", pa.struct([("date-parts", pa.list_(pa.list_(pa.int64())))])),
+    ("type", pa.string()),
+    ("is-referenced-by-count", pa.int64()),
+    ("DOI", pa.string()),
+])
+SEMANTIC_SCHOLAR_SCHEMA = pa.struct([
+    ("title", pa.string()),
+    ("authors", pa.list_(pa.struct([("name", pa.string())]))),
+    ("venue", pa.string()),
+    ("year", pa.int64()),
+    ("citationCount", pa.int64()),
+    ("externalIds", pa.struct([("DOI", pa.string())])),
+    ("url", pa.string()),
+    ("openAccessPdf", pa.struct([("url", pa.string())])),
+])
+# Stand-in for an authorship without an 'institutions' key
+_UNKNOWN_INSTITUTIONS = {
+    schema: pa.scalar([{"display_name": "Unknown"}], type=pa.list_(named))
+    for schema, named in ((OPENALEX_SCHEMA, _NAMED), (OPENALEX_LIST_SCHEMA, _INSTITUTION))
+}
+
+
+def _pages(data):
+    """Accept one response page or any iterable of pages."""
+    return [data] if isinstance(data, dict) else data
+
+
+def _arrow_records(schema, entries_of, data):
+    """Convert the entries of one or more pages to a single Arrow struct array.
+
+    Entries are converted FRAME_BATCH_SIZE at a time, so only one batch of
+    raw records is alive at once and a harvest of any size streamed in as an
+    iterator of pages is held in compact Arrow buffers rather than dicts.
+    """
+    chunks, batch = [], []
+    for page in _pages(data):
+        batch.extend(entries_of(page))
+        if len(batch) >= FRAME_BATCH_SIZE:
+            chunks.append(pa.array(batch, type=schema))
+            batch = []
+    if batch or not chunks:
+        chunks.append(pa.array(batch, type=schema))
+    return chunks[0] if len(chunks) == 1 else pa.concat_arrays(chunks)
+
+
+def _field(array, *names):
+    """Nested struct field; null wherever the struct or any parent is null."""
+    for name in names:
+        array = pc.struct_field(array, name)
+    return array
+
+
+def _offsets(lists):
+    """Row offsets into list_flatten(lists); null lists count as empty."""
+    lengths = pc.fill_null(pc.list_value_length(lists), 0).to_numpy()
+    return np.concatenate([[0], np.cumsum(lengths)]).astype("int32")
+
+
+def _first(lists):
+    """First element of each list, null where the list is null or empty."""
+    has = pc.fill_null(pc.greater(pc.list_value_length(lists), 0), False).to_numpy(zero_copy_only=False)
+    firsts = pc.list_flatten(pc.list_slice(lists, 0, 1))
+    return firsts.take(pa.array(np.cumsum(has) - 1, mask=~has))
+
+
+def _filled(array, default):
+    """Object column of a string array with nulls replaced by default."""
+    return pc.fill_null(array, default).to_numpy(zero_copy_only=False)
+
+
+def _nonempty(array, default):
+    """String array with nulls and empty strings replaced by default."""
+    return pc.if_else(pc.fill_null(pc.not_equal(array, ""), False), array, default)
+
+
+def _text(array, default):
+    """Object column of a string array with nulls and empty strings replaced by default."""
+    return _nonempty(array, default).to_numpy(zero_copy_only=False)
+
+
+def _categorical(array, default):
+    encoded = pc.dictionary_encode(pc.fill_null(array, default))
+    return pd.Categorical.from_codes(encoded.indices.to_numpy(), encoded.dictionary.to_numpy(zero_copy_only=False))
+
+
+def _int_column(array, default=0):
+    """int64 column with missing values replaced by default."""
+    return pc.fill_null(array, default).to_numpy().astype("int64", copy=False)
+
+
+def _year_column(array):
+    """Nullable Int64 year column; missing years are <NA> rather than 'N/A'."""
+    missing = pc.is_null(array).to_numpy(zero_copy_only=False)
+    return pd.arrays.IntegerArray(pc.fill_null(array, 0).to_numpy().astype("int64", copy=False), missing)
+
+
+def _grouped_names(offsets, names, as_lists):
+    """Per-row names from a flat string array: ', '-joined strings, or tuples when as_lists.
+
+    Tuples rather than lists: each is a slice of one flat tuple, all-string
+    tuples drop out of garbage-collector tracking, and empty rows share ().
+    """
+    if as_lists:
+        # Names repeat across rows: convert each distinct one to a Python string once
+        encoded = pc.dictionary_encode(names)
+        flat = tuple(encoded.dictionary.to_numpy(zero_copy_only=False)[encoded.indices.to_numpy()].tolist())
+        rows = map(flat.__getitem__, map(slice, offsets[:-1].tolist(), offsets[1:].tolist()))
+        return np.fromiter(rows, dtype="object", count=len(offsets) - 1)
+    return pc.binary_join(pa.ListArray.from_arrays(pa.array(offsets), names), ", ").to_numpy(zero_copy_only=False)
+
+
+def _list_column(lists):
+    """Object column of tuples, () where the entry had none."""
+    return _grouped_names(_offsets(lists), pc.list_flatten(lists), as_lists=True)
+
+
+def openalex_frame(data, as_lists=False):
+    """Build the OpenAlex results frame from one or more pages with Arrow compute kernels.
+
+    The entries are converted to an Arrow struct array of just the fields
+    read; authorships and their institutions are flattened into name arrays
+    and regrouped per row by offsets. Authors and Institution are comma-joined
+    strings, or tuples of names when as_lists is True, in which case the
+    referenced and related work ids are added as list columns too, and the
+    institutions' OpenAlex and ROR ids ('' where unknown) alongside their names.
+    """
+    schema = OPENALEX_LIST_SCHEMA if as_lists else OPENALEX_SCHEMA
+    records = _arrow_records(schema, lambda page: page.get("results") or [], data)
+    authorships = _field(records, "authorships")
+    ships = pc.list_flatten(authorships)
+    institutions = pc.fill_null(_field(ships, "institutions"), _UNKNOWN_INSTITUTIONS[schema])
+    ship_offsets = _offsets(authorships)
+    # Each row's institutions run from its first authorship's to its last's
+    institution_offsets = _offsets(institutions)[ship_offsets]
+    frame = pd.DataFrame({
+        "Title": _filled(_field(records, "title"), "N/A"),
+        "Authors": _grouped_names(ship_offsets, _nonempty(_field(ships, "author", "display_name"), "Unknown"), as_lists),
+        "Institution": _grouped_names(
+            institution_offsets, _nonempty(_field(pc.list_flatten(institutions), "display_name"), "Unknown"), as_lists
+        ),
+        "Year": _year_column(_field(records, "publication_year")),
+        "Type": _categorical(_field(records, "type"), "journal-article"),
+        "Citations_OpenAlex": _int_column(_field(records, "cited_by_count")),
+        "DOI": _text(_field(records, "doi"), "N/A"),
+        "OpenAlex_ID": _text(_field(records, "id"), "N/A"),
+    })
+    if as_lists:
+        frame["Referenced_Works"] = _list_column(_field(records, "referenced_works"))
+        frame["Related_Works"] = _list_column(_field(records, "related_works"))
+        for column, field in zip(INSTITUTION_ID_COLUMNS, ("id", "ror")):
+            ids = pc.fill_null(_field(pc.list_flatten(institutions), field), "")
+            frame[column] = _grouped_names(institution_offsets, ids, as_lists=True)
+    return frame
+
+
+def crossref_frame(data, as_lists=False):
+    """Build the Crossref results frame from one or more pages with Arrow compute kernels."""
+    records = _arrow_records(CROSSREF_SCHEMA, lambda page: (page.get("message") or {}).get("items") or [], data)
+    authors = pc.list_flatten(_field(records, "author"))
+    names = pc.binary_join_element_wise(
+        pc.fill_null(_field(authors, "family"), ""), pc.fill_null(_field(authors, "given"), ""), ", "
+    )
+    return pd.DataFrame({
+        "Title": _filled(_first(_field(records, "title")), "N/A"),
+        "Authors": _grouped_names(_offsets(_field(records, "author")), names, as_lists),
+        "Institution": np.full(len(records), "N/A", dtype="object"),
+        "Year": _year_column(_first(_first(_field(records, "published-print", "date-parts")))),
+        "Type": _categorical(_field(records, "type"), "N/A"),
+        "Citations": _int_column(_field(records, "is-referenced-by-count")),
+        "DOI": _filled(_field(records, "DOI"), "N/A"),
+    })
+
+
+def semantic_scholar_frame(data, as_lists=False):
+    """Build the Semantic Scholar results frame from one or more pages with Arrow compute kernels."""
+    records = _arrow_records(
+        SEMANTIC_SCHOLAR_SCHEMA, lambda page: [result for result in page.get("data") or [] if result], data
+    )
+    authors = _field(records, "authors")
+    return pd.DataFrame({
+        "Title": _filled(_field(records, "title"), "N/A"),
+        "Authors": _grouped_names(
+            _offsets(authors), _nonempty(_field(pc.list_flatten(authors), "name"), "Unknown"), as_lists
+        ),
+        "Institution": _categorical(_field(records, "venue"), "N/A"),
+        "Year": _year_column(_field(records, "year")),
+        "Citations": _int_column(_field(records, "citationCount")),
+        "DOI": _filled(_field(records, "externalIds", "DOI"), "N/A"),
+        "url": _filled(_field(records, "url"), "N/A"),
+        "download_pdf": _filled(_field(records, "openAccessPdf", "url"), "N/A"),
+    })
+
+
+def display_frame(frame):
+    """Shown/charted form of a list frame: names comma-joined, reference lists and institution ids dropped."""
+    frame = frame.drop(columns=[c for c in REFERENCE_COLUMNS + INSTITUTION_ID_COLUMNS if c in frame.columns])
+    for column in LIST_COLUMNS:
+        if column in frame.columns and frame[column].map(lambda v: isinstance(v, tuple)).any():
+            frame[column] = [", ".join(v) if isinstance(v, tuple) else v for v in frame[column]]
+    return frame
+
+
+SOURCE_FRAMES = {
+    "openalex": openalex_frame,
+    "crossref": crossref_frame,
+    "semantic_scholar": semantic_scholar_frame,
+}
@@ -0,0 +1,69 @@
+# data_processing/data_processing.py
+
+
+def process_open_alexs(data):
+    research_papers = []
+    for entry in data.get('results', []):
+        paper_doi_link = entry.get("doi", 'N/A') if entry.get("doi") else 'N/A'
+        authors_list = []
+        for authorships_entry in (entry.get("authorships") or []):
+            if "author" in authorships_entry and "display_name" in authorships_entry["author"]:
+                authors_list.append(authorships_entry["author"]["display_name"])
+            else:
+                authors_list.append("Unknown")
+        authors = ', '.join(authors_list)
+        institutions_list = []
+        for authorships_entry in (entry.get("authorships") or []):
+            if "institutions" in authorships_entry:
+                for inst in authorships_entry["institutions"]:
+                    institutions_list.append(inst.get("display_name", "Unknown"))
+            else:
+                institutions_list.append("Unknown")
+        institution = ', '.join(institutions_list)
+        paper = {
+            'Title': entry.get('title', 'N/A'),
+            'Authors': authors,
+            'Institution': institution,
+            'Year': entry.get('publication_year', "N/A"),
+            'Type': entry.get("type", "journal-article"),
+            'Citations_OpenAlex': entry.get("cited_by_count", None),
+            'DOI': paper_doi_link,
+            'OpenAlex_ID': entry.get('id') or 'N/A'
+        }
+        research_papers.append(paper)
+    return research_papers
+
+def process_crossrefs(data):
+    research_papers = []
+    if 'message' in data and 'items' in data['message']:
+        for entry in data['message']['items']:
+            authors = ', '.join(f"{author.get('family', '')}, {author.get('given', '')}" for author in entry.get('author', []))
+            paper = {
+                'Title': entry.get('title', ['N/A'])[0],
+                'Authors': authors,
+                'Institution': 'N/A',
+                'Year': entry.get('published-print', {}).get('date-parts', [['N/A']])[0][0] if entry.get('published-print') else 'N/A',
+                'Type': entry.get('type', 'N/A'),
+                'Citations': entry.get('is-referenced-by-count', 0),
+                'DOI': entry.get('DOI', 'N/A')
+            }
+            research_papers.append(paper)
+    return research_papers
+
+def process_semantic_scholars(data):
+    papers = []
+    for result in data.get('data', []):
+        if result:
+            authors = ', '.join([author['name'] for author in result.get('authors', [])])
+            paper = {
+                'Title': result.get('title', 'N/A'),
+                'Authors': authors,
+                'Institution': result.get('venue', 'N/A'),
+                'Year': result.get('year', 'N/A'),
+                'Citations': result.get('citationCount', 0),
+                'DOI': (result.get('externalIds') or {}).get('DOI', 'N/A'),
+                'url': result.get('url', 'N/A'),
+                'download_pdf': result.get('openAccessPdf', {}).get('url', 'N/A') if result.get('openAccessPdf') else 'N/A'
+            }
+            papers.append(paper)
+    return papers
@@ -0,0 +1,378 @@
+# data_processing/merge.py
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Source name -> (citation column in its parsed frame, merged citation column)
+SOURCE_CITATION_COLUMNS = {
+    "openalex": ("Citations_OpenAlex", "Citations_OpenAlex"),
+    "crossref": ("Citations", "Citations_CrossRef"),
+    "semantic_scholar": ("Citations", "Citations_SemanticScholar"),
+}
+# Metadata is taken from the first source in this order that has it
+SOURCE_PRIORITY = ["openalex", "crossref", "semantic_scholar"]
+METADATA_COLUMNS = ["Title", "Authors", "Institution", "Year", "Type", "DOI", "OpenAlex_ID", "url", "download_pdf"]
+# Merged too when a source frame has them (list frames, see columnar.REFERENCE_COLUMNS
+# and columnar.INSTITUTION_ID_COLUMNS)
+OPTIONAL_METADATA_COLUMNS = ["Referenced_Works", "Related_Works", "Institution_IDs", "Institution_RORs"]
+# Columns a source fills with something else: Semantic Scholar's Institution is the venue
+SOURCE_EXCLUDED_COLUMNS = {"semantic_scholar": ["Institution"]}
+# Minimum Dice similarity of title character trigrams for a fuzzy match
+TITLE_MATCH_THRESHOLD = 0.85
+# Blocks larger than this are only matched exactly, never fuzzily
+MAX_BLOCK_SIZE = 256
+# Width of the trigram bit signature that screens fuzzy-match candidates
+TRIGRAM_SIGNATURE_BITS = 256
+MAX_CACHED_MERGES = 8
+_STOPWORDS = frozenset("a an and as at by for from in into of on or the to with".split())
+
+_DOI_PREFIX = re.compile(r"^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)", re.IGNORECASE)
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_merged = OrderedDict()
+_merged_lock = threading.Lock()
+_POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype="uint8")
+
+
+def normalize_doi(value):
+    """Return a bare lower-case DOI ('10.x/y'), or None when there is none."""
+    if not isinstance(value, str):
+        return None
+    doi = _DOI_PREFIX.sub("", value.strip()).lower()
+    return doi if doi.startswith("10.") else None
+
+
+def normalize_title(value):
+    """Case-folded, accent-stripped title reduced to single-spaced alphanumerics."""
+    if not isinstance(value, str) or value == "N/A":
+        return ""
+    text = unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode("ascii")
+    return _NON_ALNUM.sub(" ", text.casefold()).strip()
+
+
+def _block_prefixes(title_key):
+    """First and last two significant words, used as fuzzy-match block keys."""
+    words = [w for w in title_key.split() if w not in _STOPWORDS]
+    if not words:
+        return ()
+    return "^" + " ".join(words[:2]), "$" + " ".join(words[-2:])
+
+
+def _trigrams(title_key):
+    padded = f"  {title_key} "
+    return frozenset(map("".join, zip(padded, padded[1:], padded[2:])))
+
+
+def _metadata_columns(frames):
+    present = {c for df in frames.values() if df is not None for c in df.columns}
+    return METADATA_COLUMNS + [c for c in OPTIONAL_METADATA_COLUMNS if c in present]
+
+
+def _stack_sources(frames, metadata_columns=METADATA_COLUMNS):
+    parts = []
+    for source, df in frames.items():
+        if df is None or df.empty:
+            continue
+        citation_column, merged_column = SOURCE_CITATION_COLUMNS[source]
+        # Columns a source lacks or excludes are left for concat to fill; as
+        # all-null object columns, concat would test every value for null
+        excluded = SOURCE_EXCLUDED_COLUMNS.get(source, [])
+        part = df[[c for c in metadata_columns if c in df.columns and c not in excluded]].astype("object")
+        if "Year" in df:
+            part["Year"] = pd.to_numeric(df["Year"], errors="coerce").astype("Int64")
+        part["source"] = source
+        part["merged_citation_column"] = merged_column
+        part["citations"] = pd.to_numeric(df[citation_column], errors="coerce") if citation_column in df else float("nan")
+        parts.append(part)
+    columns = metadata_columns + ["source", "merged_citation_column", "citations"]
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(parts, ignore_index=True).reindex(columns=columns)
+
+
+def _per_distinct(series, normalize):
+    """Apply normalize once per distinct value of series; returns an object ndarray aligned to it."""
+    codes, uniques = pd.factorize(series)
+    # Code -1 (missing) picks the trailing normalize(None)
+    keys = np.array([normalize(value) for value in uniques] + [normalize(None)], dtype="object")
+    return keys[codes]
+
+
+def _exact_matches(title_keys, years, rows, known):
+    """Work id of the known entry with each row's title at year, year - 1 or year + 1 (the first found).
+
+    Returns the ids and the step (0, 1 or 2) of the year that matched; both
+    are -1 where no year did.
+    """
+    found = np.full(len(rows), -1, dtype="int64")
+    steps = np.full(len(rows), -1, dtype="int64")
+    for step, delta in enumerate((0, -1, 1)):
+        pending = np.flatnonzero(found < 0)
+        if not len(pending):
+            break
+        probe = pd.DataFrame({"title": title_keys[rows[pending]], "year": years[rows[pending]] + delta})
+        ids = probe.merge(known, on=["title", "year"], how="left")["work_id"].to_numpy()
+        hit = ~np.isnan(ids)
+        found[pending[hit]] = ids[hit]
+        steps[pending[hit]] = step
+    return found, steps
+
+
+def assign_work_ids(stacked):
+    """Label each row with the id of the canonical work it belongs to.
+
+    Rows sharing a normalized DOI are one work. Rows without a DOI are joined
+    to a DOI work by exact normalized title and year (+/- 1); both passes are
+    pandas joins on the normalized keys. Only the rows left over reach fuzzy
+    title matching, once per distinct title and year.
+    """
+    doi_keys = _per_distinct(stacked["DOI"], normalize_doi)
+    title_keys = _per_distinct(stacked["Title"], normalize_title)
+    years = pd.to_numeric(stacked["Year"], errors="coerce").fillna(-1).astype("int64").to_numpy()
+
+    has_doi = pd.notna(doi_keys)
+    titled = title_keys != ""
+    work_ids = np.full(len(stacked), -1, dtype="int64")
+    work_ids[has_doi] = pd.factorize(doi_keys[has_doi])[0]
+    next_id = first_new_id = int(work_ids.max()) + 1 if has_doi.any() else 0
+
+    # Titled DOI rows, in row order: the first of each (title, year) is its exact match
+    known = pd.DataFrame({
+        "title": title_keys[has_doi & titled], "year": years[has_doi & titled], "work_id": work_ids[has_doi & titled],
+    })
+    rows = np.flatnonzero(~has_doi & titled)
+    exact_ids, exact_steps = np.full(len(stacked), -1, dtype="int64"), np.full(len(stacked), -1, dtype="int64")
+    exact_ids[rows], exact_steps[rows] = _exact_matches(title_keys, years, rows, known.drop_duplicates(["title", "year"]))
+    # A same-year match is final; one a year off can still lose to a work without a DOI in a nearer year
+    work_ids[exact_steps == 0] = exact_ids[exact_steps == 0]
+
+    # Untitled rows without a DOI cannot be matched: each is a work of its own
+    untitled = np.flatnonzero(~has_doi & ~titled)
+    work_ids[untitled] = np.arange(next_id, next_id + len(untitled))
+    next_id += len(untitled)
+
+    leftover = np.flatnonzero(work_ids < 0)
+    if len(leftover):
+        groups = pd.DataFrame({"title": title_keys[leftover], "year": years[leftover]}).groupby(
+            ["title", "year"], sort=False
+        ).ngroup().to_numpy()
+        representatives = leftover[np.unique(groups, return_index=True)[1]]
+        matches = _fuzzy_matches(
+            title_keys[representatives], years[representatives], known, next_id,
+            exact_ids[representatives], exact_steps[representatives],
+        )
+        work_ids[leftover] = matches[groups]
+    # Number the works without a DOI in order of first appearance
+    new = work_ids >= first_new_id
+    work_ids[new] = first_new_id + pd.factorize(work_ids[new])[0]
+    return pd.Series(work_ids, index=stacked.index)
+
+
+def _trigram_signatures(title_keys):
+    """Bit signature of each title's character trigrams, and its count of trigram positions.
+
+    A bit set in one title's signature but not the other's stands for at
+    least one trigram the other lacks, which bounds their Dice similarity
+    from above without building either trigram set.
+    """
+    lengths = np.fromiter(map(len, title_keys), dtype="int64", count=len(title_keys)) + 3
+    counts = lengths - 2
+    text = np.frombuffer("".join(f"  {title} " for title in title_keys).encode("ascii"), dtype="uint8")
+    offsets = np.repeat(np.cumsum(lengths) - lengths, counts)
+    starts = offsets + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    codes = (text[starts].astype("uint64") << 16) | (text[starts + 1].astype("uint64") << 8) | text[starts + 2]
+    bits = (codes * np.uint64(0x9E3779B1) >> np.uint64(16)) % np.uint64(TRIGRAM_SIGNATURE_BITS)
+    marks = np.zeros((len(title_keys), TRIGRAM_SIGNATURE_BITS), dtype=bool)
+    marks[np.repeat(np.arange(len(title_keys)), counts), bits.astype("int64")] = True
+    return np.packbits(marks, axis=1), counts
+
+
+def _dice_bounds(signatures, counts, a, b):
+    """Upper bound of the trigram Dice similarity of each title pair (a[i], b[i])."""
+    only_a = _POPCOUNT[signatures[a] & ~signatures[b]].sum(axis=1, dtype="int64")
+    only_b = _POPCOUNT[signatures[b] & ~signatures[a]].sum(axis=1, dtype="int64")
+    shared = np.minimum(counts[a] - only_a, counts[b] - only_b)
+    return 2 * shared / (2 * shared + only_a + only_b)
+
+
+def _block_entries(title_codes, years, prefixes):
+    """One row per (position, year, block prefix) of each title, with the prefix's rank."""
+    keys = [prefixes[code] for code in title_codes]
+    sizes = np.fromiter(map(len, keys), dtype="int64", count=len(keys))
+    position = np.repeat(np.arange(len(keys)), sizes)
+    return pd.DataFrame({
+        "position": position,
+        "year": years[position],
+        "prefix": [prefix for key in keys for prefix in key],
+        "rank": np.arange(len(position)) - np.repeat(np.cumsum(sizes) - sizes, sizes),
+    })
+
+
+def _fuzzy_matches(title_keys, years, known, next_id, exact_ids, exact_steps):
+    """Work id for each (title, year) by trigram similarity; unmatched ones become new works.
+
+    A title first takes the work of its exact match (exact_ids, found at the
+    year step exact_steps) or of the same title earlier here, whichever has
+    the nearer year. Otherwise its candidates share a block keyed on year
+    (+/- 1) and the first or last two significant title words with it, each
+    a known work or a new work made from an earlier title here. Blocks over
+    MAX_BLOCK_SIZE hold titles too generic to match on and are skipped.
+    Candidate pairs are joined in bulk and screened by trigram signature, so
+    only near-duplicates reach the exact Dice score; each title's trigram
+    set is built once.
+    """
+    codes, universe = pd.factorize(np.concatenate([title_keys, known["title"].to_numpy(dtype="object")]))
+    own_codes, known_codes = codes[:len(title_keys)], codes[len(title_keys):]
+    prefixes = [_block_prefixes(title) for title in universe]
+
+    entries = _block_entries(own_codes, years, prefixes)
+    known_entries = _block_entries(known_codes, known["year"].to_numpy(), prefixes)
+    # Every title here may become a new work, so count them all towards block sizes
+    sizes = pd.concat([entries, known_entries])[["year", "prefix"]].value_counts()
+    probes = pd.concat([entries.assign(year=entries["year"] + delta, probe=2 * i + entries["rank"])
+                        for i, delta in enumerate((0, -1, 1))])
+    probes = probes[probes.set_index(["year", "prefix"]).index.map(sizes).to_numpy() <= MAX_BLOCK_SIZE]
+
+    pairs = [
+        probes.merge(known_entries, on=["year", "prefix"], suffixes=("", "_block")).assign(
+            candidate=lambda df: known_codes[df["position_block"]],
+            work_id=lambda df: known["work_id"].to_numpy()[df["position_block"]],
+            earlier=-1, order=lambda df: df["position_block"]),
+        probes.merge(entries, on=["year", "prefix"], suffixes=("", "_block"))
+        .query("position_block < position").assign(
+            candidate=lambda df: own_codes[df["position_block"]],
+            work_id=-1, earlier=lambda df: df["position_block"],
+            order=lambda df: len(known) + df["position_block"]),
+    ]
+    pairs = pd.concat(pairs, ignore_index=True)[["position", "probe", "order", "candidate", "work_id", "earlier"]]
+    pairs["title"] = own_codes[pairs["position"].to_numpy()]
+    signatures, counts = _trigram_signatures(universe)
+    bounds = _dice_bounds(signatures, counts, pairs["title"].to_numpy(), pairs["candidate"].to_numpy())
+    pairs = pairs[bounds >= TITLE_MATCH_THRESHOLD]
+
+    trigrams = {code: _trigrams(universe[code]) for code in pd.unique(pairs[["title", "candidate"]].to_numpy().ravel())}
+    pairs = pairs.assign(score=[
+        2 * len(trigrams[a] & trigrams[b]) / (len(trigrams[a]) + len(trigrams[b]))
+        for a, b in zip(pairs["title"].tolist(), pairs["candidate"].tolist())
+    ])
+    # Visit candidates in block order: years, then prefixes, then known works before new ones
+    pairs = pairs[pairs["score"] >= TITLE_MATCH_THRESHOLD].sort_values(["position", "probe", "order"])
+    candidates = {}
+    for position, score, work_id, earlier in zip(
+        pairs["position"].tolist(), pairs["score"].tolist(), pairs["work_id"].tolist(), pairs["earlier"].tolist()
+    ):
+        candidates.setdefault(position, []).append((score, work_id, earlier))
+
+    created = {}
+    is_new = np.zeros(len(title_keys), dtype=bool)
+    matches = np.empty(len(title_keys), dtype="int64")
+    for i, (title_key, year, exact_id, exact_step) in enumerate(
+        zip(title_keys, years.tolist(), exact_ids.tolist(), exact_steps.tolist())
+    ):
+        match = None
+        for step, y in enumerate((year, year - 1, year + 1)):
+            match = exact_id if exact_step == step else created.get((title_key, y))
+            if match is not None:
+                break
+        if match is None:
+            best = TITLE_MATCH_THRESHOLD
+            for score, work_id, earlier in candidates.get(i, ()):
+                if earlier >= 0:
+                    # Titles that joined an existing work never started a block entry of their own
+                    if not is_new[earlier]:
+                        continue
+                    work_id = matches[earlier]
+                if score >= best:
+                    best, match = score, work_id
+        if match is None:
+            match = next_id
+            next_id += 1
+            created.setdefault((title_key, year), match)
+            is_new[i] = True
+        matches[i] = match
+    return matches
+
+
+def merge_sources(frames):
+    """Merge per-source frames into one canonical record per work.
+
+    frames maps source name ('openalex', 'crossref', 'semantic_scholar') to
+    the DataFrame built from its parser. The result has one row per work with
+    a column of citations per source, the reconciled Overall_Citations (the
+    highest count any source reports) and the list of contributing Sources.
+    List frames (as_lists=True) merge into tuple-valued columns.
+    """
+    metadata_columns = _metadata_columns(frames)
+    stacked = _stack_sources(frames, metadata_columns)
+    merged_citation_columns = [merged for _, merged in SOURCE_CITATION_COLUMNS.values()]
+    if stacked.empty:
+        return pd.DataFrame(columns=metadata_columns + merged_citation_columns + ["Overall_Citations", "Sources"])
+
+    stacked["work_id"] = assign_work_ids(stacked)
+    stacked["priority"] = stacked["source"].map({s: i for i, s in enumerate(SOURCE_PRIORITY)})
+    stacked = stacked.sort_values(["work_id", "priority"], kind="stable")
+
+    # 'first' skips nulls, so treat the parsers' 'N/A' placeholders and empty tuples as missing
+    metadata = stacked[metadata_columns].replace({"N/A": None, "": None})
+    for column in metadata_columns:
+        values = metadata[column]
+        empty = values.isin([()]) if values.dtype == object else None
+        if empty is not None and empty.any():
+            metadata[column] = values.mask(empty, None)
+    metadata["work_id"] = stacked["work_id"]
+    merged = metadata.groupby("work_id", sort=False).first()
+
+    citations = stacked.pivot_table(
+        index="work_id", columns="merged_citation_column", values="citations", aggfunc="max"
+    ).reindex(columns=merged_citation_columns)
+    merged = merged.join(citations)
+    merged["Overall_Citations"] = merged[merged_citation_columns].max(axis=1).fillna(0)
+    # Encode which sources saw each work as a bitmask, then map masks to labels
+    seen = stacked.drop_duplicates(["work_id", "priority"])
+    masks = np.left_shift(1, seen["priority"]).groupby(seen["work_id"], sort=False).sum()
+    labels = {
+        mask: ", ".join(s for i, s in enumerate(SOURCE_PRIORITY) if mask & (1 << i))
+        for mask in range(1, 1 << len(SOURCE_PRIORITY))
+    }
+    merged["Sources"] = masks.map(labels)
+    text_columns = [c for c in metadata_columns if c != "Year"]
+    merged[text_columns] = merged[text_columns].fillna("N/A")
+    merged["Year"] = merged["Year"].astype("Int64")
+    return merged.reset_index(drop=True)
+
+
+def source_fingerprint(df):
+    """Content hash of a source frame: its columns and every value, in row order."""
+    digest = hashlib.blake2b(repr(list(df.columns)).encode(), digest_size=16)
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def cached_merge_sources(frames):
+    """merge_sources memoized by the content fingerprints of the source frames.
+
+    Reruns over the same fetched frames, and repeated searches answered from
+    the HTTP cache, get a copy of the stored result instead of matching the
+    works again.
+    """
+    key = tuple((source, None if df is None else source_fingerprint(df)) for source, df in frames.items())
+    with _merged_lock:
+        merged = _merged.get(key)
+        if merged is not None:
+            _merged.move_to_end(key)
+            return merged.copy()
+    merged = merge_sources(frames)
+    with _merged_lock:
+        _merged[key] = merged
+        while len(_merged) > MAX_CACHED_MERGES:
+            _merged.popitem(last=False)
+    return merged.copy()
+
+
+def top_works(frames, n=10):
+    """Return the n most-cited canonical works across all sources."""
+    return merge_sources(frames).sort_values("Overall_Citations", ascending=False).head(n).reset_index(drop=True)
@@ -1,8 +1,31 @@
 # gemini_interface/__init__.py
-from .gemini_interface import (
-    get_model,
-    analyze_pdf_content,
-    process_query_stream,
-)
+from utilities.lazy import lazy_exports
 
-__all__ = ["get_model", "analyze_pdf_content", "process_query_stream"]
+# Submodules are imported on first use of one of their names
+_EXPORTS = {
+    "configure": ".gemini_interface",
+    "get_model": ".gemini_interface",
+    "analyze_pdf_content": ".gemini_interface",
+    "process_query_stream": ".gemini_interface",
+    "DocumentStore": ".documents",
+    "DocumentHandle": ".documents",
+    "GeminiFileBackend": ".documents",
+    "InlineBackend": ".documents",
+    "get_document_store": ".documents",
+    "set_document_store": ".documents",
+    "pdf_sha256": ".documents",
+    "AnalysisCache": ".analysis_cache",
+    "get_analysis_cache": ".analysis_cache",
+    "DocumentIndex": ".retrieval",
+    "BM25Index": ".retrieval",
+    "get_document_index": ".retrieval",
+    "condense_notes": ".retrieval",
+    "run_batch": ".batch",
+    "discover_pdfs": ".batch",
+    "TokenBucket": ".batch",
+    "FakeStreamingModel": ".fake_model",
+    "FakeDocumentBackend": ".fake_model",
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -0,0 +1,148 @@
+# gemini_interface/analysis_cache.py
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+
+from utilities.constants import ANALYSIS_CACHE_PATH, ANALYSIS_CACHE_MAX_BYTES
+from research_paper_analyst import RESEARCH_PAPER
+
+REPLAY_CHUNK_SIZE = 512
+
+
+def text_sha256(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def model_id(model):
+    """Stable identifier of the model that produced an analysis."""
+    return getattr(model, "model_name", None) or type(model).__name__
+
+
+class TextChunk:
+    """Minimal stand-in for a streamed response chunk."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class AnalysisCache:
+    """SQLite store of finished paper analyses with an LRU size cap.
+
+    Entries are keyed by (PDF SHA-256, prompt SHA-256, model id), so a new
+    prompt or model never serves an old analysis.
+    """
+
+    def __init__(self, path=ANALYSIS_CACHE_PATH, max_bytes=ANALYSIS_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS analyses (
+                pdf_sha TEXT,
+                prompt_sha TEXT,
+                model TEXT,
+                body BLOB,
+                size INTEGER,
+                created_at REAL,
+                last_access REAL,
+                PRIMARY KEY (pdf_sha, prompt_sha, model)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_last_access ON analyses(last_access)")
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, pdf_sha, prompt_sha, model):
+        conn = self._conn()
+        key = (pdf_sha, prompt_sha, model)
+        row = conn.execute(
+            "SELECT body FROM analyses WHERE pdf_sha = ? AND prompt_sha = ? AND model = ?", key
+        ).fetchone()
+        if row is None:
+            return None
+        with self._write_lock:
+            conn.execute(
+                "UPDATE analyses SET last_access = ? WHERE pdf_sha = ? AND prompt_sha = ? AND model = ?",
+                (time.time(),) + key,
+            )
+            conn.commit()
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def put(self, pdf_sha, prompt_sha, model, text):
+        body = zlib.compress(text.encode("utf-8"))
+        now = time.time()
+        conn = self._conn()
+        with self._write_lock:
+            conn.execute(
+                "INSERT OR REPLACE INTO analyses (pdf_sha, prompt_sha, model, body, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (pdf_sha, prompt_sha, model, body, len(body), now, now),
+            )
+            conn.commit()
+        self.evict()
+
+    def evict(self):
+        """Drop least-recently-used analyses until the cache fits in max_bytes."""
+        conn = self._conn()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM analyses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        with self._write_lock:
+            excess = total - self.max_bytes
+            freed = 0
+            victims = []
+            for rowid, size in conn.execute("SELECT rowid, size FROM analyses ORDER BY last_access"):
+                victims.append((rowid,))
+                freed += size
+                if freed >= excess:
+                    break
+            conn.executemany("DELETE FROM analyses WHERE rowid = ?", victims)
+            conn.commit()
+
+    def invalidate_prompt(self, current_prompt_sha):
+        """Delete analyses made with any prompt other than the current one."""
+        conn = self._conn()
+        with self._write_lock:
+            deleted = conn.execute("DELETE FROM analyses WHERE prompt_sha != ?", (current_prompt_sha,)).rowcount
+            conn.commit()
+        return deleted
+
+    def clear(self):
+        conn = self._conn()
+        with self._write_lock:
+            conn.execute("DELETE FROM analyses")
+            conn.commit()
+
+
+def replay(text, chunk_size=REPLAY_CHUNK_SIZE):
+    """Yield a cached analysis as a stream of chunks."""
+    for start in range(0, len(text), chunk_size):
+        yield TextChunk(text[start:start + chunk_size])
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_analysis_cache():
+    """Return the process-wide AnalysisCache, dropping entries from older prompts on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                cache = AnalysisCache()
+                cache.invalidate_prompt(text_sha256(RESEARCH_PAPER))
+                _cache = cache
+    return _cache
@@ -0,0 +1,240 @@
+# gemini_interface/batch.py
+"""Headless batch analysis of many PDFs.
+
+    python -m gemini_interface.batch papers/ --out results.jsonl --concurrency 4 --rpm 30
+
+The input is a directory (searched recursively for *.pdf) or a manifest file
+listing one PDF path per line. Each finished paper is appended to the output
+right away (JSONL, or SQLite for a .db/.sqlite path), and rerunning the same
+command skips papers that already succeeded, so a crashed run resumes where
+it stopped.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from utilities.constants import BATCH_CONCURRENCY, BATCH_REQUESTS_PER_MINUTE
+from utilities.rate_limit import TokenBucket
+from .documents import pdf_sha256
+from .gemini_interface import analyze_pdf_content
+
+# Rough characters-per-token ratio used when the model reports no usage
+CHARS_PER_TOKEN = 4
+
+
+def discover_pdfs(source):
+    """List PDF paths from a directory or a manifest file (one path per line)."""
+    source = Path(source)
+    if source.is_dir():
+        return sorted(str(p) for p in source.rglob("*.pdf"))
+    paths = []
+    for line in source.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            path = Path(line)
+            paths.append(str(path if path.is_absolute() else source.parent / path))
+    return paths
+
+
+class JsonlResults:
+    """Append-only JSONL output; each line is one finished paper."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def completed(self):
+        done = set()
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Half-written line from a crash; the paper is redone
+                    continue
+                if record.get("status") == "ok":
+                    done.add(record["pdf_sha"])
+        return done
+
+    def write(self, record):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def close(self):
+        pass
+
+
+class SqliteResults:
+    """SQLite output keyed by PDF hash; a retried paper replaces its row."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS batch_results (
+                pdf_sha TEXT PRIMARY KEY,
+                path TEXT,
+                status TEXT,
+                notes TEXT,
+                error TEXT,
+                tokens INTEGER,
+                seconds REAL,
+                finished_at REAL
+            )
+        """)
+        self.conn.commit()
+
+    def completed(self):
+        return {row[0] for row in self.conn.execute("SELECT pdf_sha FROM batch_results WHERE status = 'ok'")}
+
+    def write(self, record):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO batch_results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (record["pdf_sha"], record["path"], record["status"], record["notes"], record["error"],
+             record["tokens"], record["seconds"], record["finished_at"]),
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def open_results(path):
+    if str(path).endswith((".db", ".sqlite", ".sqlite3")):
+        return SqliteResults(path)
+    return JsonlResults(path)
+
+
+def _chunk_tokens(chunk):
+    usage = getattr(chunk, "usage_metadata", None)
+    return getattr(usage, "candidates_token_count", None) if usage is not None else None
+
+
+def analyze_file(model, path, pdf_sha, bucket=None, documents=None, use_cache=True):
+    """Analyze one PDF and return its result record; failures are recorded, not raised."""
+    started = time.perf_counter()
+    record = {"pdf_sha": pdf_sha, "path": path, "status": "ok", "notes": None, "error": None, "tokens": 0}
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        if bucket is not None:
+            bucket.acquire()
+        parts = []
+        reported = None
+        for chunk in analyze_pdf_content(model, data, documents=documents, use_cache=use_cache):
+            parts.append(getattr(chunk, "text", "") or "")
+            reported = _chunk_tokens(chunk) or reported
+        record["notes"] = "".join(parts)
+        record["tokens"] = reported or len(record["notes"]) // CHARS_PER_TOKEN
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = str(e)
+    record["seconds"] = round(time.perf_counter() - started, 3)
+    record["finished_at"] = time.time()
+    return record
+
+
+def run_batch(
+    model,
+    paths,
+    output,
+    concurrency=BATCH_CONCURRENCY,
+    requests_per_minute=BATCH_REQUESTS_PER_MINUTE,
+    documents=None,
+    use_cache=True,
+    on_result=None,
+):
+    """Analyze PDFs with bounded concurrency and a request rate limit.
+
+    Results are written to output as each paper finishes, and papers already
+    marked ok there are skipped. Returns a summary with throughput figures.
+    """
+    results = open_results(output)
+    started = time.perf_counter()
+    summary = {"total": len(paths), "skipped": 0, "ok": 0, "failed": 0, "tokens": 0}
+    try:
+        done = results.completed()
+        pending = []
+        seen = set()
+        for path in paths:
+            try:
+                with open(path, "rb") as f:
+                    digest = pdf_sha256(f.read())
+            except OSError as e:
+                results.write({"pdf_sha": path, "path": path, "status": "error", "notes": None,
+                               "error": str(e), "tokens": 0, "seconds": 0.0, "finished_at": time.time()})
+                summary["failed"] += 1
+                continue
+            if digest in done or digest in seen:
+                summary["skipped"] += 1
+                continue
+            seen.add(digest)
+            pending.append((path, digest))
+
+        bucket = TokenBucket(requests_per_minute / 60.0) if requests_per_minute else None
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            futures = [
+                pool.submit(analyze_file, model, path, digest, bucket, documents, use_cache)
+                for path, digest in pending
+            ]
+            # Results are written from this thread only, so the writers need no locking
+            for future in as_completed(futures):
+                record = future.result()
+                results.write(record)
+                summary["ok" if record["status"] == "ok" else "failed"] += 1
+                summary["tokens"] += record["tokens"]
+                if on_result is not None:
+                    on_result(record, summary)
+    finally:
+        results.close()
+
+    elapsed = time.perf_counter() - started
+    summary["seconds"] = round(elapsed, 3)
+    summary["papers_per_minute"] = round(summary["ok"] * 60 / elapsed, 2) if elapsed else 0.0
+    summary["tokens_per_second"] = round(summary["tokens"] / elapsed, 2) if elapsed else 0.0
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a directory or manifest of PDFs with Gemini.")
+    parser.add_argument("source", help="directory of PDFs or a manifest file with one path per line")
+    parser.add_argument("--out", default="analyses.jsonl", help="JSONL output, or .db/.sqlite for SQLite")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument("--rpm", type=float, default=BATCH_REQUESTS_PER_MINUTE,
+                        help="maximum model requests per minute (0 for no limit)")
+    parser.add_argument("--no-cache", action="store_true", help="ignore the shared analysis cache")
+    args = parser.parse_args(argv)
+
+    from .gemini_interface import get_model
+
+    paths = discover_pdfs(args.source)
+
+    def report(record, summary):
+        finished = summary["ok"] + summary["failed"]
+        print(f"[{finished}/{summary['total'] - summary['skipped']}] {record['status']:5} "
+              f"{record['seconds']:7.1f}s {record['path']}", flush=True)
+
+    summary = run_batch(
+        get_model(), paths, args.out,
+        concurrency=args.concurrency,
+        requests_per_minute=args.rpm,
+        use_cache=not args.no_cache,
+        on_result=report,
+    )
+    print(
+        f"{summary['ok']} analyzed, {summary['failed']} failed, {summary['skipped']} skipped in "
+        f"{summary['seconds']}s ({summary['papers_per_minute']} papers/min, "
+        f"{summary['tokens_per_second']} tokens/s)"
+    )
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,161 @@
+# gemini_interface/documents.py
+import base64
+import hashlib
+import io
+import threading
+import time
+
+
+PDF_MIME_TYPE = "application/pdf"
+# The Gemini Files API keeps uploads for 48 hours; expire handles a little earlier
+DEFAULT_HANDLE_TTL = 47 * 3600
+
+
+def pdf_bytes(pdf_content):
+    """Raw PDF bytes from the base64 string kept in session state (or bytes as-is)."""
+    if isinstance(pdf_content, (bytes, bytearray)):
+        return bytes(pdf_content)
+    return base64.b64decode(pdf_content)
+
+
+def pdf_sha256(pdf_content):
+    return hashlib.sha256(pdf_bytes(pdf_content)).hexdigest()
+
+
+class InlineBackend:
+    """Sends the PDF inline with every request (the original behaviour)."""
+
+    def upload(self, data, digest):
+        return {"mime_type": PDF_MIME_TYPE, "data": base64.b64encode(data).decode("utf-8")}
+
+    def delete(self, part):
+        pass
+
+
+class GeminiFileBackend:
+    """Uploads each PDF once to the Gemini Files API and references it by name."""
+
+    def __init__(self, poll_interval=1.0, processing_timeout=120):
+        self.poll_interval = poll_interval
+        self.processing_timeout = processing_timeout
+
+    def upload(self, data, digest):
+        import google.generativeai as genai
+
+        uploaded = genai.upload_file(io.BytesIO(data), mime_type=PDF_MIME_TYPE, display_name=f"pdf-{digest[:16]}")
+        deadline = time.monotonic() + self.processing_timeout
+        while uploaded.state.name == "PROCESSING" and time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            uploaded = genai.get_file(uploaded.name)
+        if uploaded.state.name != "ACTIVE":
+            raise RuntimeError(f"Uploaded PDF is not usable (state {uploaded.state.name})")
+        return uploaded
+
+    def delete(self, part):
+        import google.generativeai as genai
+
+        try:
+            genai.delete_file(part.name)
+        except Exception as e:
+            print(f'Error deleting uploaded file:{e}')
+
+
+class DocumentHandle:
+    """A PDF already known to the model backend, addressed by its SHA-256.
+
+    backend is the one that created part, and the one that releases it.
+    """
+
+    def __init__(self, digest, part, size, expires_at, backend=None):
+        self.digest = digest
+        self.part = part
+        self.size = size
+        self.expires_at = expires_at
+        self.backend = backend
+
+    def expired(self, now=None):
+        return (now or time.time()) >= self.expires_at
+
+
+class DocumentStore:
+    """Uploads each distinct PDF once and hands out reusable handles.
+
+    Handles are keyed by the SHA-256 of the PDF bytes, so the same paper
+    uploaded in several sessions shares one handle until its TTL runs out.
+    If the backend upload fails, the PDF is sent inline instead.
+    """
+
+    def __init__(self, backend=None, ttl=DEFAULT_HANDLE_TTL, fallback=None):
+        self.backend = backend or GeminiFileBackend()
+        self.ttl = ttl
+        self.fallback = fallback or InlineBackend()
+        self._handles = {}
+        self._lock = threading.Lock()
+        self._uploading = {}
+
+    def get(self, pdf_content):
+        """Return a live DocumentHandle for the PDF, uploading it if needed."""
+        data = pdf_bytes(pdf_content)
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            handle = self._handles.get(digest)
+            if handle is not None and not handle.expired():
+                return handle
+            # Only one thread uploads a given PDF; the others wait for it
+            event = self._uploading.get(digest)
+            owner = event is None
+            if owner:
+                event = self._uploading[digest] = threading.Event()
+        if not owner:
+            event.wait()
+            return self.get(data)
+        self.purge_expired()
+        try:
+            backend = self.backend
+            try:
+                part = backend.upload(data, digest)
+                expires_at = time.time() + self.ttl
+            except Exception as e:
+                print(f'Error uploading PDF, sending inline:{e}')
+                backend = self.fallback
+                part = backend.upload(data, digest)
+                expires_at = time.time() + 60
+            handle = DocumentHandle(digest, part, len(data), expires_at, backend)
+            with self._lock:
+                self._handles[digest] = handle
+            return handle
+        finally:
+            with self._lock:
+                self._uploading.pop(digest, None)
+            event.set()
+
+    def purge_expired(self):
+        """Drop expired handles and release them in the backend that created them."""
+        now = time.time()
+        with self._lock:
+            expired = [h for h in self._handles.values() if h.expired(now)]
+            for handle in expired:
+                del self._handles[handle.digest]
+        for handle in expired:
+            (handle.backend or self.backend).delete(handle.part)
+        return len(expired)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_document_store():
+    """Return the process-wide DocumentStore."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = DocumentStore()
+    return _store
+
+
+def set_document_store(store):
+    """Replace the process-wide DocumentStore (e.g. with a fake backend in tests)."""
+    global _store
+    _store = store
@@ -0,0 +1,62 @@
+# gemini_interface/fake_model.py
+import time
+
+
+class FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeStreamingModel:
+    """In-process stand-in for a GenerativeModel that streams canned text.
+
+    It records the size of every request so tests and benchmarks can check
+    how much content each call sends.
+    """
+
+    def __init__(self, response="This is a fake analysis.", chunk_size=64, delay=0.0, first_token_delay=0.0):
+        self.response = response
+        self.chunk_size = chunk_size
+        self.delay = delay
+        self.first_token_delay = first_token_delay
+        self.calls = []
+        self.model_name = "models/fake-streaming-model"
+
+    def _request_size(self, contents):
+        size = 0
+        for part in contents:
+            if isinstance(part, str):
+                size += len(part.encode("utf-8"))
+            elif isinstance(part, dict):
+                size += len(part.get("data", ""))
+        return size
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        self.calls.append({"contents": contents, "bytes": self._request_size(contents)})
+        chunks = [self.response[i:i + self.chunk_size] for i in range(0, len(self.response), self.chunk_size)]
+        if not stream:
+            return FakeChunk(self.response)
+        return self._stream(chunks)
+
+    def _stream(self, chunks):
+        if self.first_token_delay:
+            time.sleep(self.first_token_delay)
+        for text in chunks:
+            if self.delay:
+                time.sleep(self.delay)
+            yield FakeChunk(text)
+
+
+class FakeDocumentBackend:
+    """Document backend that keeps 'uploads' in memory and counts them."""
+
+    def __init__(self):
+        self.uploads = 0
+        self.deleted = 0
+
+    def upload(self, data, digest):
+        self.uploads += 1
+        return f"fake-file/{digest[:16]}"
+
+    def delete(self, part):
+        self.deleted += 1
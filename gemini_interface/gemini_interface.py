@@ -1,42 +1,91 @@
 # gemini_interface/gemini_interface.py
 import os
-import google.generativeai as genai
-from dotenv import load_dotenv
+import time
+
+from instrumentation import increment, instrument_stream
 from research_paper_analyst import RESEARCH_PAPER, FOLLOWUP_CONTEXT
+from .documents import get_document_store, pdf_sha256
+from .analysis_cache import get_analysis_cache, model_id, replay, text_sha256
+from .retrieval import get_document_index, condense_notes, format_passages
 
-load_dotenv()
 
+def configure(api_key=None):
+    """Load .env and configure the Gemini client; nothing is configured at import."""
+    from dotenv import load_dotenv
+    import google.generativeai as genai
 
-def get_model():
-    """Return a ready-to-use Gemini 2.5 Flash model."""
-    api_key = os.getenv("GEMINI_API_KEY")
+    load_dotenv()
+    api_key = api_key or os.getenv("GEMINI_API_KEY")
     if not api_key:
         raise ValueError("GEMINI_API_KEY not set in .env")
     genai.configure(api_key=api_key)
+    return genai
+
+
+def get_model(api_key=None):
+    """Return a ready-to-use Gemini 2.5 Flash model."""
+    genai = configure(api_key)
     return genai.GenerativeModel("gemini-2.5-flash")
 
 
-def analyze_pdf_content(model, pdf_content: str):
-    """Yield streaming chunks from the PDF + prompt."""
+def analyze_pdf_content(model, pdf_content: str, documents=None, cache=None, use_cache=True):
+    """Yield streaming chunks from the PDF + prompt.
+
+    A finished analysis is stored by (PDF hash, prompt hash, model), and the
+    same paper is replayed from that cache without calling the model. On a
+    miss the PDF is uploaded once through the DocumentStore, so follow-up
+    questions reuse its handle instead of resending it.
+    """
     try:
-        response = model.generate_content(
-            [{"mime_type": "application/pdf", "data": pdf_content}, RESEARCH_PAPER],
-            stream=True,
+        key = None
+        if use_cache:
+            cache = cache or get_analysis_cache()
+            key = (pdf_sha256(pdf_content), text_sha256(RESEARCH_PAPER), model_id(model))
+            cached = cache.get(*key)
+            increment("analysis_cache", result="miss" if cached is None else "hit")
+            if cached is not None:
+                yield from replay(cached)
+                return
+        started = time.perf_counter()
+        handle = (documents or get_document_store()).get(pdf_content)
+        response = instrument_stream(
+            model.generate_content([handle.part, RESEARCH_PAPER], stream=True),
+            "analyze",
+            started,
         )
+        parts = []
         for chunk in response:
+            parts.append(getattr(chunk, "text", "") or "")
             yield chunk
+        # Only complete analyses are cached; an abandoned stream never gets here
+        if key is not None and parts:
+            cache.put(*key, "".join(parts))
     except Exception as e:
         raise RuntimeError(f"Error analyzing PDF content: {str(e)}")
 
 
-def process_query_stream(model, pdf_content: str, notes: str, query: str):
-    """Yield streaming answer for a follow-up question."""
+def process_query_stream(model, pdf_content: str, notes: str, query: str, documents=None, use_retrieval=True):
+    """Yield streaming answer for a follow-up question.
+
+    When the PDF has extractable text, only the passages most relevant to
+    the question (an overview of the paper when none match) and a condensed
+    slice of the notes are sent, so the prompt
+    does not grow with the length of the paper. Otherwise the uploaded PDF
+    handle and the full notes are sent.
+    """
     try:
-        context = f"{notes}\n\n{FOLLOWUP_CONTEXT}\n\n{query}"
-        response = model.generate_content(
-            [{"mime_type": "application/pdf", "data": pdf_content}, context],
-            stream=True,
-        )
+        started = time.perf_counter()
+        index = get_document_index(pdf_content) if use_retrieval else None
+        if index:
+            context = (
+                f"Relevant passages from the paper:\n\n{format_passages(index.passages(query))}\n\n"
+                f"Notes:\n{condense_notes(notes, query)}\n\n{FOLLOWUP_CONTEXT}\n\n{query}"
+            )
+            contents = [context]
+        else:
+            handle = (documents or get_document_store()).get(pdf_content)
+            contents = [handle.part, f"{notes}\n\n{FOLLOWUP_CONTEXT}\n\n{query}"]
+        response = instrument_stream(model.generate_content(contents, stream=True), "followup", started)
         for chunk in response:
             yield chunk
     except Exception as e:
@@ -0,0 +1,199 @@
+# gemini_interface/retrieval.py
+import io
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+
+from .documents import pdf_bytes, pdf_sha256
+
+CHUNK_CHARS = 1200
+TOP_K = 6
+NOTES_BUDGET_CHARS = 2500
+MAX_INDEXED_DOCUMENTS = 32
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+_STOPWORDS = frozenset(
+    "a an and are as at be by can for from has have how in is it its of on or that the this to was were "
+    "what when which who why with does do did paper".split()
+)
+_SECTION_NAMES = (
+    "abstract", "introduction", "background", "related work", "method", "methods", "methodology",
+    "materials and methods", "experiments", "experimental setup", "results", "discussion",
+    "conclusion", "conclusions", "limitations", "future work", "references", "acknowledgements",
+    "acknowledgments", "appendix",
+)
+# Sections that summarize the paper, sent when a question matches no passage
+_OVERVIEW_SECTIONS = ("abstract", "introduction", "conclusion", "conclusions", "summary")
+# "3 Results", "2.1 Data collection", "IV. EXPERIMENTS" or a bare known section name
+_HEADING = re.compile(
+    r"^(?:(?:\d+(?:\.\d+)*|[IVX]+)\.?\s+[A-Z][^\n]{0,80}|(?:%s))\s*$" % "|".join(_SECTION_NAMES),
+    re.IGNORECASE,
+)
+
+
+def tokenize(text):
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS and len(t) > 1]
+
+
+def extract_pdf_pages(pdf_content):
+    """Text of each PDF page, or [] when pypdf is missing or the PDF has no text layer."""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        return []
+    try:
+        reader = PdfReader(io.BytesIO(pdf_bytes(pdf_content)))
+        return [page.extract_text() or "" for page in reader.pages]
+    except Exception as e:
+        print(f'Error extracting PDF text:{e}')
+        return []
+
+
+def split_sections(pages):
+    """Group page lines into (section title, page number, text) blocks at detected headings."""
+    sections = []
+    title, page_no, lines = "Front matter", 1, []
+    for number, page in enumerate(pages, start=1):
+        for line in page.splitlines():
+            stripped = line.strip()
+            if stripped and _HEADING.match(stripped):
+                if lines:
+                    sections.append((title, page_no, "\n".join(lines)))
+                title, page_no, lines = stripped, number, []
+            elif stripped:
+                lines.append(stripped)
+    if lines:
+        sections.append((title, page_no, "\n".join(lines)))
+    return sections
+
+
+def chunk_sections(sections, max_chars=CHUNK_CHARS):
+    """Split sections into passages of at most max_chars, breaking between lines."""
+    chunks = []
+    for title, page_no, text in sections:
+        if title.lower() in ("references", "acknowledgements", "acknowledgments"):
+            continue
+        current = []
+        size = 0
+        for line in text.split("\n"):
+            if current and size + len(line) > max_chars:
+                chunks.append({"section": title, "page": page_no, "text": " ".join(current)})
+                current, size = [], 0
+            current.append(line)
+            size += len(line) + 1
+        if current:
+            chunks.append({"section": title, "page": page_no, "text": " ".join(current)})
+    return chunks
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of text passages."""
+
+    def __init__(self, texts, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(tokenize(text)) for text in texts]
+        self.lengths = [sum(tf.values()) for tf in self.term_freqs]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0
+        doc_freq = Counter(term for tf in self.term_freqs for term in tf)
+        n = len(texts)
+        self.idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+    def scores(self, query):
+        terms = [t for t in set(tokenize(query)) if t in self.idf]
+        scores = []
+        for tf, length in zip(self.term_freqs, self.lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / (self.avg_length or 1))
+            scores.append(sum(self.idf[t] * tf[t] * (self.k1 + 1) / (tf[t] + norm) for t in terms if t in tf))
+        return scores
+
+    def top(self, query, k):
+        scores = self.scores(query)
+        ranked = sorted(range(len(scores)), key=scores.__getitem__, reverse=True)
+        return [i for i in ranked[:k] if scores[i] > 0]
+
+
+class DocumentIndex:
+    """Section-aware passages of one PDF with a BM25 index over them."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.bm25 = BM25Index([f"{c['section']} {c['text']}" for c in chunks])
+
+    @classmethod
+    def from_pdf(cls, pdf_content, max_chars=CHUNK_CHARS):
+        return cls(chunk_sections(split_sections(extract_pdf_pages(pdf_content)), max_chars))
+
+    def __bool__(self):
+        return bool(self.chunks)
+
+    def passages(self, query, k=TOP_K):
+        """The k most relevant passages, in document order.
+
+        A question with no matching terms ("Summarize it") gets an overview
+        instead: the abstract, introduction and conclusion passages, topped
+        up with the paper's leading passages.
+        """
+        ranked = self.bm25.top(query, k)
+        if not ranked:
+            ranked = self.overview(k)
+        return [self.chunks[i] for i in sorted(ranked)]
+
+    def overview(self, k=TOP_K):
+        """Indexes of up to k passages that summarize the paper."""
+        summary = [i for i, c in enumerate(self.chunks) if _section_name(c["section"]) in _OVERVIEW_SECTIONS]
+        # First passage of each summary section, then the rest of them
+        firsts = [i for i in summary if i == 0 or self.chunks[i - 1]["section"] != self.chunks[i]["section"]]
+        chosen = list(dict.fromkeys(firsts + summary + list(range(len(self.chunks)))))
+        return chosen[:k]
+
+
+def _section_name(title):
+    """Heading without its numbering: '5. Conclusions' -> 'conclusions'."""
+    return re.sub(r"^(?:\d+(?:\.\d+)*|[IVX]+)\.?\s+", "", title.strip()).lower()
+
+
+def condense_notes(notes, query, budget=NOTES_BUDGET_CHARS):
+    """Keep the opening of the notes plus the paragraphs most relevant to the query.
+
+    Paragraphs stay in their original order and the total stays under budget
+    characters, however long the full analysis is.
+    """
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", notes or "") if p.strip()]
+    if sum(len(p) for p in paragraphs) <= budget:
+        return "\n\n".join(paragraphs)
+    chosen, used = {0}, len(paragraphs[0])
+    for i in BM25Index(paragraphs).top(query, len(paragraphs)):
+        if i not in chosen and used + len(paragraphs[i]) <= budget:
+            chosen.add(i)
+            used += len(paragraphs[i])
+    return "\n\n".join(paragraphs[i][:budget] for i in sorted(chosen))
+
+
+def format_passages(passages):
+    return "\n\n".join(f"[{p['section']}, p. {p['page']}]\n{p['text']}" for p in passages)
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_document_index(pdf_content):
+    """Return the retrieval index for a PDF, building it on first use.
+
+    Indexes are cached in memory by PDF hash, keeping the most recently used
+    MAX_INDEXED_DOCUMENTS.
+    """
+    digest = pdf_sha256(pdf_content)
+    with _indexes_lock:
+        index = _indexes.get(digest)
+        if index is not None:
+            _indexes.move_to_end(digest)
+            return index
+    index = DocumentIndex.from_pdf(pdf_content)
+    with _indexes_lock:
+        _indexes[digest] = index
+        while len(_indexes) > MAX_INDEXED_DOCUMENTS:
+            _indexes.popitem(last=False)
+    return index
@@ -0,0 +1,39 @@
+# instrumentation/__init__.py
+from .metrics import (
+    enable,
+    disable,
+    is_enabled,
+    span,
+    observe,
+    increment,
+    snapshot,
+    render_prometheus,
+    instrument_stream,
+    registry,
+)
+
+
+def start_metrics_server(port, host="0.0.0.0"):
+    """Serve /metrics on a background thread (see server.start_metrics_server).
+
+    http.server is imported only here, keeping `import instrumentation`
+    cheap for everything that imports it.
+    """
+    from .server import start_metrics_server as start
+
+    return start(port, host)
+
+
+__all__ = [
+    "enable",
+    "disable",
+    "is_enabled",
+    "span",
+    "observe",
+    "increment",
+    "snapshot",
+    "render_prometheus",
+    "instrument_stream",
+    "registry",
+    "start_metrics_server",
+]
@@ -0,0 +1,235 @@
+# instrumentation/metrics.py
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+# Upper bounds (seconds) of the exported histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Recent observations kept per series for the p50/p95 estimates
+RESERVOIR_SIZE = 1024
+METRIC_PREFIX = "research_assistant_"
+
+logger = logging.getLogger("research_assistant.metrics")
+
+
+class Histogram:
+    """Cumulative bucket counts plus a window of recent values for quantiles."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=RESERVOIR_SIZE)
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.recent.append(value)
+
+    def quantile(self, q):
+        if not self.recent:
+            return None
+        values = sorted(self.recent)
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class MetricsRegistry:
+    """Thread-safe store of histograms and counters keyed by (name, labels)."""
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, value, labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def increment(self, name, amount, labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def clear(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def snapshot(self):
+        """One row per series: count, mean, p50 and p95 (counters have only a value)."""
+        with self._lock:
+            histograms = list(self.histograms.items())
+            counters = list(self.counters.items())
+        rows = []
+        for (name, labels), h in sorted(histograms):
+            rows.append({
+                "metric": name,
+                "labels": ",".join(f"{k}={v}" for k, v in labels),
+                "count": h.count,
+                "mean": h.total / h.count if h.count else None,
+                "p50": h.quantile(0.5),
+                "p95": h.quantile(0.95),
+            })
+        for (name, labels), value in sorted(counters):
+            rows.append({"metric": name, "labels": ",".join(f"{k}={v}" for k, v in labels), "count": value})
+        return rows
+
+    def render_prometheus(self):
+        """Text exposition format (histograms as _bucket/_sum/_count, counters as _total)."""
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+        lines = []
+        typed = set()
+        for (name, labels), h in histograms:
+            metric = METRIC_PREFIX + name
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            cumulative = 0
+            for bound, count in zip(h.buckets + (float("inf"),), h.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{metric}_bucket{_labels(labels, ('le', le))} {cumulative}")
+            lines.append(f"{metric}_sum{_labels(labels)} {h.total}")
+            lines.append(f"{metric}_count{_labels(labels)} {h.count}")
+        for (name, labels), value in counters:
+            metric = METRIC_PREFIX + name + "_total"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels, extra=None):
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+registry = MetricsRegistry()
+_enabled = False
+_log_spans = False
+
+
+def enable(log=False):
+    """Start recording; with log=True every span is also logged as one JSON line."""
+    global _enabled, _log_spans
+    _enabled = True
+    _log_spans = log
+    if log and not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+
+
+def disable():
+    global _enabled, _log_spans
+    _enabled = False
+    _log_spans = False
+
+
+def is_enabled():
+    return _enabled
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """Times a block into the stage_seconds histogram."""
+
+    __slots__ = ("stage", "labels", "started")
+
+    def __init__(self, stage, labels):
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.started
+        labels = dict(self.labels, stage=self.stage)
+        if exc_type is not None:
+            labels["error"] = exc_type.__name__
+        registry.observe("stage_seconds", seconds, labels)
+        if _log_spans:
+            logger.info(json.dumps({"event": "span", "seconds": round(seconds, 6), **labels}, default=str))
+        return False
+
+
+def span(stage, **labels):
+    """Context manager timing one pipeline stage; a shared no-op when disabled."""
+    if not _enabled:
+        return _NOOP_SPAN
+    return Span(stage, labels)
+
+
+def observe(name, value, **labels):
+    if _enabled:
+        registry.observe(name, value, labels)
+
+
+def increment(name, amount=1, **labels):
+    if _enabled:
+        registry.increment(name, amount, labels)
+
+
+def snapshot():
+    return registry.snapshot()
+
+
+def render_prometheus():
+    return registry.render_prometheus()
+
+
+def instrument_stream(stream, stage, started=None, chars_per_token=4):
+    """Pass a model response stream through, recording time to first token,
+    chunk count and tokens per second once it ends."""
+    if not _enabled:
+        yield from stream
+        return
+    started = started if started is not None else time.perf_counter()
+    first = None
+    chunks = 0
+    chars = 0
+    tokens = None
+    for chunk in stream:
+        if first is None:
+            first = time.perf_counter()
+            registry.observe("gemini_time_to_first_token_seconds", first - started, {"stage": stage})
+        chunks += 1
+        chars += len(getattr(chunk, "text", "") or "")
+        usage = getattr(chunk, "usage_metadata", None)
+        tokens = getattr(usage, "candidates_token_count", None) or tokens
+        yield chunk
+    elapsed = time.perf_counter() - started
+    tokens = tokens or chars // chars_per_token
+    registry.observe("gemini_stream_seconds", elapsed, {"stage": stage})
+    registry.increment("gemini_chunks", chunks, {"stage": stage})
+    registry.increment("gemini_tokens", tokens, {"stage": stage})
+    if first is not None and elapsed > first - started:
+        registry.observe("gemini_tokens_per_second", tokens / (elapsed - (first - started)), {"stage": stage})
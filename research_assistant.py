@@ -1,37 +1,19 @@
 # research_assistant.py
-import streamlit as st
+"""Streamlit front end. Importing this module has no side effects; the page
+is configured and the Gemini client initialized only when main() runs."""
 import os
-import google.generativeai as genai
-import requests
-import pandas as pd
-import plotly.express as px
-from dotenv import load_dotenv
-import sqlite3
-from utilities import GEMINI_MODELS, init_session_state, encode_pdf
+import streamlit as st
+from functools import partial
+import instrumentation
+from instrumentation import span
+from utilities import GEMINI_MODELS, ALL_REGIONS, SAUDI_REGIONS, init_session_state, encode_pdf, render_stream
 from gemini_interface import get_model, analyze_pdf_content, process_query_stream
-
-# Load environment variables
-load_dotenv()
-
-# Load API Key
-API_KEY = os.getenv("GEMINI_API_KEY")
-OPENALEX_API_URL = "https://api.openalex.org/works?search="
-CROSSREF_API_URL = "https://api.crossref.org/works?query="
-SEMANTIC_SCHOLAR_API_URL = "https://api.semanticscholar.org/graph/v1/paper/search"
-
-if not API_KEY:
-    st.error("API key not found. Set GEMINI_API_KEY in a .env file or as an environment variable.")
-    st.stop()
-
-# Configure Gemini API
-genai.configure(api_key=API_KEY)
-
-# -------------------- APP CONFIGURATION --------------------
-st.set_page_config(page_title="Bibliometric Analysis - Saudi Arabia & Global", layout="wide", page_icon="chart")
+from data_fetcher import build_source_requests, fetch_all_sources, harvest_source, get_governor
+from data_processing import SOURCE_FRAMES, cached_merge_sources, display_frame, aggregate
+from archive_store import get_connection, ingest_async, search_archive, fetch_page, count_works, fetch_work_details, archive_facets, graph_is_stale, update_graph_async, most_influential, related_papers, refresh_async, last_refresh, ensure_region_index_async, region_index_building, region_institution_ids
 
 # -------------------- CUSTOM CSS --------------------
-st.markdown(
-    """
+CUSTOM_CSS = """
     <style>
         h1 {text-align: center; font-weight: bold; color: #FF9933; text-shadow: 2px 2px 4px rgba(0,0,0,0.2);}
         .stButton button {background-color: #138808; color: white; font-weight: bold; border-radius: 10px; transition: 0.3s;}
@@ -44,12 +26,14 @@ st.markdown(
             width: 50px;
         }
     </style>
-    """,
-    unsafe_allow_html=True
-)
+    """
 
-# -------------------- LANGUAGE SELECTOR --------------------
-language = st.sidebar.radio("Select Language / اختر اللغة", ["English", "العربية"])
+# -------------------- APP CONFIGURATION --------------------
+def configure_page():
+    st.set_page_config(page_title="Bibliometric Analysis - Saudi Arabia & Global", layout="wide", page_icon="chart")
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+    # -------------------- LANGUAGE SELECTOR --------------------
+    st.sidebar.radio("Select Language / اختر اللغة", ["English", "العربية"], key="language")
 
 def translate(text):
     translations = {
@@ -64,7 +48,32 @@ def translate(text):
             "upload_pdf": "Upload Research Paper (PDF)",
             "analyze_pdf": "Analyze Paper",
             "ask_question": "Ask a question about the paper",
-            "link_extraction": "Link Extraction"
+            "link_extraction": "Link Extraction",
+            "search_archive": "Search the archive",
+            "global_view": "View Global Research",
+            "harvest_all": "Harvest all result pages",
+            "max_records": "Max works per source",
+            "indexing_institutions": "The institution index for the regional view is being built; showing results for all of Saudi Arabia meanwhile.",
+            "no_region_institutions": "No institutions are indexed for {region}; showing results for all of Saudi Arabia.",
+            "fetch_failed": "No results could be fetched: {error}",
+            "archive_empty": "The archive is empty.",
+            "year": "Year",
+            "type": "Type",
+            "min_citations": "Min citations",
+            "region": "Region",
+            "any_region": "Any",
+            "archive_page": "{total} works, page {page} of {pages}",
+            "citations_refreshed": " · citation counts refreshed {date}",
+            "previous": "Previous",
+            "next": "Next",
+            "references_of": "References of: {title}",
+            "related_papers": "Related papers",
+            "no_related_papers": "No related papers in the archive.",
+            "most_influential": "Most influential in the archive",
+            "updating_graph": "The citation graph is being updated in the background; this ranking may be out of date.",
+            "diagnostics": "Diagnostics",
+            "timings_off": "Timings are not recorded. Set METRICS_LOG=1 or METRICS_PORT to record them.",
+            "no_timings": "No timings recorded yet."
         },
         "العربية": {
             "title": "مساعد البحث",
@@ -77,31 +86,46 @@ def translate(text):
             "upload_pdf": "تحميل ورقة بحثية (PDF)",
             "analyze_pdf": "تحليل الورقة",
             "ask_question": "اطرح سؤالًا عن الورقة",
-            "link_extraction": "استخراج الروابط"
+            "link_extraction": "استخراج الروابط",
+            "search_archive": "ابحث في الأرشيف",
+            "global_view": "عرض الأبحاث العالمية",
+            "harvest_all": "جلب جميع صفحات النتائج",
+            "max_records": "الحد الأقصى للأعمال لكل مصدر",
+            "indexing_institutions": "يجري بناء فهرس المؤسسات للعرض الإقليمي؛ تُعرض نتائج المملكة العربية السعودية كاملة في الأثناء.",
+            "no_region_institutions": "لا توجد مؤسسات مفهرسة في {region}؛ تُعرض نتائج المملكة العربية السعودية كاملة.",
+            "fetch_failed": "تعذر جلب النتائج: {error}",
+            "archive_empty": "الأرشيف فارغ.",
+            "year": "السنة",
+            "type": "النوع",
+            "min_citations": "الحد الأدنى للاستشهادات",
+            "region": "المنطقة",
+            "any_region": "الكل",
+            "archive_page": "{total} عمل، الصفحة {page} من {pages}",
+            "citations_refreshed": " · حُدّثت أعداد الاستشهادات في {date}",
+            "previous": "السابق",
+            "next": "التالي",
+            "references_of": "مراجع: {title}",
+            "related_papers": "أوراق ذات صلة",
+            "no_related_papers": "لا توجد أوراق ذات صلة في الأرشيف.",
+            "most_influential": "الأكثر تأثيرًا في الأرشيف",
+            "updating_graph": "يجري تحديث شبكة الاستشهادات في الخلفية؛ قد لا يكون هذا الترتيب محدّثًا.",
+            "diagnostics": "التشخيص",
+            "timings_off": "لا تُسجَّل الأزمنة. عيّن METRICS_LOG=1 أو METRICS_PORT لتسجيلها.",
+            "no_timings": "لم تُسجَّل أي أزمنة بعد."
         }
     }
-    return translations[language].get(text, text)
-
-# -------------------- DATABASE SETUP FOR ARCHIVE --------------------
-conn = sqlite3.connect("archive.db")
-c = conn.cursor()
-c.execute("""
-    CREATE TABLE IF NOT EXISTS research_archive (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        title TEXT,
-        authors TEXT,
-        institution TEXT,
-        year TEXT,
-        type TEXT,
-        citations INTEGER,
-        doi TEXT
-    )
-""")
-conn.commit()
+    return translations[st.session_state.get("language", "English")].get(text, text)
 
 # -------------------- APP MAIN FUNCTION --------------------
 def main():
-    is_arabic = language == "العربية"
+    configure_page()
+    init_instrumentation()
+    is_arabic = st.session_state.language == "العربية"
+    conn = get_connection()
+    # Citation counts of archived works are re-synced from OpenAlex at most once a day
+    refresh_async()
+    # The institution index of the regional view is built in the background when missing or stale
+    ensure_region_index_async()
     st.title("Research Assistant" if not is_arabic else "مساعد البحث")
     init_session_state()
 
@@ -119,7 +143,6 @@ def main():
             if 'model' not in st.session_state or st.session_state.model is None:
                 with st.spinner("Initializing Gemini 2.5 Flash..."):
                     try:
-                        from gemini_interface import get_model
                         st.session_state.model = get_model()
                     except Exception as e:
                         st.error(f"Model init failed: {e}")
@@ -128,11 +151,15 @@ def main():
 
             # API Request Handling
             search_query = st.text_input(translate("search"), key="search_input")
-            regions = ["All Saudi Arabia", "Riyadh", "Jeddah", "Makkah", "Madinah", "Jazan", "Eastern Province"]
+            regions = [ALL_REGIONS] + list(SAUDI_REGIONS)
             region_selected = st.selectbox(translate("region_filter"), regions)
-            global_view = st.checkbox("View Global Research")
+            global_view = st.checkbox(translate("global_view"))
+            harvest_all = st.checkbox(translate("harvest_all"))
+            max_records = st.number_input(translate("max_records"), min_value=100, max_value=100000, value=5000, step=100, disabled=not harvest_all)
             fetch_button = st.button(translate("fetch_data"))
 
+        render_diagnostics()
+
         with sidebar_tabs[1]:
             # File Upload Section
             st.subheader(translate("upload_pdf"))
@@ -146,68 +173,103 @@ def main():
                     st.session_state.notes = ""
 
                     with st.chat_message("assistant"):
-                        response_placeholder = st.empty()
-                        full_response = []
-
                         try:
-                            for chunk in analyze_pdf_content(st.session_state.model, pdf_content):
-                                full_response.append(chunk.text if hasattr(chunk, 'text') else "")
-                                response_placeholder.markdown("".join(full_response))
+                            final_response = render_stream(
+                                analyze_pdf_content(st.session_state.model, pdf_content), st.container(), stage="analyze"
+                            )
                         except Exception as e:
                             st.error(f"Analysis failed: {e}")
                             st.stop()
 
-                        final_response = "".join(full_response)
                         st.session_state.notes = final_response
                         st.session_state.messages.append({"role": "assistant", "content": final_response})
 
     # --- DATA FETCHING AND DISPLAY ---
-    if fetch_button:
-        with st.spinner("Fetching data..."):
-            openalex_url = f"https://api.openalex.org/works?search={search_query}" if global_view else f"https://api.openalex.org/works?search={search_query},countries.sa"
-            openalex_data = fetch_data(openalex_url)
-            df_open_alexs = pd.DataFrame(process_open_alexs(openalex_data))
-
-            crossref_url = f"{CROSSREF_API_URL}{search_query}"
-            crossref_data = fetch_data(crossref_url)
-            df_crossrefs = pd.DataFrame(process_crossrefs(crossref_data))
-
-            semantic_scholar_params = {'query': search_query, 'fields': 'title,authors,year,venue,citationCount,url,openAccessPdf'}
-            semantic_scholar_response = requests.get(SEMANTIC_SCHOLAR_API_URL, params=semantic_scholar_params).json()
-            semantic_df = pd.DataFrame(process_semantic_scholars(semantic_scholar_response))
-
-            if 'Citations' not in semantic_df.columns:
-                semantic_df['Citations'] = 0
-
-            df_open_alexs['Citations_OpenAlex'] = pd.to_numeric(df_open_alexs['Citations_OpenAlex'], errors='coerce').fillna(0)
-            df_crossrefs['Citations'] = pd.to_numeric(df_crossrefs['Citations'], errors='coerce').fillna(0)
-            semantic_df['Citations'] = pd.to_numeric(semantic_df['Citations'], errors='coerce').fillna(0)
-
-            combined_df = pd.concat([df_open_alexs, df_crossrefs, semantic_df], ignore_index=True)
-            combined_df['Overall_Citations'] = combined_df['Citations_OpenAlex'].fillna(combined_df['Citations'])
-            top_10_combined = combined_df.sort_values('Overall_Citations', ascending=False).head(10)
-
+    # Fetched frames are kept in session state so widget reruns (such as the
+    # archive search box) keep showing them without fetching again
+    if fetch_button or st.session_state.fetched_frames:
         tab1, tab2, tab3, tab4 = st.tabs([translate('results'), translate('visualizations'), translate('archive'), 'Consolidated Top 10'])
 
         with tab1:
             research_paper_tabs = st.tabs(['OpenAlex Results', 'CrossRef Results', 'Semantic Scholar Results'])
-            with research_paper_tabs[0]:
-                st.dataframe(df_open_alexs)
-            with research_paper_tabs[1]:
-                st.dataframe(df_crossrefs)
-            with research_paper_tabs[2]:
-                st.dataframe(semantic_df)
-
         with tab2:
-            st.subheader("OpenAlex Visualizations")
-            create_visualizations_openalex(df_open_alexs)
-            st.subheader("CrossRef Visualizations")
-            create_visualizations_crossref(df_crossrefs)
-            st.subheader("Semantic Scholar Visualizations")
-            create_visualizations_semantic_scholar(semantic_df)
+            viz_sections = {}
+            for source, label in [("merged", "All Sources"), ("openalex", "OpenAlex"), ("crossref", "CrossRef"), ("semantic_scholar", "Semantic Scholar")]:
+                st.subheader(f"{label} Visualizations")
+                viz_sections[source] = st.container()
+        result_tabs = dict(zip(["openalex", "crossref", "semantic_scholar"], research_paper_tabs))
+
+        def render_source(source, df):
+            with result_tabs[source]:
+                if df.empty:
+                    error = get_governor().status().get(source, {}).get("last_error")
+                    if error:
+                        st.warning(translate("fetch_failed").format(error=error))
+                st.dataframe(df)
+            if not df.empty:
+                with viz_sections[source], span("visualize", source=source):
+                    render_visualizations(df, source)
+
+        if fetch_button:
+            import pandas as pd
+
+            # List frames keep names with commas intact and, when harvested, carry
+            # the OpenAlex reference lists for the archive; their joined form is displayed
+            frames, list_frames = {}, {}
+            st.session_state.fingerprints = {}
+            loader = partial(harvest_source, max_records=int(max_records), as_lists=True) if harvest_all else None
+            # OpenAlex is filtered server-side by the region's institutions;
+            # Crossref and Semantic Scholar have no affiliation filter
+            institution_ids = None
+            if not global_view and region_selected != ALL_REGIONS:
+                institution_ids = region_institution_ids(conn, region_selected)
+                if not institution_ids and (ensure_region_index_async() or region_index_building()):
+                    st.info(translate("indexing_institutions"))
+                elif not institution_ids:
+                    st.warning(translate("no_region_institutions").format(region=region_selected))
+            requests = build_source_requests(search_query, global_view, institution_ids)
+            with st.spinner("Fetching data..."):
+                for source, data in fetch_all_sources(requests, loader=loader):
+                    # Harvested sources arrive as ready-built frames
+                    if isinstance(data, pd.DataFrame):
+                        list_frames[source] = data
+                    else:
+                        with span("parse", source=source):
+                            list_frames[source] = SOURCE_FRAMES[source](data, as_lists=True)
+                    frames[source] = df = display_frame(list_frames[source])
+                    # Render each source as soon as its own response arrives
+                    render_source(source, df)
+            st.session_state.fetched_frames = frames
+            with span("merge"):
+                archive_frame = cached_merge_sources(list_frames)
+            st.session_state.merged_frame = display_frame(archive_frame)
+        else:
+            frames = st.session_state.fetched_frames
+            for source, df in frames.items():
+                render_source(source, df)
+
+        # Merged once per distinct set of results; reruns reuse it (and its cached aggregates)
+        if st.session_state.get("merged_frame") is None:
+            with span("merge"):
+                st.session_state.merged_frame = cached_merge_sources(frames)
+        merged_df = st.session_state.merged_frame
+        top_10_combined = merged_df.sort_values('Overall_Citations', ascending=False).head(10)
+        if not merged_df.empty:
+            with viz_sections["merged"], span("visualize", source="merged"):
+                render_visualizations(merged_df, "merged")
+        if fetch_button:
+            # Persist every fetch in the background; the page does not wait
+            ingest_async(archive_frame)
 
         with tab3:
-            st.dataframe(pd.read_sql("SELECT * FROM research_archive", conn))
+            archive_query = st.text_input(translate("search_archive"), key="archive_query")
+            if archive_query:
+                with span("archive_search"):
+                    results = search_archive(conn, archive_query)
+                st.dataframe(results)
+            else:
+                render_influential(conn)
+                render_archive_viewer(conn)
 
         with tab4:
             st.dataframe(top_10_combined)
@@ -227,138 +289,167 @@ def main():
                 st.markdown(prompt)
 
             with st.chat_message("assistant"):
-                response_placeholder = st.empty()
-                full_response = []
-
-                for chunk in process_query_stream(
-                    st.session_state.model,
-                    st.session_state.pdf_content,
-                    st.session_state.notes or "",
-                    prompt
-                ):
-                    full_response.append(chunk.text if hasattr(chunk, 'text') else "")
-                    response_placeholder.markdown("".join(full_response))
-
-                final_response = "".join(full_response)
+                final_response = render_stream(
+                    process_query_stream(
+                        st.session_state.model,
+                        st.session_state.pdf_content,
+                        st.session_state.notes or "",
+                        prompt
+                    ),
+                    st.container(),
+                    stage="followup",
+                )
                 st.session_state.messages.append({"role": "assistant", "content": final_response})
 
-def fetch_data(url):
-    try:
-        response = requests.get(url).json()
-        return response
-    except Exception as e:
-        print(f'Error fetching data from URL:{e}')
-        return {}
-
-def process_open_alexs(data):
-    research_papers = []
-    for entry in data.get('results', []):
-        paper_doi_link = entry.get("doi", 'N/A') if entry.get("doi") else 'N/A'
-        authors_list = []
-        for authorships_entry in (entry.get("authorships") or []):
-            if "author" in authorships_entry and "display_name" in authorships_entry["author"]:
-                authors_list.append(authorships_entry["author"]["display_name"])
-            else:
-                authors_list.append("Unknown")
-        authors = ', '.join(authors_list)
-        institutions_list = []
-        for authorships_entry in (entry.get("authorships") or []):
-            if "institutions" in authorships_entry:
-                for inst in authorships_entry["institutions"]:
-                    institutions_list.append(inst.get("display_name", "Unknown"))
-            else:
-                institutions_list.append("Unknown")
-        institution = ', '.join(institutions_list)
-        paper = {
-            'Title': entry.get('title', 'N/A'),
-            'Authors': authors,
-            'Institution': institution,
-            'Year': entry.get('publication_year', "N/A"),
-            'Type': entry.get("type", "journal-article"),
-            'Citations_OpenAlex': entry.get("cited_by_count", None),
-            'DOI': paper_doi_link
-        }
-        research_papers.append(paper)
-    return research_papers
-
-def process_crossrefs(data):
-    research_papers = []
-    if 'message' in data and 'items' in data['message']:
-        for entry in data['message']['items']:
-            authors = ', '.join(f"{author.get('family', '')}, {author.get('given', '')}" for author in entry.get('author', []))
-            paper = {
-                'Title': entry.get('title', ['N/A'])[0],
-                'Authors': authors,
-                'Institution': 'N/A',
-                'Year': entry.get('published-print', {}).get('date-parts', [['N/A']])[0][0] if entry.get('published-print') else 'N/A',
-                'Type': entry.get('type', 'N/A'),
-                'Citations': entry.get('is-referenced-by-count', 0),
-                'DOI': entry.get('DOI', 'N/A')
-            }
-            research_papers.append(paper)
-    return research_papers
-
-def process_semantic_scholars(data):
-    papers = []
-    for result in data.get('data', []):
-        if result:
-            authors = ', '.join([author['name'] for author in result.get('authors', [])])
-            paper = {
-                'Title': result.get('title', 'N/A'),
-                'Authors': authors,
-                'Institution': result.get('venue', 'N/A'),
-                'Year': result.get('year', 'N/A'),
-                'Citations': result.get('citationCount', 0),
-                'url': result.get('url', 'N/A'),
-                'download_pdf': result.get('openAccessPdf', {}).get('url', 'N/A') if result.get('openAccessPdf') else 'N/A'
-            }
-            papers.append(paper)
-    return papers
-
-def create_visualizations_openalex(df):
-    yearly_publications = df.groupby('Year').size().reset_index(name='Count')
-    yearly_publications = yearly_publications[yearly_publications['Year'] != 'N/A']
-    yearly_publications['Year'] = pd.to_numeric(yearly_publications['Year'], errors='coerce')
-    yearly_publications = yearly_publications.dropna(subset=['Year']).sort_values('Year')
-    fig_yearly_publications = px.bar(yearly_publications, x='Year', y='Count', title='Yearly Publications')
-    st.plotly_chart(fig_yearly_publications)
-
-    yearly_citations = df.groupby('Year')['Citations_OpenAlex'].sum().reset_index()
-    yearly_citations = yearly_citations[yearly_citations['Year'] != 'N/A']
-    yearly_citations['Year'] = pd.to_numeric(yearly_citations['Year'], errors='coerce')
-    yearly_citations = yearly_citations.dropna(subset=['Year']).sort_values('Year')
-    fig_yearly_citations = px.line(yearly_citations, x='Year', y='Citations_OpenAlex', title='Citations Per Year')
-    st.plotly_chart(fig_yearly_citations)
-
-def create_visualizations_crossref(df):
-    yearly_publications = df.groupby('Year').size().reset_index(name='Count')
-    yearly_publications = yearly_publications[yearly_publications['Year'] != 'N/A']
-    yearly_publications['Year'] = pd.to_numeric(yearly_publications['Year'], errors='coerce')
-    yearly_publications = yearly_publications.dropna(subset=['Year']).sort_values('Year')
-    fig_yearly_publications = px.bar(yearly_publications, x='Year', y='Count', title='Yearly Publications')
-    st.plotly_chart(fig_yearly_publications)
-
-    yearly_citations = df.groupby('Year')['Citations'].sum().reset_index()
-    yearly_citations = yearly_citations[yearly_citations['Year'] != 'N/A']
-    yearly_citations['Year'] = pd.to_numeric(yearly_citations['Year'], errors='coerce')
-    yearly_citations = yearly_citations.dropna(subset=['Year']).sort_values('Year')
-    fig_yearly_citations = px.line(yearly_citations, x='Year', y='Citations', title='Citations Per Year')
-    st.plotly_chart(fig_yearly_citations)
-
-def create_visualizations_semantic_scholar(df):
-    yearly_publications = df.groupby('Year').size().reset_index(name='Count')
-    yearly_publications = yearly_publications[yearly_publications['Year'] != 'N/A']
-    yearly_publications['Year'] = pd.to_numeric(yearly_publications['Year'], errors='coerce')
-    yearly_publications = yearly_publications.dropna(subset=['Year']).sort_values('Year')
-    fig_yearly_publications = px.bar(yearly_publications, x='Year', y='Count', title='Yearly Publications')
-    st.plotly_chart(fig_yearly_publications)
-
-    yearly_citations = df.groupby('Year')['Citations'].sum().reset_index()
-    yearly_citations = yearly_citations[yearly_citations['Year'] != 'N/A']
-    yearly_citations['Year'] = pd.to_numeric(yearly_citations['Year'], errors='coerce')
-    yearly_citations = yearly_citations.dropna(subset=['Year']).sort_values('Year')
-    fig_yearly_citations = px.line(yearly_citations, x='Year', y='Citations', title='Citations Per Year')
-    st.plotly_chart(fig_yearly_citations)
+def init_instrumentation():
+    """Turn metrics on from the environment: METRICS_PORT also serves /metrics,
+    METRICS_LOG=1 writes every span as a JSON log line."""
+    port = os.getenv("METRICS_PORT")
+    if port or os.getenv("METRICS_LOG"):
+        instrumentation.enable(log=bool(os.getenv("METRICS_LOG")))
+    if port:
+        instrumentation.start_metrics_server(int(port))
+
+def render_diagnostics():
+    """Read-only sidebar panel with p50/p95 of every recorded stage.
+
+    Recording is process-wide and shared with /metrics, so it is switched on
+    from the environment (see init_instrumentation), never from a session.
+    """
+    with st.expander(translate("diagnostics")):
+        if not instrumentation.is_enabled():
+            st.caption(translate("timings_off"))
+            return
+        rows = instrumentation.snapshot()
+        if rows:
+            st.dataframe(rows, hide_index=True)
+        else:
+            st.caption(translate("no_timings"))
+
+ARCHIVE_PAGE_SIZE = 50
+
+def render_archive_viewer(conn):
+    """Paged, filtered view of the archive; reference lists load only for the selected row."""
+    facets = archive_facets(conn)
+    if not facets["works"]:
+        st.info(translate("archive_empty"))
+        return
+
+    filter_cols = st.columns(4)
+    full_years = (facets["min_year"], facets["max_year"])
+    year_range = full_years
+    with filter_cols[0]:
+        # A slider needs two distinct bounds
+        if facets["min_year"] is not None and facets["min_year"] < facets["max_year"]:
+            year_range = st.slider(translate("year"), *full_years, full_years, key="archive_years")
+    with filter_cols[1]:
+        types = st.multiselect(translate("type"), facets["types"], key="archive_types")
+    with filter_cols[2]:
+        min_citations = st.number_input(translate("min_citations"), min_value=0, value=0, step=10, key="archive_min_citations")
+    with filter_cols[3]:
+        region = st.selectbox(
+            translate("region"), [None, ALL_REGIONS] + list(SAUDI_REGIONS),
+            format_func=lambda r: translate("any_region") if r is None else r, key="archive_region",
+        )
+    # The full year range is no filter, so works without a year stay listed
+    filters = {
+        "year_range": None if tuple(year_range) == full_years else tuple(year_range),
+        "types": types,
+        "min_citations": min_citations,
+        "region": region,
+    }
+
+    # Keyset pagination: a stack of the last id seen before each visited page
+    if st.session_state.get("archive_filters") != filters:
+        st.session_state.archive_filters = filters
+        st.session_state.archive_page_starts = [0]
+    page_starts = st.session_state.archive_page_starts
+    with span("archive_page"):
+        page = fetch_page(conn, after_id=page_starts[-1], page_size=ARCHIVE_PAGE_SIZE, **filters)
+        total = count_works(conn, **filters)
+
+    refreshed = last_refresh(conn)
+    st.caption(
+        translate("archive_page").format(
+            total=total, page=len(page_starts), pages=max(1, (total + ARCHIVE_PAGE_SIZE - 1) // ARCHIVE_PAGE_SIZE)
+        )
+        + (translate("citations_refreshed").format(date=refreshed[:10]) if refreshed else "")
+    )
+    event = st.dataframe(page, on_select="rerun", selection_mode="single-row", key="archive_page")
+
+    nav_cols = st.columns(2)
+    with nav_cols[0]:
+        if st.button(translate("previous"), disabled=len(page_starts) == 1, key="archive_prev"):
+            page_starts.pop()
+            st.rerun()
+    with nav_cols[1]:
+        if st.button(translate("next"), disabled=len(page) < ARCHIVE_PAGE_SIZE, key="archive_next"):
+            page_starts.append(int(page["id"].iloc[-1]))
+            st.rerun()
+
+    if event.selection.rows:
+        work = page.iloc[event.selection.rows[0]]
+        with st.expander(translate("references_of").format(title=work["title"]), expanded=True):
+            st.json(fetch_work_details(conn, int(work["id"])))
+        st.markdown(f"**{translate('related_papers')}**")
+        related = related_papers(conn, int(work["id"]))
+        if related.empty:
+            st.caption(translate("no_related_papers"))
+        else:
+            st.dataframe(related, hide_index=True)
+
+def render_influential(conn):
+    """Archived works ranked by PageRank over the citations between them.
+
+    A stale graph is rebuilt on a background thread; the page shows the
+    last built ranking meanwhile.
+    """
+    with st.expander(translate("most_influential")):
+        if graph_is_stale(conn):
+            update_graph_async()
+            st.caption(translate("updating_graph"))
+        st.dataframe(most_influential(conn), hide_index=True)
+
+# Institution holds the venue in Semantic Scholar frames
+CATEGORY_LABELS = {"semantic_scholar": "Top Venues"}
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def build_figures(fingerprint, _aggregates, source):
+    """Plotly figures for one set of aggregates, built once per data fingerprint."""
+    import plotly.graph_objects as go
+
+    yearly = _aggregates["yearly"]
+    figures = [
+        go.Figure(go.Bar(x=yearly["Year"], y=yearly["Publications"]), layout_title_text="Yearly Publications"),
+        go.Figure(go.Scatter(x=yearly["Year"], y=yearly["Citations"], mode="lines"), layout_title_text="Citations Per Year"),
+        go.Figure(go.Scatter(x=yearly["Year"], y=yearly["H_Index"], mode="lines+markers"), layout_title_text="h-index by Publication Year"),
+    ]
+    for name, title in [("types", "Publication Types"), ("institutions", CATEGORY_LABELS.get(source, "Top Institutions")), ("sources", "Works by Source")]:
+        counts = _aggregates.get(name)
+        if counts is not None and not counts.empty:
+            figures.append(go.Figure(
+                go.Bar(x=counts["Count"][::-1], y=counts["Category"][::-1], orientation="h"), layout_title_text=title
+            ))
+    curve = _aggregates["citation_curve"]
+    figure = go.Figure(go.Scatter(x=curve["Rank"], y=curve["Citations"], mode="lines"), layout_title_text="Citation Distribution")
+    figure.update_yaxes(type="log")
+    figures.append(figure)
+    return figures
+
+def render_visualizations(df, source):
+    """Summary metrics and charts for a source frame or the merged frame."""
+    # The frames shown are never edited, so each is hashed once per fetch
+    fingerprints = st.session_state.fingerprints
+    fingerprint, aggregates = aggregate(df, fingerprints.get(source))
+    fingerprints[source] = fingerprint
+    summary = aggregates["summary"]
+    metric_cols = st.columns(4)
+    metric_cols[0].metric("Works", f"{summary['works']:,}")
+    metric_cols[1].metric("Citations", f"{summary['citations']:,}")
+    metric_cols[2].metric("h-index", summary["h_index"])
+    metric_cols[3].metric("i10-index", summary["i10_index"])
+    for i, figure in enumerate(build_figures(fingerprint, aggregates, source)):
+        st.plotly_chart(figure, key=f"{source}-chart-{i}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,6 @@
+# tests/conftest.py
+import sys
+from pathlib import Path
+
+# Tests import the packages from the repository root, as the app does
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
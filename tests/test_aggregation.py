@@ -0,0 +1,51 @@
+# tests/test_aggregation.py
+"""Chart aggregates: the cache is keyed on frame content, and the yearly and
+name-count tables come out the same whatever the column dtypes."""
+import pandas as pd
+
+from data_processing import aggregate, compute_aggregates
+
+
+def frame():
+    return pd.DataFrame({
+        "Year": pd.array([2020, 2020, 2021, None], dtype="Int64"),
+        "Citations": [12, 3, 5, 1],
+        "Type": ["article", "article", "review", "article"],
+        "Institution": ["Qatar University, King Saud University", "Qatar University", "N/A", "Qatar University"],
+    })
+
+
+def test_a_frame_edited_in_place_is_aggregated_again():
+    df = frame()
+    key, first = aggregate(df)
+
+    df.loc[0, "Citations"] = 40
+    changed, second = aggregate(df)
+
+    assert changed != key
+    assert (first["summary"]["citations"], second["summary"]["citations"]) == (21, 49)
+    # An equal copy shares the entry
+    assert aggregate(df.copy())[0] == changed
+
+
+def test_yearly_table():
+    yearly = compute_aggregates(frame())["yearly"]
+
+    assert yearly.to_dict("list") == {
+        "Year": [2020, 2021],
+        "Publications": [2, 1],
+        "Citations": [15, 5],
+        "Mean_Citations": [7.5, 5.0],
+        "H_Index": [2, 1],
+    }
+
+
+def test_joined_names_are_counted_the_same_for_categorical_columns():
+    df = frame()
+    plain = compute_aggregates(df)["institutions"]
+    categorical = compute_aggregates(df.astype({"Institution": "category"}))["institutions"]
+
+    assert plain.to_dict("list") == categorical.to_dict("list") == {
+        "Category": ["Qatar University", "King Saud University"],
+        "Count": [3, 1],
+    }
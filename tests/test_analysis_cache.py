@@ -0,0 +1,84 @@
+# tests/test_analysis_cache.py
+"""AnalysisCache: what a cached analysis is keyed on, LRU eviction under the
+size cap, and dropping analyses made with an older prompt."""
+import pytest
+
+from gemini_interface import DocumentStore, FakeDocumentBackend, FakeStreamingModel, analyze_pdf_content
+from gemini_interface import analysis_cache
+from gemini_interface.analysis_cache import AnalysisCache
+
+PDF = b"%PDF-1.4 a paper"
+
+
+class FakeClock:
+    """Clock that moves one second per reading, so every access is ordered."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        self.now += 1
+        return self.now
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(analysis_cache.time, "time", FakeClock().time)
+    return AnalysisCache(str(tmp_path / "analyses.db"))
+
+
+def analyze(model, cache, pdf=PDF):
+    documents = DocumentStore(backend=FakeDocumentBackend())
+    return "".join(chunk.text for chunk in analyze_pdf_content(model, pdf, documents=documents, cache=cache))
+
+
+def test_repeat_analysis_is_replayed_without_calling_the_model(cache):
+    model = FakeStreamingModel("a long analysis " * 100)
+
+    first = analyze(model, cache)
+    second = analyze(model, cache)
+
+    assert first == second == model.response
+    assert len(model.calls) == 1
+
+
+def test_a_different_paper_or_model_is_a_miss(cache):
+    model = FakeStreamingModel("first")
+    other = FakeStreamingModel("second")
+    other.model_name = "models/other-model"
+
+    analyze(model, cache)
+    assert analyze(other, cache) == "second"
+    assert analyze(model, cache, PDF + b" revised") == "first"
+    assert (len(model.calls), len(other.calls)) == (2, 1)
+
+
+def test_the_key_includes_the_prompt(cache):
+    cache.put("pdf", "prompt-1", "model", "notes")
+
+    assert cache.get("pdf", "prompt-1", "model") == "notes"
+    assert cache.get("pdf", "prompt-2", "model") is None
+    assert cache.get("pdf", "prompt-1", "other-model") is None
+
+
+def test_least_recently_used_analyses_are_evicted_first(cache):
+    for name in ("a", "b", "c"):
+        cache.put(name, "prompt", "model", name * 1000)
+    cache.max_bytes = cache._conn().execute("SELECT SUM(size) FROM analyses").fetchone()[0]
+    # Reading "a" makes "b" the least recently used
+    assert cache.get("a", "prompt", "model") == "a" * 1000
+
+    cache.put("d", "prompt", "model", "d" * 1000)
+
+    kept = [name for name in "abcd" if cache.get(name, "prompt", "model") is not None]
+    assert kept == ["a", "c", "d"]
+
+
+def test_invalidate_prompt_keeps_only_the_current_prompt(cache):
+    cache.put("pdf-1", "old", "model", "stale")
+    cache.put("pdf-2", "old", "model", "stale")
+    cache.put("pdf-1", "current", "model", "fresh")
+
+    assert cache.invalidate_prompt("current") == 2
+    assert cache.get("pdf-1", "current", "model") == "fresh"
+    assert cache.get("pdf-2", "old", "model") is None
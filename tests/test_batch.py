@@ -0,0 +1,118 @@
+# tests/test_batch.py
+"""Headless batch runner: resuming an interrupted run, and the JSONL and
+SQLite outputs recording the same results."""
+import json
+import sqlite3
+
+import pytest
+
+from gemini_interface import DocumentStore, FakeDocumentBackend, FakeStreamingModel, pdf_sha256, run_batch
+from gemini_interface.batch import JsonlResults, SqliteResults, open_results
+
+PAPERS = 6
+
+
+class Interrupted(Exception):
+    pass
+
+
+@pytest.fixture
+def pdfs(tmp_path):
+    folder = tmp_path / "papers"
+    folder.mkdir()
+    paths = []
+    for i in range(PAPERS):
+        path = folder / f"paper-{i}.pdf"
+        path.write_bytes(b"%%PDF-1.4 paper %d" % i)
+        paths.append(str(path))
+    return paths
+
+
+def batch(paths, output, model=None, **kwargs):
+    options = dict(concurrency=2, requests_per_minute=0, use_cache=False,
+                   documents=DocumentStore(backend=FakeDocumentBackend()))
+    options.update(kwargs)
+    return run_batch(model or FakeStreamingModel("notes"), paths, str(output), **options)
+
+
+def rows(output):
+    results = open_results(str(output))
+    try:
+        if isinstance(results, SqliteResults):
+            cursor = results.conn.execute("SELECT pdf_sha, path, status, notes, tokens FROM batch_results")
+            return [dict(zip(("pdf_sha", "path", "status", "notes", "tokens"), row)) for row in cursor]
+        with open(results.path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+    finally:
+        results.close()
+
+
+@pytest.mark.parametrize("name", ["results.jsonl", "results.db"])
+def test_rerun_resumes_an_interrupted_run(tmp_path, pdfs, name):
+    output = tmp_path / name
+
+    def stop_after_two(record, summary):
+        if summary["ok"] == 2:
+            raise Interrupted
+
+    with pytest.raises(Interrupted):
+        batch(pdfs, output, concurrency=1, on_result=stop_after_two)
+    assert len(rows(output)) == 2
+
+    model = FakeStreamingModel("notes")
+    summary = batch(pdfs, output, model=model)
+
+    assert summary["skipped"] == 2
+    assert summary["ok"] == PAPERS - 2
+    assert len(model.calls) == PAPERS - 2
+    ok = [row["pdf_sha"] for row in rows(output) if row["status"] == "ok"]
+    assert sorted(ok) == sorted(pdf_sha256(open(p, "rb").read()) for p in pdfs)
+
+
+def test_half_written_jsonl_line_is_redone(tmp_path, pdfs):
+    output = tmp_path / "results.jsonl"
+    batch(pdfs[:2], output)
+    with open(output, "a", encoding="utf-8") as f:
+        f.write('{"pdf_sha": "abc", "status": "o')
+
+    assert len(JsonlResults(str(output)).completed()) == 2
+    summary = batch(pdfs, output)
+    assert (summary["skipped"], summary["ok"]) == (2, PAPERS - 2)
+
+
+def test_failed_papers_are_retried_and_replaced_in_sqlite(tmp_path, pdfs):
+    output = tmp_path / "results.db"
+
+    class FailingModel(FakeStreamingModel):
+        def generate_content(self, contents, stream=False, **kwargs):
+            raise RuntimeError("quota exceeded")
+
+    first = batch(pdfs, output, model=FailingModel())
+    assert first["failed"] == PAPERS
+    second = batch(pdfs, output)
+
+    assert second["ok"] == PAPERS
+    # One row per paper: the retry replaced the failure
+    conn = sqlite3.connect(output)
+    assert conn.execute("SELECT COUNT(*), COUNT(DISTINCT pdf_sha) FROM batch_results").fetchone() == (PAPERS, PAPERS)
+    assert conn.execute("SELECT COUNT(*) FROM batch_results WHERE status = 'ok'").fetchone()[0] == PAPERS
+    conn.close()
+
+
+def test_jsonl_and_sqlite_record_the_same_results(tmp_path, pdfs):
+    # A duplicate path and a missing file exercise the skip and error records too
+    paths = pdfs + [pdfs[0], str(tmp_path / "missing.pdf")]
+    summaries = {}
+    for name in ("results.jsonl", "results.db"):
+        summaries[name] = batch(paths, tmp_path / name, model=FakeStreamingModel("same notes " * 10))
+
+    for key in ("total", "skipped", "ok", "failed", "tokens"):
+        assert summaries["results.jsonl"][key] == summaries["results.db"][key]
+
+    def key(row):
+        return row["pdf_sha"], row["path"], row["status"], row["notes"], row["tokens"]
+
+    jsonl = sorted(map(key, rows(tmp_path / "results.jsonl")))
+    sqlite = sorted(map(key, rows(tmp_path / "results.db")))
+    assert jsonl == sqlite
+    assert len(jsonl) == PAPERS + 1
@@ -0,0 +1,21 @@
+# tests/test_cache.py
+"""normalize_request: parameter order and name case do not split the cache,
+while values are kept exactly as sent."""
+from data_fetcher.cache import cache_key, normalize_request
+
+URL = "https://api.openalex.org/works"
+
+
+def test_parameter_order_and_name_case_share_a_key():
+    assert cache_key(URL, {"search": "solar", "per-page": 200}) == cache_key(URL, {"Per-Page": 200, "search": "solar"})
+    assert cache_key("https://API.openalex.org/works/", {"search": "solar"}) == cache_key(URL, {"search": "solar"})
+
+
+def test_values_are_kept_byte_exact():
+    assert cache_key(URL, {"search": "solar  cells"}) != cache_key(URL, {"search": "solar cells"})
+    assert cache_key(URL, {"search": " solar"}) != cache_key(URL, {"search": "solar"})
+    assert cache_key(URL, {"search": "Solar"}) != cache_key(URL, {"search": "solar"})
+
+
+def test_repeated_parameters_keep_their_order():
+    assert normalize_request(URL + "?filter=b&filter=a") == URL + "?filter=b&filter=a"
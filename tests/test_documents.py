@@ -0,0 +1,114 @@
+# tests/test_documents.py
+"""DocumentStore: one upload per distinct PDF under concurrency, and the
+short-lived inline fallback when the upload fails."""
+import threading
+import time
+
+import pytest
+
+from gemini_interface import DocumentStore, FakeDocumentBackend, InlineBackend
+from gemini_interface import documents
+
+PDF = b"%PDF-1.4 a paper"
+
+
+class SlowBackend(FakeDocumentBackend):
+    """Upload that takes long enough for every caller to arrive while it runs."""
+
+    def upload(self, data, digest):
+        time.sleep(0.2)
+        return super().upload(data, digest)
+
+
+class FailingBackend(FakeDocumentBackend):
+    def upload(self, data, digest):
+        self.uploads += 1
+        raise RuntimeError("Files API unavailable")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(documents.time, "time", fake.time)
+    return fake
+
+
+def test_concurrent_gets_upload_once():
+    backend = SlowBackend()
+    store = DocumentStore(backend=backend)
+    handles = []
+    start = threading.Barrier(8)
+
+    def get():
+        start.wait()
+        handles.append(store.get(PDF))
+
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert backend.uploads == 1
+    assert len(handles) == 8
+    assert all(handle is handles[0] for handle in handles)
+
+
+def test_each_distinct_pdf_is_uploaded_once():
+    backend = FakeDocumentBackend()
+    store = DocumentStore(backend=backend)
+
+    first = store.get(PDF)
+    # The base64 form kept in session state is the same document
+    assert store.get(documents.base64.b64encode(PDF).decode()) is first
+    other = store.get(PDF + b" revised")
+
+    assert backend.uploads == 2
+    assert other.digest != first.digest
+
+
+def test_failed_upload_falls_back_inline_for_a_minute(clock):
+    backend = FailingBackend()
+    store = DocumentStore(backend=backend)
+
+    handle = store.get(PDF)
+
+    assert isinstance(handle.backend, InlineBackend)
+    assert handle.part["mime_type"] == documents.PDF_MIME_TYPE
+    assert handle.expires_at == clock.now + 60
+    assert store.get(PDF) is handle
+    assert backend.uploads == 1
+
+    # Once the inline handle lapses, the upload is tried again
+    clock.now += 60
+    store.get(PDF)
+    assert backend.uploads == 2
+
+
+def test_purge_expired_releases_through_the_creating_backend(clock):
+    backend = FakeDocumentBackend()
+    fallback = FakeDocumentBackend()
+    store = DocumentStore(backend=backend, ttl=3600, fallback=fallback)
+    uploaded = store.get(PDF)
+
+    store.backend = FailingBackend()
+    inline = store.get(PDF + b" revised")
+    assert inline.backend is fallback
+
+    assert store.purge_expired() == 0
+    clock.now += 60
+    assert store.purge_expired() == 1
+    assert (fallback.deleted, backend.deleted) == (1, 0)
+
+    clock.now += 3600
+    assert store.purge_expired() == 1
+    assert backend.deleted == 1
+    assert store.get(PDF) is not uploaded
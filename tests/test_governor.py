@@ -0,0 +1,159 @@
+# tests/test_governor.py
+"""RequestGovernor against the local stub API server: Retry-After handling,
+the circuit breaker's open and half-open states, and request coalescing."""
+import threading
+
+import pytest
+import requests
+
+from benchmarks.stub_server import StubAPIServer
+from data_fetcher import CircuitOpenError, FetchError, RequestGovernor
+
+PAGES = [{"results": [{"id": "https://openalex.org/W1"}], "meta": {}}]
+
+
+class FakeTime:
+    """Clock whose sleep() only advances it, recording every wait."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def stub():
+    with StubAPIServer({"openalex": PAGES}) as server:
+        yield server
+
+
+def make_governor(stub, fake=None, **kwargs):
+    host = stub.base_url.split("://", 1)[1]
+    options = dict(session=requests.Session(), limits={"stub": (0, 1)}, hosts={host: "stub"}, rng=lambda: 0.0)
+    if fake is not None:
+        options.update(clock=fake.clock, sleep=fake.sleep)
+    options.update(kwargs)
+    return RequestGovernor(**options)
+
+
+def test_retry_after_is_waited_then_retried(stub):
+    fake = FakeTime()
+    governor = make_governor(stub, fake)
+    stub.script("openalex", (429, {"Retry-After": "2"}))
+
+    data = governor.get_json(stub.url_for("openalex"))
+
+    assert data["results"][0]["id"] == "https://openalex.org/W1"
+    assert stub.requests == 2
+    assert sum(fake.sleeps) == pytest.approx(2.0)
+
+
+def test_long_retry_after_fails_at_once(stub):
+    fake = FakeTime()
+    governor = make_governor(stub, fake, max_retry_after=30.0)
+    stub.script("openalex", (503, {"Retry-After": "3600"}))
+
+    with pytest.raises(FetchError, match="retry after 3600s"):
+        governor.get_json(stub.url_for("openalex"))
+
+    assert stub.requests == 1
+    assert fake.sleeps == []
+    # The source is held back by the cap, not by the hour the server asked for
+    bucket = governor.source("stub").bucket
+    assert bucket.blocked_until - fake.now == pytest.approx(30.0)
+
+
+def test_breaker_opens_and_recovers_through_half_open(stub):
+    fake = FakeTime()
+    governor = make_governor(stub, fake, max_retries=0)
+    breaker = governor.source("stub").breaker
+    breaker.threshold, breaker.reset_after = 2, 60.0
+    url = stub.url_for("openalex")
+    stub.script("openalex", 503, 503)
+
+    for _ in range(2):
+        with pytest.raises(FetchError):
+            governor.get_json(url)
+    assert breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        governor.get_json(url)
+    assert stub.requests == 2
+
+    fake.now += 60.0
+    assert breaker.state == "half-open"
+    assert governor.get_json(url)["results"]
+    assert breaker.state == "closed"
+    assert stub.requests == 3
+
+
+def test_failed_half_open_trial_reopens(stub):
+    fake = FakeTime()
+    governor = make_governor(stub, fake, max_retries=0)
+    breaker = governor.source("stub").breaker
+    breaker.threshold, breaker.reset_after = 1, 60.0
+    url = stub.url_for("openalex")
+    stub.script("openalex", 503, 503)
+
+    with pytest.raises(FetchError):
+        governor.get_json(url)
+    fake.now += 60.0
+    with pytest.raises(FetchError):
+        governor.get_json(url)
+
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        governor.get_json(url)
+    assert stub.requests == 2
+
+
+def test_identical_concurrent_requests_are_coalesced(stub):
+    stub.latency = 0.3
+    governor = make_governor(stub)
+    url = stub.url_for("openalex")
+    results = []
+
+    def fetch():
+        results.append(governor.get_json(url, {"search": "solar"}))
+
+    threads = [threading.Thread(target=fetch) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 5
+    assert all(r == results[0] for r in results)
+    assert stub.requests == 1
+
+
+def test_retries_count_as_one_breaker_failure(stub):
+    fake = FakeTime()
+    governor = make_governor(stub, fake, max_retries=2)
+    breaker = governor.source("stub").breaker
+    breaker.threshold = 2
+    stub.script("openalex", 503, 503, 503)
+
+    with pytest.raises(FetchError, match="after 3 attempts"):
+        governor.get_json(stub.url_for("openalex"))
+
+    assert stub.requests == 3
+    assert (breaker.failures, breaker.state) == (1, "closed")
+
+
+def test_client_error_is_reported_without_tripping_the_breaker(stub):
+    governor = make_governor(stub, FakeTime())
+    stub.script("openalex", 404)
+
+    with pytest.raises(FetchError, match="HTTP 404"):
+        governor.get_json(stub.url_for("openalex"))
+
+    status = governor.status()["stub"]
+    assert (status["circuit"], status["failures"], status["last_error"]) == ("closed", 0, "HTTP 404")
+    assert stub.requests == 1
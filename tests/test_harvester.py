@@ -0,0 +1,26 @@
+# tests/test_harvester.py
+"""Page iterators: trimming to max_records never edits the fetched page,
+which the request governor may have handed to several callers."""
+from data_fetcher import iter_crossref_pages, iter_openalex_pages
+
+
+def serve(page):
+    return lambda url, params, timeout: page
+
+
+def test_openalex_pages_are_trimmed_on_a_copy():
+    page = {"results": [{"id": f"https://openalex.org/W{i}"} for i in range(5)], "meta": {"next_cursor": "next"}}
+
+    pages = list(iter_openalex_pages({}, max_records=3, fetch=serve(page)))
+
+    assert [len(p["results"]) for p in pages] == [3]
+    assert len(page["results"]) == 5
+
+
+def test_crossref_pages_are_trimmed_on_a_copy():
+    page = {"message": {"items": [{"DOI": f"10.1000/{i}"} for i in range(5)], "next-cursor": "next"}}
+
+    pages = list(iter_crossref_pages({}, max_records=2, fetch=serve(page)))
+
+    assert [len(p["message"]["items"]) for p in pages] == [2]
+    assert len(page["message"]["items"]) == 5
@@ -0,0 +1,124 @@
+# tests/test_refresh.py
+"""Citation refresh against a fake OpenAlex: last-synced watermarks, the
+from_updated_date filter, and writing only the counts that changed."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from archive_store import connect, due_works, graph_is_stale, insert_works, last_refresh, refresh_archive, update_graph
+from archive_store.storage import _initialized
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+DAY = 24 * 3600
+
+
+class FakeOpenAlex:
+    """fetch() that answers filtered lookups from a dict of works, recording each request."""
+
+    def __init__(self, works):
+        self.works = works
+        self.requests = []
+        self.fail = False
+
+    def __call__(self, url, params, timeout):
+        self.requests.append(params)
+        if self.fail:
+            raise ConnectionError("OpenAlex unreachable")
+        terms = params["filter"].split(",")[0].split(":", 1)[1].split("|")
+        results = [
+            work for work in self.works.values()
+            if work["id"].rsplit("/", 1)[1] in terms or work["doi"].split("doi.org/")[1] in terms
+        ]
+        return {"results": results, "meta": {"count": len(results)}}
+
+
+def openalex_work(number, citations):
+    return {
+        "id": f"https://openalex.org/W{number}",
+        "doi": f"https://doi.org/10.1000/{number}",
+        "cited_by_count": citations,
+        "updated_date": "2026-02-20T00:00:00",
+    }
+
+
+@pytest.fixture
+def conn(tmp_path):
+    path = str(tmp_path / "archive.db")
+    conn = connect(path)
+    with conn:
+        insert_works(conn, [
+            dict(title=f"Paper {n}", citations=10, doi=f"https://doi.org/10.1000/{n}",
+                 openalex_id=None if n == 4 else n, authors=[], institution=[], topics="")
+            for n in range(1, 5)
+        ])
+        # Written by every UPDATE of a works row
+        conn.execute("CREATE TEMP TABLE updated (work_id INTEGER)")
+        conn.execute(
+            "CREATE TEMP TRIGGER log_update AFTER UPDATE ON works BEGIN "
+            "INSERT INTO updated VALUES (new.work_id); END"
+        )
+    update_graph(conn)
+    yield conn
+    conn.close()
+    _initialized.discard(path)
+
+
+@pytest.fixture
+def openalex():
+    # Works 1 and 3 gained citations; work 4 is only known by DOI
+    return FakeOpenAlex({n: openalex_work(n, c) for n, c in ((1, 15), (2, 10), (3, 12), (4, 10))})
+
+
+def refresh(conn, fetch, now=NOW, **kwargs):
+    options = dict(batch_size=2, stale_after=7 * DAY, use_updated_since=False, now=now)
+    options.update(kwargs)
+    return refresh_archive(conn, fetch, **options)
+
+
+def test_only_changed_counts_are_written(conn, openalex):
+    summary = refresh(conn, openalex)
+
+    assert (summary["requests"], summary["checked"], summary["updated"], summary["due"]) == (3, 4, 3, 0)
+    assert summary["error"] is None
+    # Work 2 kept its count and was never rewritten; work 4 gained its OpenAlex id
+    assert sorted(w for (w,) in conn.execute("SELECT work_id FROM updated")) == [1, 3, 4]
+    assert conn.execute("SELECT citations, openalex_id FROM works ORDER BY work_id").fetchall() == [
+        (15, 1), (10, 2), (12, 3), (10, 4),
+    ]
+    assert graph_is_stale(conn)
+    assert last_refresh(conn) == "2026-03-01T12:00:00"
+
+
+def test_synced_works_wait_for_their_watermark_to_go_stale(conn, openalex):
+    refresh(conn, openalex)
+    openalex.requests.clear()
+
+    assert refresh(conn, openalex, now=NOW + timedelta(days=6))["checked"] == 0
+    assert openalex.requests == []
+    assert due_works(conn, 7 * DAY, now=NOW + timedelta(days=6)) == []
+
+    later = refresh(conn, openalex, now=NOW + timedelta(days=8))
+    assert later["checked"] == 4
+    synced = conn.execute("SELECT DISTINCT synced_at, updated_date FROM work_sync").fetchall()
+    assert synced == [("2026-03-09T12:00:00", "2026-02-20T00:00:00")]
+
+
+def test_updated_since_filter_starts_at_the_oldest_watermark(conn, openalex):
+    first = refresh(conn, openalex, use_updated_since=True)
+    assert all("from_updated_date" not in params["filter"] for params in openalex.requests)
+
+    openalex.requests.clear()
+    refresh(conn, openalex, now=NOW + timedelta(days=8), use_updated_since=True)
+    assert first["checked"] == 4
+    assert all(params["filter"].endswith(",from_updated_date:2026-03-01") for params in openalex.requests)
+
+
+def test_a_failed_request_stops_the_run_and_leaves_the_batch_due(conn, openalex):
+    openalex.fail = True
+
+    summary = refresh(conn, openalex)
+
+    assert summary["error"] == "ConnectionError: OpenAlex unreachable"
+    assert (summary["requests"], summary["checked"], summary["due"]) == (0, 0, 4)
+    assert conn.execute("SELECT COUNT(*) FROM updated").fetchone()[0] == 0
+    assert conn.execute("SELECT error FROM refresh_runs").fetchall() == [(summary["error"],)]
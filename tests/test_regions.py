@@ -0,0 +1,146 @@
+# tests/test_regions.py
+"""Regional view: archived institutions are matched to the region index by
+OpenAlex id, and the index is built on a background thread."""
+import sqlite3
+
+import pytest
+
+from archive_store import archive_records, connect, count_works, ensure_region_index_async, upsert_works
+from archive_store import regions
+from archive_store.storage import _initialized
+from data_processing import merge_sources, openalex_frame
+
+RIYADH = {"latitude": 24.71, "longitude": 46.68}
+JEDDAH = {"latitude": 21.54, "longitude": 39.17}
+
+
+def authorship(name, number):
+    return {
+        "author": {"display_name": f"Author of {name}"},
+        "institutions": [{
+            "id": f"https://openalex.org/I{number}", "ror": f"https://ror.org/0{number}", "display_name": name,
+        }],
+    }
+
+
+def openalex_work(number, *authorships):
+    return {
+        "id": f"https://openalex.org/W{number}",
+        "doi": f"https://doi.org/10.1000/{number}",
+        "title": f"Paper {number}",
+        "publication_year": 2022,
+        "cited_by_count": number,
+        "authorships": list(authorships),
+    }
+
+
+def institutions_page(*institutions):
+    return {
+        "results": [
+            {"id": f"https://openalex.org/I{number}", "display_name": name, "geo": geo, "works_count": 10}
+            for number, name, geo in institutions
+        ],
+        "meta": {"next_cursor": None},
+    }
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "archive.db")
+    yield path
+    _initialized.discard(path)
+
+
+def archive(conn, *works):
+    frame = merge_sources({"openalex": openalex_frame({"results": list(works)}, as_lists=True)})
+    upsert_works(conn, archive_records(frame))
+
+
+def test_works_are_placed_by_institution_id_not_name(path):
+    conn = connect(path)
+    # Two different institutions share a display name; only I1 is in Riyadh
+    archive(
+        conn,
+        openalex_work(1, authorship("College of Science", 1)),
+        openalex_work(2, authorship("College of Science", 2)),
+        openalex_work(3, authorship("King Abdulaziz University", 3)),
+    )
+    regions.build_region_index(conn, fetch=lambda url, params, timeout: institutions_page(
+        (1, "College of Science", RIYADH), (3, "King Abdulaziz University", JEDDAH),
+    ))
+
+    assert conn.execute("SELECT openalex_id, ror FROM institutions WHERE name = 'College of Science'").fetchone() == (
+        1, "https://ror.org/01",
+    )
+    assert count_works(conn, region="Riyadh") == 1
+    assert count_works(conn, region="Jeddah") == 1
+    assert count_works(conn, region="All Saudi Arabia") == 2
+    conn.close()
+
+
+def test_institutions_archived_without_ids_are_identified_by_a_later_ingest(path):
+    conn = connect(path)
+    upsert_works(conn, [{
+        "title": "Paper 1", "authors": ["A"], "institution": ["King Saud University"], "year": 2022,
+        "citations": 1, "doi": "https://doi.org/10.1000/1", "openalex_id": 1, "topics": "",
+    }])
+    regions.build_region_index(conn, fetch=lambda url, params, timeout: institutions_page(
+        (7, "King Saud University", RIYADH),
+    ))
+    assert count_works(conn, region="Riyadh") == 0
+
+    archive(conn, openalex_work(1, authorship("King Saud University", 7)))
+
+    assert count_works(conn, region="Riyadh") == 1
+    conn.close()
+
+
+def test_archives_from_before_institution_ids_are_upgraded(path):
+    old = sqlite3.connect(path)
+    old.execute("CREATE TABLE institutions (institution_id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)")
+    old.execute("INSERT INTO institutions (name) VALUES ('King Saud University')")
+    old.commit()
+    old.close()
+
+    conn = connect(path)
+
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(institutions)")}
+    assert {"openalex_id", "ror"} <= columns
+    assert conn.execute("SELECT name, openalex_id FROM institutions").fetchall() == [("King Saud University", None)]
+    conn.close()
+
+
+def test_region_index_is_built_in_the_background(path, monkeypatch):
+    monkeypatch.setattr(regions, "_index_failed_at", None)
+    connect(path).close()
+
+    def fetch(url, params, timeout):
+        # The build is still running while the caller carries on
+        assert regions.region_index_building()
+        return institutions_page((1, "College of Science", RIYADH))
+
+    assert ensure_region_index_async(path, fetch=fetch)
+    regions._index_thread.join()
+
+    assert not regions.region_index_building()
+    conn = connect(path)
+    assert regions.region_institution_ids(conn, "Riyadh") == [1]
+    conn.close()
+    # A fresh index is not rebuilt
+    assert not ensure_region_index_async(path, fetch=fetch)
+
+
+def test_failed_background_build_is_not_retried_at_once(path, monkeypatch):
+    monkeypatch.setattr(regions, "_index_failed_at", None)
+    connect(path).close()
+    calls = []
+
+    def fetch(url, params, timeout):
+        calls.append(params)
+        raise ConnectionError("OpenAlex unreachable")
+
+    assert ensure_region_index_async(path, fetch=fetch)
+    regions._index_thread.join()
+
+    assert not ensure_region_index_async(path, fetch=fetch)
+    assert len(calls) == 1
@@ -0,0 +1,79 @@
+# tests/test_search.py
+"""Archive full-text search: the FTS index kept in step by insert_works,
+BM25 ranking, prefix queries and Arabic spelling folding."""
+import pytest
+
+from archive_store import connect, insert_works, search_archive
+from archive_store.storage import _initialized
+
+
+def work(title, authors=(), institution=(), topics="", **fields):
+    return dict(title=title, authors=list(authors), institution=list(institution), topics=topics, **fields)
+
+
+@pytest.fixture
+def conn(tmp_path):
+    path = str(tmp_path / "archive.db")
+    conn = connect(path)
+    yield conn
+    conn.close()
+    _initialized.discard(path)
+
+
+def archive(conn, *records):
+    with conn:
+        return insert_works(conn, records)
+
+
+def titles(conn, text):
+    return search_archive(conn, text)["title"].tolist()
+
+
+def test_inserted_works_are_searchable_at_once(conn):
+    assert titles(conn, "desalination") == []
+    archive(conn, work("Solar desalination in arid regions", authors=["Amal Haddad"]))
+
+    assert titles(conn, "desalination") == ["Solar desalination in arid regions"]
+    assert titles(conn, "haddad") == ["Solar desalination in arid regions"]
+    indexed = conn.execute("SELECT COUNT(*) FROM works_fts").fetchone()[0]
+    assert indexed == conn.execute("SELECT COUNT(*) FROM works").fetchone()[0]
+
+
+def test_title_matches_rank_above_author_institution_and_topic_matches(conn):
+    archive(
+        conn,
+        work("Groundwater recharge", topics="Membrane desalination"),
+        work("Brine disposal", institution=["Desalination Research Institute"]),
+        work("Desalination plant efficiency"),
+        work("Coastal aquifers", authors=["Desalination Smith"]),
+    )
+
+    result = search_archive(conn, "desalination")
+    assert result["title"].tolist() == [
+        "Desalination plant efficiency",
+        "Coastal aquifers",
+        "Brine disposal",
+        "Groundwater recharge",
+    ]
+    assert result["score"].is_monotonic_decreasing
+
+
+def test_every_term_is_a_prefix(conn):
+    archive(conn, work("Photovoltaic panels in desert climates"), work("Wind turbines"))
+
+    assert titles(conn, "photo") == ["Photovoltaic panels in desert climates"]
+    assert titles(conn, "photo des") == ["Photovoltaic panels in desert climates"]
+    assert titles(conn, "photo wind") == []
+    assert titles(conn, "  ,; ") == []
+
+
+@pytest.mark.parametrize("query", [
+    "الطاقه الشمسيه",  # ha for ta marbuta
+    "إدارة",  # alef with hamza below
+    "على",  # alef maqsura
+    "الطّاقة",  # shadda
+])
+def test_arabic_spelling_variants_match(conn, query):
+    archive(conn, work("أدارة الطاقة الشمسية علي المدى الطويل"))
+
+    assert titles(conn, query) == ["أدارة الطاقة الشمسية علي المدى الطويل"]
@@ -0,0 +1,89 @@
+# tests/test_storage.py
+"""upsert_works: re-ingesting the same results is idempotent, and matched
+works only fill in what the archive was missing."""
+import pandas as pd
+import pytest
+
+from archive_store import archive_records, connect, graph_is_stale, update_graph, upsert_works
+from archive_store.storage import _initialized
+
+TABLES = ("works", "work_authors", "work_institutions", "work_references", "work_related", "works_fts")
+
+
+def record(number, citations=10, **fields):
+    values = dict(
+        title=f"Paper {number}",
+        authors=[f"Author {number}", "Shared Author"],
+        institution=["Qatar University"],
+        year=2020,
+        type="article",
+        citations=citations,
+        doi=f"https://doi.org/10.1000/{number}",
+        openalex_id=number,
+        topics="",
+        related_works=[f"https://openalex.org/W{number + 100}"],
+        referenced_works=[f"https://openalex.org/W{n}" for n in range(1, number)],
+    )
+    values.update(fields)
+    return values
+
+
+@pytest.fixture
+def conn(tmp_path):
+    path = str(tmp_path / "archive.db")
+    conn = connect(path)
+    yield conn
+    conn.close()
+    _initialized.discard(path)
+
+
+def snapshot(conn):
+    counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in TABLES}
+    works = conn.execute("SELECT * FROM works ORDER BY work_id").fetchall()
+    return counts, works
+
+
+def test_upserting_the_same_records_twice_changes_nothing(conn):
+    records = [record(n) for n in range(1, 6)]
+
+    assert upsert_works(conn, records) == (5, 0)
+    update_graph(conn)
+    before = snapshot(conn)
+
+    assert upsert_works(conn, records) == (0, 5)
+    assert snapshot(conn) == before
+    assert not graph_is_stale(conn)
+
+
+def test_later_records_for_the_same_work_win_within_a_batch(conn):
+    inserted, _ = upsert_works(conn, [record(1, citations=3), record(1, citations=7)])
+
+    assert inserted == 1
+    assert conn.execute("SELECT citations FROM works").fetchall() == [(7,)]
+
+
+def test_matches_refresh_counts_and_fill_missing_identifiers(conn):
+    upsert_works(conn, [record(1, doi=None), record(2, openalex_id=None, referenced_works=None)])
+    update_graph(conn)
+
+    # Matched on OpenAlex id and on DOI respectively
+    assert upsert_works(conn, [record(1, citations=11), record(2, citations=12)]) == (0, 2)
+
+    rows = conn.execute("SELECT openalex_id, doi, citations, referenced_count FROM works ORDER BY work_id").fetchall()
+    assert rows == [
+        (1, "https://doi.org/10.1000/1", 11, 0),
+        (2, "https://doi.org/10.1000/2", 12, 1),
+    ]
+    # A new OpenAlex id and a filled reference list both change the graph's inputs
+    assert graph_is_stale(conn)
+
+
+def test_rows_without_identifiers_are_never_upserted(conn):
+    frame = pd.DataFrame([
+        {"Title": "Kept", "DOI": "10.1000/X", "OpenAlex_ID": "N/A", "Year": 2021, "Citations": 4},
+        {"Title": "Dropped", "DOI": "N/A", "OpenAlex_ID": "N/A", "Year": 2021, "Citations": 4},
+    ])
+
+    records = archive_records(frame)
+    assert [r["title"] for r in records] == ["Kept"]
+    assert records[0]["doi"] == "https://doi.org/10.1000/x"
@@ -1,2 +1,45 @@
-from .constants import GEMINI_MODELS
+from .constants import (
+    GEMINI_MODELS,
+    OPENALEX_API_URL,
+    OPENALEX_INSTITUTIONS_URL,
+    CROSSREF_API_URL,
+    SEMANTIC_SCHOLAR_API_URL,
+    SOURCE_TIMEOUTS,
+    HTTP_CACHE_PATH,
+    HTTP_CACHE_MAX_BYTES,
+    SOURCE_CACHE_TTLS,
+    DEFAULT_CACHE_TTL,
+    CACHE_STALE_WINDOW,
+    OPENALEX_MAX_PER_PAGE,
+    CROSSREF_MAX_ROWS,
+    OPENALEX_SELECT_FIELDS,
+    OPENALEX_ARCHIVE_SELECT_FIELDS,
+    CROSSREF_SELECT_FIELDS,
+    REGION_COUNTRY,
+    ALL_REGIONS,
+    SAUDI_REGIONS,
+    REGION_RADIUS_KM,
+    REGION_INDEX_MAX_AGE,
+    REGION_INDEX_RETRY_AFTER,
+    REGION_MAX_INSTITUTIONS,
+    ARCHIVE_DB_PATH,
+    ARCHIVE_INGEST_BATCH_SIZE,
+    ARCHIVE_REFRESH_BATCH_SIZE,
+    ARCHIVE_REFRESH_STALE_AFTER,
+    ARCHIVE_REFRESH_MAX_REQUESTS,
+    ARCHIVE_REFRESH_EVERY,
+    ANALYSIS_CACHE_PATH,
+    ANALYSIS_CACHE_MAX_BYTES,
+    BATCH_CONCURRENCY,
+    BATCH_REQUESTS_PER_MINUTE,
+    SOURCE_RATE_LIMITS,
+    DEFAULT_RATE_LIMIT,
+    FETCH_MAX_RETRIES,
+    FETCH_BACKOFF_BASE,
+    FETCH_BACKOFF_CAP,
+    FETCH_MAX_RETRY_AFTER,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_SECONDS,
+)
 from .helper import encode_pdf, init_session_state
+from .streaming import StreamRenderer, render_stream
@@ -3,3 +3,96 @@ GEMINI_MODELS = {
     "Gemini 2.5 Flash": "gemini-2.5-flash",
     "Gemini 2.5 Pro": "gemini-2.5-pro",
 }
+
+# Bibliometric source endpoints
+OPENALEX_API_URL = "https://api.openalex.org/works"
+OPENALEX_INSTITUTIONS_URL = "https://api.openalex.org/institutions"
+CROSSREF_API_URL = "https://api.crossref.org/works"
+SEMANTIC_SCHOLAR_API_URL = "https://api.semanticscholar.org/graph/v1/paper/search"
+
+# Per-source request timeouts in seconds: (connect, read)
+SOURCE_TIMEOUTS = {
+    "openalex": (3.05, 15),
+    "crossref": (3.05, 20),
+    "semantic_scholar": (3.05, 15),
+}
+
+# On-disk HTTP response cache, kept next to archive.db
+HTTP_CACHE_PATH = "http_cache.db"
+HTTP_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Seconds a cached response is served as fresh, per source
+SOURCE_CACHE_TTLS = {
+    "openalex": 6 * 3600,
+    "crossref": 12 * 3600,
+    "semantic_scholar": 6 * 3600,
+}
+DEFAULT_CACHE_TTL = 3600
+# Extra seconds a stale entry may be served while it is refreshed in the background
+CACHE_STALE_WINDOW = 7 * 24 * 3600
+
+# Deep-paging limits and field projections used by the harvester
+OPENALEX_MAX_PER_PAGE = 200
+CROSSREF_MAX_ROWS = 1000
+OPENALEX_SELECT_FIELDS = "id,doi,title,publication_year,type,cited_by_count,authorships"
+# Harvests also fetch the reference lists that feed the archive's citation graph
+OPENALEX_ARCHIVE_SELECT_FIELDS = OPENALEX_SELECT_FIELDS + ",referenced_works,related_works"
+CROSSREF_SELECT_FIELDS = "DOI,title,author,published-print,type,is-referenced-by-count"
+
+# Regional view: institutions of REGION_COUNTRY are indexed locally and
+# assigned to a region by city name, else by the nearest region centre
+# within REGION_RADIUS_KM. Makkah covers Makkah Province apart from Jeddah.
+REGION_COUNTRY = "sa"
+ALL_REGIONS = "All Saudi Arabia"
+SAUDI_REGIONS = {
+    # region: ((latitude, longitude), city names as OpenAlex spells them, lower case)
+    "Riyadh": ((24.71, 46.68), ("riyadh", "ar riyad", "al kharj", "diriyah", "ad diriyah")),
+    "Jeddah": ((21.54, 39.17), ("jeddah", "jiddah", "thuwal", "rabigh")),
+    "Makkah": ((21.39, 39.86), ("mecca", "makkah", "makkah al mukarramah", "taif", "at taif")),
+    "Madinah": ((24.47, 39.61), ("medina", "madinah", "al madinah", "yanbu")),
+    "Jazan": ((16.89, 42.55), ("jazan", "jizan", "gizan", "sabya", "abu arish")),
+    "Eastern Province": ((26.39, 50.10), ("dammam", "dhahran", "khobar", "al khobar", "hofuf", "al hofuf",
+                                          "al ahsa", "al-ahsa", "jubail", "al jubail", "qatif", "al qatif")),
+}
+REGION_RADIUS_KM = 150
+REGION_INDEX_MAX_AGE = 30 * 24 * 3600
+# Wait before trying again after a failed background index build
+REGION_INDEX_RETRY_AFTER = 15 * 60
+# OpenAlex ORs at most 100 values in one filter
+REGION_MAX_INSTITUTIONS = 100
+
+# Local research archive
+ARCHIVE_DB_PATH = "archive.db"
+ARCHIVE_INGEST_BATCH_SIZE = 500
+# Citation refresh: works looked up per OpenAlex request (OR-ed ids), how old
+# a work's last sync may get, request budget of one run, and how often the
+# app starts a run in the background
+ARCHIVE_REFRESH_BATCH_SIZE = 50
+ARCHIVE_REFRESH_STALE_AFTER = 7 * 24 * 3600
+ARCHIVE_REFRESH_MAX_REQUESTS = 40
+ARCHIVE_REFRESH_EVERY = 24 * 3600
+
+# Cache of full paper analyses, shared across sessions and restarts
+ANALYSIS_CACHE_PATH = "analysis_cache.db"
+ANALYSIS_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Headless batch analysis defaults
+BATCH_CONCURRENCY = 4
+BATCH_REQUESTS_PER_MINUTE = 30
+
+# Per-source request governor: steady requests/sec and burst size. OpenAlex
+# allows 10/s in its polite pool; unauthenticated Semantic Scholar shares a
+# small pool, so it is kept to one request per second.
+SOURCE_RATE_LIMITS = {
+    "openalex": (10, 10),
+    "crossref": (5, 5),
+    "semantic_scholar": (1, 1),
+}
+DEFAULT_RATE_LIMIT = (5, 5)
+FETCH_MAX_RETRIES = 4
+FETCH_BACKOFF_BASE = 0.5
+FETCH_BACKOFF_CAP = 30.0
+# Longest Retry-After honoured; a source asking for more fails the request at once
+FETCH_MAX_RETRY_AFTER = FETCH_BACKOFF_CAP
+# Failed requests in a row (retries included) that open a source's circuit, and how long it stays open
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 60.0
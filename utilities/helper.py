@@ -1,18 +1,23 @@
 # utilities/helper.py
-import streamlit as st
 import base64
 
 def encode_pdf(file_content):
     return base64.b64encode(file_content).decode("utf-8")
 
 def init_session_state():
+    import streamlit as st
+
     defaults = {
         "messages": [],
         "pdf_content": None,
         "notes": None,
         "selected_model": None,
         "model": None,
-        "start_analysis": False
+        "start_analysis": False,
+        "fetched_frames": None,
+        "merged_frame": None,
+        # Aggregate keys of the frames above, by source; reruns skip hashing them
+        "fingerprints": {}
     }
     for key, value in defaults.items():
         if key not in st.session_state:
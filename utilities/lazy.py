@@ -0,0 +1,24 @@
+# utilities/lazy.py
+import importlib
+
+
+def lazy_exports(package, exports):
+    """Build a package's __getattr__/__dir__ that import submodules on first use.
+
+    exports maps each public name to the relative submodule defining it, so
+    `import data_fetcher` costs nothing until one of its names is touched.
+    """
+
+    def __getattr__(name):
+        module = exports.get(name)
+        if module is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module, package), name)
+        # Cache on the package so later lookups skip this hook
+        setattr(importlib.import_module(package), name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(importlib.import_module(package))) | set(exports))
+
+    return __getattr__, __dir__
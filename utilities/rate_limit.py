@@ -0,0 +1,43 @@
+# utilities/rate_limit.py
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket: rate tokens per second, bursts up to capacity."""
+
+    def __init__(self, rate, capacity=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Block until tokens are available, then take them."""
+        while True:
+            with self._lock:
+                now = self.clock()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif not self.rate:
+                    return
+                else:
+                    start = max(self.updated, self.blocked_until)
+                    self.tokens = min(self.capacity, self.tokens + max(0.0, now - start) * self.rate)
+                    self.updated = now
+                    if self.tokens >= tokens:
+                        self.tokens -= tokens
+                        return
+                    wait = (tokens - self.tokens) / self.rate
+            self.sleep(wait)
+
+    def defer(self, seconds):
+        """Hold every caller back for at least seconds (e.g. an upstream Retry-After)."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, self.clock() + seconds)
+            # Nothing accrues while blocked, so callers resume at the base rate
+            self.tokens = 0
@@ -0,0 +1,117 @@
+# utilities/streaming.py
+import time
+
+from instrumentation import increment, observe
+
+# Redraw at most this often while text is arriving...
+RENDER_INTERVAL = 0.1
+# ...unless this much new text is waiting
+RENDER_MIN_BYTES = 2048
+
+
+class StreamRenderer:
+    """Draws streamed markdown into a Streamlit container without redrawing it all.
+
+    Completed blocks (text up to the last blank line outside a code fence)
+    are written once into their own element and never sent again; only the
+    unfinished tail is redrawn. Redraws are coalesced to one per `interval`
+    seconds or `min_bytes` of new text, and finish() always draws the rest,
+    so each byte goes to the browser a bounded number of times instead of
+    once per chunk.
+    """
+
+    def __init__(self, container, interval=RENDER_INTERVAL, min_bytes=RENDER_MIN_BYTES, stage="stream", clock=time.perf_counter):
+        self.container = container
+        self.interval = interval
+        self.min_bytes = min_bytes
+        self.stage = stage
+        self.clock = clock
+        self.parts = []
+        self.frozen = 0          # characters already written to frozen elements
+        self.tail = ""           # text of the live tail element
+        self.pending = 0         # characters received since the last redraw
+        self.last_render = None
+        self.render_seconds = 0.0
+        self.render_calls = 0
+        self.rendered_bytes = 0
+        self._text = ""
+        self._joined = 0
+        self._element = None
+
+    @property
+    def text(self):
+        if self._joined != len(self.parts):
+            self._text = "".join(self.parts)
+            self._joined = len(self.parts)
+        return self._text
+
+    def append(self, text):
+        if not text:
+            return
+        self.parts.append(text)
+        self.pending += len(text)
+        now = self.clock()
+        if self.last_render is None or self.pending >= self.min_bytes or now - self.last_render >= self.interval:
+            self._render(now)
+
+    def finish(self):
+        """Draw whatever is still pending and return the full text."""
+        if self.pending or self._element is None:
+            self._render(self.clock())
+        observe("render_seconds", self.render_seconds, stage=self.stage)
+        increment("render_calls", self.render_calls, stage=self.stage)
+        increment("rendered_bytes", self.rendered_bytes, stage=self.stage)
+        return self.text
+
+    def _draw(self, element, text):
+        started = time.perf_counter()
+        element.markdown(text)
+        self.render_seconds += time.perf_counter() - started
+        self.render_calls += 1
+        self.rendered_bytes += len(text)
+
+    def _render(self, now):
+        text = self.text
+        if self._element is None:
+            self._element = self.container.empty()
+        cut = _last_block_boundary(text, self.frozen)
+        if cut > self.frozen:
+            # Finish the live element with the completed blocks, then start a new tail
+            self._draw(self._element, text[self.frozen:cut])
+            self.frozen = cut
+            self._element = self.container.empty()
+            self.tail = ""
+        tail = text[self.frozen:]
+        if tail and tail != self.tail:
+            self._draw(self._element, tail)
+            self.tail = tail
+        self.pending = 0
+        self.last_render = now
+
+
+def _last_block_boundary(text, start):
+    """Offset just after the last blank line past start that is not inside a code fence."""
+    cut = start
+    position = start
+    in_fence = text.count("```", 0, start) % 2 == 1
+    while True:
+        blank = text.find("\n\n", position)
+        fence = text.find("```", position)
+        if fence != -1 and (blank == -1 or fence < blank):
+            in_fence = not in_fence
+            position = fence + 3
+            continue
+        if blank == -1:
+            return cut
+        if not in_fence:
+            cut = blank + 2
+        position = blank + 2
+
+
+def render_stream(stream, container, stage="stream", **kwargs):
+    """Render a model response stream into container and return the full text."""
+    renderer = StreamRenderer(container, stage=stage, **kwargs)
+    for chunk in stream:
+        # Error messages from process_query_stream arrive as plain strings
+        renderer.append(chunk if isinstance(chunk, str) else getattr(chunk, "text", "") or "")
+    return renderer.finish()